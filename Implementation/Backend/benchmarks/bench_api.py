@@ -0,0 +1,60 @@
+"""Benchmarks for the REST API, driven in-process through a test client."""
+import random
+import typing
+
+from fastapi.testclient import TestClient
+
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+from benchmarks.utils import BenchmarkResult, measure
+
+
+def run(
+    evaluation_system: EvaluationSystem, requests: int, seed: int
+) -> typing.List[BenchmarkResult]:
+    """
+    Sends requests to the read and write endpoints and measures their latency.
+
+    Args:
+        evaluation_system (EvaluationSystem): Filled evaluation system.
+        requests (int): Number of requests per endpoint.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        List[BenchmarkResult]: Results per endpoint.
+    """
+    rng = random.Random(seed)
+    client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+    courses = evaluation_system.get_all_courses()
+    cohorts = evaluation_system.get_all_cohorts()
+    endpoints: typing.Dict[str, typing.Callable[[], typing.Any]] = {
+        "GET /courses/list": lambda: client.get("/courses/list"),
+        "GET /faculties/list": lambda: client.get("/faculties/list"),
+        "GET /results/course/{course}": lambda: client.get(
+            f"/results/course/{rng.choice(courses)}"
+        ),
+        "GET /evaluations/course/{course}": lambda: client.get(
+            f"/evaluations/course/{rng.choice(courses)}",
+            headers={"Accept-Encoding": "gzip"},
+        ),
+        "GET /evaluations/cohort/{cohort}": lambda: client.get(
+            f"/evaluations/cohort/{rng.choice(cohorts)}",
+            headers={"Accept-Encoding": "gzip"},
+        ),
+        "POST /evaluation/multiple": lambda: client.post(
+            "/evaluation/multiple",
+            json={
+                "semester": "SS23",
+                "cohort": "2023",
+                "faculty": "Informatics",
+                "course": rng.choice(courses),
+                "lecturer": "Deepak Dhungana",
+                "evaluations": ["Benchmark comment."] * 10,
+            },
+        ),
+    }
+    return [
+        measure(f"API {name}", request, repeat=requests)
+        for name, request in endpoints.items()
+    ]
@@ -0,0 +1,120 @@
+"""Benchmarks for the hot paths of the EvaluationSystem."""
+import random
+import typing
+
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+)
+from evaluation_infrastructure.logic import dummy_generator
+from evaluation_infrastructure.logic.comment_store import CommentStore
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+from benchmarks.utils import BenchmarkResult, measure
+
+
+def build_evaluation_system(
+    database_interface: DBInterface,
+    comment_count: int,
+    seed: int,
+    workers: int = 1,
+    comment_store: typing.Optional[CommentStore] = None,
+) -> typing.Tuple[EvaluationSystem, BenchmarkResult]:
+    """
+    Creates an evaluation system filled with roughly the given number of comments.
+
+    Args:
+        database_interface (DBInterface): Database the system is backed up to.
+        comment_count (int): Number of comments to be generated.
+        seed (int): Seed for the random generator.
+        workers (int): Number of processes generating the comments.
+        comment_store (Optional[CommentStore]): Store holding the comments,
+            by default they are kept in lists.
+
+    Returns:
+        Tuple[EvaluationSystem, BenchmarkResult]: The filled system and the
+            time and memory it took to generate it.
+    """
+    evaluation_system = EvaluationSystem(database_interface, comment_store)
+    config = dummy_generator.GeneratorConfig(comment_count=comment_count, seed=seed)
+    generation = measure(
+        "generate_dummy_data",
+        lambda: dummy_generator.generate_dummy_data(
+            evaluation_system, config=config, workers=workers
+        ),
+        trace_memory=True,
+    )
+    return evaluation_system, generation
+
+
+def _random_evaluation(rng: random.Random) -> Evaluation:
+    """Creates an evaluation with a random key and a few short comments."""
+    return Evaluation(
+        semester=rng.choice(dummy_generator.semesters),
+        cohort=rng.choice(dummy_generator.cohorts),
+        faculty=rng.choice(dummy_generator.faculties),
+        course=rng.choice(dummy_generator.courses),
+        lecturer=rng.choice(dummy_generator.lecturers),
+        evaluations=["Benchmark comment."] * rng.randint(1, 5),
+    )
+
+
+def run(
+    evaluation_system: EvaluationSystem, repeat: int, seed: int
+) -> typing.List[BenchmarkResult]:
+    """
+    Runs the benchmarks against the given evaluation system.
+
+    Args:
+        evaluation_system (EvaluationSystem): Filled evaluation system.
+        repeat (int): Number of calls for the per-request benchmarks.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        List[BenchmarkResult]: Results of the benchmarks.
+    """
+    rng = random.Random(seed)
+    courses = evaluation_system.get_all_courses()
+    cohorts = evaluation_system.get_all_cohorts()
+    keys = [evaluation.query.values() for evaluation in evaluation_system.evaluations]
+    results = [
+        measure(
+            "EvaluationSystem.add_or_update_evaluation",
+            lambda: evaluation_system.add_or_update_evaluation(_random_evaluation(rng)),
+            repeat=repeat,
+        ),
+        measure(
+            "EvaluationSystem.get_evaluation",
+            lambda: evaluation_system.get_evaluation(*rng.choice(keys)),
+            repeat=repeat,
+        ),
+        measure(
+            "EvaluationSystem.get_evaluations_by_course",
+            lambda: evaluation_system.get_evaluations_by_course(rng.choice(courses)),
+            repeat=repeat,
+        ),
+        measure(
+            "EvaluationSystem.get_evaluations_by_cohort",
+            lambda: evaluation_system.get_evaluations_by_cohort(rng.choice(cohorts)),
+            repeat=repeat,
+        ),
+        measure(
+            "EvaluationSystem.return_results",
+            lambda: evaluation_system.return_results(rng.choice(courses)),
+            repeat=repeat,
+        ),
+        measure(
+            "EvaluationSystem.backup_to_database",
+            evaluation_system.backup_to_database,
+            trace_memory=True,
+        ),
+    ]
+    reloaded_system = EvaluationSystem(evaluation_system.database_interface)
+    results.append(
+        measure(
+            "EvaluationSystem.create_from_database",
+            reloaded_system.create_from_database,
+            trace_memory=True,
+        )
+    )
+    return results
@@ -0,0 +1,59 @@
+"""Benchmarks for the throughput of the sentiment scoring."""
+import typing
+
+from evaluation_infrastructure.logic import sentiment
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+from benchmarks.utils import BenchmarkResult, measure
+
+
+def run(
+    evaluation_system: EvaluationSystem, workers: int
+) -> typing.Tuple[typing.List[BenchmarkResult], typing.List[sentiment.ScoringRun]]:
+    """
+    Scores all comments of the evaluation system in this process and in
+    worker processes, without storing the scores.
+
+    Args:
+        evaluation_system (EvaluationSystem): Filled evaluation system.
+        workers (int): Number of worker processes of the parallel run.
+
+    Returns:
+        Tuple[List[BenchmarkResult], List[ScoringRun]]: Latency of the runs,
+            and their throughput in comments per second and core.
+    """
+    comments = [
+        comment
+        for evaluation in evaluation_system.evaluations
+        for comment in evaluation.evaluations
+    ]
+    results, runs = [], []
+    for worker_count in sorted({1, workers}):
+        results.append(
+            measure(
+                f"sentiment.score_comments[workers={worker_count}]",
+                lambda: runs.append(
+                    sentiment.score_comments(comments, workers=worker_count)[1]
+                ),
+            )
+        )
+    return results, runs
+
+
+def print_throughput(runs: typing.List[sentiment.ScoringRun]) -> None:
+    """
+    Prints the throughput of the scoring runs.
+
+    Args:
+        runs (List[ScoringRun]): Runs to be printed.
+    """
+    header = f"{'workers':>8}{'comments':>12}{'comments/s':>14}{'comments/s/core':>18}"
+    print(header)
+    print("-" * len(header))
+    for scoring_run in runs:
+        row = scoring_run.dict
+        print(
+            f"{row['workers']:>8}{row['comments']:>12}"
+            f"{row['comments_per_second']:>14.0f}"
+            f"{row['comments_per_second_per_core']:>18.0f}"
+        )
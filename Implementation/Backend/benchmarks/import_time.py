@@ -0,0 +1,207 @@
+"""
+Measures the import time of the entry points and checks it against a budget.
+
+Every module is imported in a fresh interpreter with `python -X importtime`,
+the fastest of the runs counts. Fails if a module exceeds its budget or loads
+a dependency it must not load, e.g. pydantic for the evaluation system.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --scale 2 --json imports.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import typing
+from dataclasses import dataclass, field
+
+# Budget of the cumulative import time in milliseconds per module
+BUDGETS_MS: typing.Dict[str, float] = {
+    "evaluation_infrastructure.logic.sentiment": 25,
+    "evaluation_infrastructure.logic.dummy_generator": 50,
+    "evaluation_infrastructure.database_access.factory": 15,
+    "evaluation_infrastructure.logic.evaluation_system": 130,
+    "evaluation_infrastructure.api.rest_api": 500,
+}
+
+# Dependencies a module must not load, they are imported on first use
+FORBIDDEN: typing.Dict[str, typing.Tuple[str, ...]] = {
+    "evaluation_infrastructure.logic.sentiment": (
+        "multiprocessing",
+        "prometheus_client",
+    ),
+    "evaluation_infrastructure.logic.dummy_generator": (
+        "multiprocessing",
+        "prometheus_client",
+        "pydantic",
+    ),
+    "evaluation_infrastructure.database_access.factory": ("pymongo", "sqlite3"),
+    "evaluation_infrastructure.logic.evaluation_system": (
+        "fastapi",
+        "pydantic",
+        "pymongo",
+        "uvicorn",
+    ),
+    "evaluation_infrastructure.api.rest_api": ("pymongo", "uvicorn"),
+}
+
+
+@dataclass
+class ImportResult:
+    """Import time of a module and the modules it loaded."""
+
+    module: str
+    budget_ms: float
+    runs_ms: typing.List[float] = field(default_factory=list)
+    loaded: typing.Set[str] = field(default_factory=set, repr=False)
+    forbidden: typing.Tuple[str, ...] = ()
+
+    @property
+    def best_ms(self) -> float:
+        """Fastest import of the runs."""
+        return min(self.runs_ms)
+
+    @property
+    def violations(self) -> typing.List[str]:
+        """Forbidden dependencies loaded by the module."""
+        return [
+            dependency
+            for dependency in self.forbidden
+            if any(
+                name == dependency or name.startswith(f"{dependency}.")
+                for name in self.loaded
+            )
+        ]
+
+    @property
+    def passed(self) -> bool:
+        """Whether the module is within its budget and loads no forbidden dependency."""
+        return self.best_ms <= self.budget_ms and not self.violations
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        """Converts the dataclass to a dictionary"""
+        return {
+            "module": self.module,
+            "best_ms": self.best_ms,
+            "budget_ms": self.budget_ms,
+            "runs_ms": self.runs_ms,
+            "modules_loaded": len(self.loaded),
+            "violations": self.violations,
+            "passed": self.passed,
+        }
+
+
+def import_once(module: str) -> typing.Tuple[float, typing.Set[str]]:
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module (str): Module to be imported.
+
+    Returns:
+        Tuple[float, Set[str]]: Cumulative import time of the module in
+            milliseconds and the names of all modules imported with it.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    # Lines look like "import time: <self us> | <cumulative us> | <indented name>"
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if cumulative_us.strip().isdigit():
+            timings[name.strip()] = int(cumulative_us) / 1000
+    if process.returncode != 0 or module not in timings:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+    return timings[module], set(timings)
+
+
+def run(
+    modules: typing.Dict[str, float], runs: int = 5, scale: float = 1.0
+) -> typing.List[ImportResult]:
+    """
+    Measures the import time of the modules.
+
+    Args:
+        modules (Dict[str, float]): Budget in milliseconds by module.
+        runs (int): Imports per module, the fastest one counts.
+        scale (float): Factor applied to the budgets, e.g. for slower machines.
+
+    Returns:
+        List[ImportResult]: Import time and violations per module.
+    """
+    results = []
+    for module, budget_ms in modules.items():
+        result = ImportResult(
+            module, budget_ms * scale, forbidden=FORBIDDEN.get(module, ())
+        )
+        for _ in range(runs):
+            milliseconds, loaded = import_once(module)
+            result.runs_ms.append(milliseconds)
+            result.loaded |= loaded
+        results.append(result)
+    return results
+
+
+def print_report(results: typing.List[ImportResult]) -> None:
+    """
+    Prints the results as a table.
+
+    Args:
+        results (List[ImportResult]): Results to be printed.
+    """
+    header = f"{'module':<52}{'best ms':>10}{'budget ms':>11}{'modules':>9}  status"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        status = "ok" if result.passed else "FAIL"
+        if result.violations:
+            status += f" (loads {', '.join(result.violations)})"
+        print(
+            f"{result.module:<52}{result.best_ms:>10.1f}{result.budget_ms:>11.0f}"
+            f"{len(result.loaded):>9}  {status}"
+        )
+
+
+def main() -> None:
+    """Parses the arguments, measures the imports and exits with 1 on a violation."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Factor applied to all budgets."
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        choices=list(BUDGETS_MS),
+        help="Module to be measured, all if omitted. Can be given several times.",
+    )
+    parser.add_argument("--json", help="File to write the results to as JSON.")
+    arguments = parser.parse_args()
+
+    modules = {
+        module: budget
+        for module, budget in BUDGETS_MS.items()
+        if not arguments.module or module in arguments.module
+    }
+    results = run(modules, arguments.runs, arguments.scale)
+    print_report(results)
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as file:
+            json.dump([result.dict for result in results], file, indent=2)
+    if not all(result.passed for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
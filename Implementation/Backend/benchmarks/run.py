@@ -0,0 +1,154 @@
+"""
+Runs the benchmark suite and prints p50/p99 latency, throughput and memory.
+
+Usage:
+    python -m benchmarks.run --comments 100000 --backend mongomock
+    python -m benchmarks.run --comments 1000000 --backend mongo --mongo-host mongodb://localhost:27017/
+    python -m benchmarks.run --comments 1000000 --backend sqlite --sqlite-path bench.sqlite3
+    python -m benchmarks.run --comments 100000 --backend memory --latency-ms 5
+    python -m benchmarks.run --comments 1000000 --comment-store comments.bin
+
+The mongo backend writes into the evaluation_system database of the given host,
+so only point it at a throwaway mongod. The sqlite backend and the comment store
+replace the given files.
+"""
+import argparse
+import json
+import os
+
+from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+)
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.comment_store import open_comment_store
+
+from benchmarks import bench_api, bench_evaluation_system, bench_sentiment
+from benchmarks.utils import print_report
+
+
+def create_database_interface(
+    backend: str, mongo_host: str, sqlite_path: str, latency_seconds: float = 0.0
+) -> DBInterface:
+    """
+    Creates an empty database the evaluation system is backed up to.
+
+    Args:
+        backend (str): "mongo" for a running mongod, "mongomock" for an in-process
+            stand-in, "sqlite" for an embedded SQLite file, "memory" for the
+            in-memory reference backend.
+        mongo_host (str): Host of the mongod, only used for the mongo backend.
+        sqlite_path (str): Path of the SQLite file, only used for the sqlite backend.
+        latency_seconds (float): Simulated latency per call, only used for the
+            memory backend.
+
+    Returns:
+        DBInterface: Interface to the selected database.
+    """
+    if backend == "memory":
+        return InMemoryInterface(latency_seconds=latency_seconds)
+    if backend == "sqlite":
+        from evaluation_infrastructure.database_access.sqlite_interface import (  # pylint: disable=import-outside-toplevel
+            SQLiteInterface,
+        )
+
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(sqlite_path + suffix):
+                os.remove(sqlite_path + suffix)
+        return SQLiteInterface(sqlite_path)
+    from evaluation_infrastructure.database_access.mongo_interface import (  # pylint: disable=import-outside-toplevel
+        MongoInterface,
+    )
+
+    if backend == "mongomock":
+        import mongomock  # pylint: disable=import-outside-toplevel
+
+        return MongoInterface(mongo_host, client=mongomock.MongoClient())
+    database_interface = MongoInterface(mongo_host)
+    database_interface.client.drop_database("evaluation_system")
+    database_interface.ensure_indexes()
+    return database_interface
+
+
+def main() -> None:
+    """Parses the arguments and runs the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, default=10_000)
+    parser.add_argument(
+        "--backend",
+        choices=["mongomock", "mongo", "sqlite", "memory"],
+        default="mongomock",
+    )
+    parser.add_argument("--mongo-host", default=ConfigDatabase.host)
+    parser.add_argument("--sqlite-path", default="benchmark.sqlite3")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency per database call of the memory backend.",
+    )
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Processes generating the dataset."
+    )
+    parser.add_argument(
+        "--sentiment-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes scoring the comments in the parallel sentiment run.",
+    )
+    parser.add_argument(
+        "--comment-store",
+        help="File of the memory-mapped comment store, comments are kept in lists if omitted.",
+    )
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--json", help="File to write the results to as JSON.")
+    arguments = parser.parse_args()
+
+    database_interface = create_database_interface(
+        arguments.backend,
+        arguments.mongo_host,
+        arguments.sqlite_path,
+        arguments.latency_ms / 1000,
+    )
+    evaluation_system, generation = bench_evaluation_system.build_evaluation_system(
+        database_interface,
+        arguments.comments,
+        arguments.seed,
+        arguments.workers,
+        open_comment_store(arguments.comment_store),
+    )
+    results = [generation]
+    results += bench_evaluation_system.run(
+        evaluation_system, arguments.repeat, arguments.seed
+    )
+    if not arguments.skip_api:
+        results += bench_api.run(evaluation_system, arguments.requests, arguments.seed)
+    sentiment_results, scoring_runs = bench_sentiment.run(
+        evaluation_system, arguments.sentiment_workers
+    )
+    results += sentiment_results
+
+    print_report(results)
+    print()
+    bench_sentiment.print_throughput(scoring_runs)
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "comments": arguments.comments,
+                    "backend": arguments.backend,
+                    "results": [result.dict for result in results],
+                    "sentiment": [scoring_run.dict for scoring_run in scoring_runs],
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
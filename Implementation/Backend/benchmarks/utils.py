@@ -0,0 +1,107 @@
+"""Helpers for measuring latency, throughput and memory in the benchmarks."""
+import statistics
+import time
+import tracemalloc
+import typing
+from dataclasses import dataclass, field
+
+
+@dataclass
+class BenchmarkResult:
+    """Latency samples and memory usage of a single benchmark."""
+
+    name: str
+    latencies: typing.List[float] = field(default_factory=list)
+    peak_memory_bytes: int = 0
+
+    @property
+    def total_seconds(self) -> float:
+        """Total time spent in the measured calls."""
+        return sum(self.latencies)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the given percentile of the latencies.
+
+        Args:
+            percent (float): Percentile between 0 and 100.
+
+        Returns:
+            float: Latency in seconds.
+        """
+        if not self.latencies:
+            return 0.0
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[
+            max(0, min(98, round(percent) - 1))
+        ]
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Union[str, int, float]]:
+        """Converts the dataclass to a dictionary"""
+        return {
+            "name": self.name,
+            "calls": len(self.latencies),
+            "total_seconds": self.total_seconds,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "ops_per_second": (
+                len(self.latencies) / self.total_seconds if self.total_seconds else 0.0
+            ),
+            "peak_memory_mb": self.peak_memory_bytes / 2**20,
+        }
+
+
+def measure(
+    name: str,
+    function: typing.Callable[[], typing.Any],
+    repeat: int = 1,
+    trace_memory: bool = False,
+) -> BenchmarkResult:
+    """
+    Calls the function repeatedly and records the latency of every call.
+
+    Args:
+        name (str): Name of the benchmark.
+        function (Callable[[], Any]): Function to be measured.
+        repeat (int): Number of calls.
+        trace_memory (bool): Whether to record the peak memory allocated by the calls.
+            Tracing slows down the calls, so latencies are less accurate.
+
+    Returns:
+        BenchmarkResult: Latencies and peak memory of the calls.
+    """
+    result = BenchmarkResult(name=name)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            result.latencies.append(time.perf_counter() - started)
+        if trace_memory:
+            result.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result
+
+
+def print_report(results: typing.List[BenchmarkResult]) -> None:
+    """
+    Prints the results as a table.
+
+    Args:
+        results (List[BenchmarkResult]): Results to be printed.
+    """
+    header = f"{'benchmark':<45}{'calls':>8}{'p50 ms':>12}{'p99 ms':>12}{'ops/s':>12}{'peak MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        row = result.dict
+        print(
+            f"{row['name']:<45}{row['calls']:>8}{row['p50_ms']:>12.3f}"
+            f"{row['p99_ms']:>12.3f}{row['ops_per_second']:>12.1f}"
+            f"{row['peak_memory_mb']:>10.1f}"
+        )
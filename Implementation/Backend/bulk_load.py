@@ -0,0 +1,74 @@
+"""
+Loads a directory of historical evaluation exports (JSON, JSON lines, CSV) into the database.
+
+Comments are appended to the stored evaluations. Stop the backend during the
+load, and rerun the same command to resume an interrupted load.
+
+Usage:
+    python bulk_load.py exports/ --workers 8
+    python bulk_load.py exports/ --backend sqlite --location evaluation_system.sqlite3
+    python bulk_load.py exports/ --checkpoint none # start over
+"""
+import argparse
+import os
+
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.database_access.factory import (
+    BACKENDS,
+    create_database_interface,
+)
+from evaluation_infrastructure.logic import bulk_loader
+from evaluation_infrastructure.logic.archive import open_archive_store
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("directory", help="Directory of the exports.")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--files-per-chunk", type=int, default=64)
+parser.add_argument("--batch-size", type=int, default=1000)
+parser.add_argument("--backend", choices=BACKENDS, default=ConfigDatabase.backend)
+parser.add_argument("--location", help="Host of the mongod or path of the SQLite file.")
+parser.add_argument(
+    "--checkpoint",
+    help="File of the checkpoint, 'none' to disable. Defaults to "
+    ".bulk_load_checkpoint.json in the directory of the exports.",
+)
+arguments = parser.parse_args()
+
+checkpoint_path = arguments.checkpoint or os.path.join(
+    arguments.directory, ".bulk_load_checkpoint.json"
+)
+archive_store = open_archive_store(config.ARCHIVE_DIRECTORY)
+
+
+def print_progress(report: bulk_loader.LoadReport) -> None:
+    """Prints the progress after every chunk of files."""
+    print(
+        f"{report.files} files, {report.records} records, "
+        f"{report.evaluations_written} evaluations written, "
+        f"{report.records_per_second:.0f} records/s"
+    )
+
+
+report = bulk_loader.load_exports(
+    create_database_interface(arguments.backend, arguments.location),
+    arguments.directory,
+    workers=arguments.workers,
+    files_per_chunk=arguments.files_per_chunk,
+    batch_size=arguments.batch_size,
+    checkpoint_path=None if checkpoint_path == "none" else checkpoint_path,
+    archived_semesters=(
+        set(archive_store.load_index()) if archive_store is not None else ()
+    ),
+    progress=print_progress,
+)
+for error in report.errors:
+    print(error)
+print(
+    f"Loaded {report.records} records with {report.comments} comments from "
+    f"{report.files} files in {report.seconds:.1f}s "
+    f"({report.records_per_second:.0f} records/s), {report.invalid} invalid, "
+    f"{report.skipped_files} files already loaded."
+)
+if report.archived_comments:
+    print(f"Skipped {report.archived_comments} comments of archived semesters.")
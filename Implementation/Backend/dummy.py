@@ -1,11 +1,56 @@
-"""Generates dummy data and stores it in the database.""" ""
+"""
+Generates dummy data and stores it in the database or in a snapshot file.
+
+Usage:
+    python dummy.py --comments 1000000 --workers 8
+    python dummy.py --comments 1000000 --snapshot fixture.jsonl
+    python dummy.py --backend sqlite --location evaluation_system.sqlite3
+"""
+import argparse
+import time
+
 from evaluation_infrastructure.config.config_database import ConfigDatabase
-from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
-from evaluation_infrastructure.database_access.mongo_interface import MongoInterface
-from evaluation_infrastructure.logic.dummy_generator import generate_dummy_data
-
-mongo_interface = MongoInterface(ConfigDatabase.host)
-evaluation_system = EvaluationSystem(mongo_interface)
-generate_dummy_data(evaluation_system=evaluation_system)
-# quit()
-evaluation_system.backup_to_database()
+from evaluation_infrastructure.database_access.factory import (
+    BACKENDS,
+    create_database_interface,
+)
+from evaluation_infrastructure.logic import dummy_generator
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--comments", type=int, default=7500)
+parser.add_argument("--comments-per-evaluation", type=int, default=25)
+parser.add_argument("--course-skew", type=float, default=1.0)
+parser.add_argument("--lecturer-skew", type=float, default=1.0)
+parser.add_argument("--batch-size", type=int, default=1000)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--workers", type=int, default=1)
+parser.add_argument("--backend", choices=BACKENDS, default=ConfigDatabase.backend)
+parser.add_argument("--location", help="Host of the mongod or path of the SQLite file.")
+parser.add_argument(
+    "--snapshot", help="File to write to instead of the (empty) database."
+)
+arguments = parser.parse_args()
+
+config = dummy_generator.GeneratorConfig(
+    comment_count=arguments.comments,
+    comments_per_evaluation=arguments.comments_per_evaluation,
+    course_skew=arguments.course_skew,
+    lecturer_skew=arguments.lecturer_skew,
+    batch_size=arguments.batch_size,
+    seed=arguments.seed,
+)
+started = time.perf_counter()
+if arguments.snapshot:
+    evaluation_count = dummy_generator.write_snapshot(
+        arguments.snapshot, config, arguments.workers
+    )
+else:
+    evaluation_count = dummy_generator.write_to_database(
+        create_database_interface(arguments.backend, arguments.location),
+        config,
+        arguments.workers,
+    )
+print(
+    f"Generated {evaluation_count} evaluations with {arguments.comments} comments "
+    f"in {time.perf_counter() - started:.1f}s."
+)
@@ -0,0 +1,373 @@
+"""Middlewares for the REST API."""
+import gzip
+import time
+import typing
+import zlib
+from dataclasses import dataclass
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from evaluation_infrastructure import metrics, tracing
+
+# Content encodings marked in the ETags of compressed responses
+ETAG_ENCODINGS = ("br", "gzip")
+
+
+@dataclass
+class WireStats:
+    """Bytes on the wire and CPU cost for a single endpoint."""
+
+    requests: int = 0
+    compressed_responses: int = 0
+    body_bytes: int = 0
+    wire_bytes: int = 0
+    handler_cpu_seconds: float = 0.0
+    compression_cpu_seconds: float = 0.0
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """Converts the dataclass to a dictionary"""
+        return {
+            "requests": self.requests,
+            "compressed_responses": self.compressed_responses,
+            "body_bytes": self.body_bytes,
+            "wire_bytes": self.wire_bytes,
+            "compression_ratio": (
+                self.wire_bytes / self.body_bytes if self.body_bytes else 1.0
+            ),
+            "handler_cpu_seconds": self.handler_cpu_seconds,
+            "compression_cpu_seconds": self.compression_cpu_seconds,
+        }
+
+
+def encode_etag(etag: str, encoding: str) -> str:
+    """
+    Returns the ETag of a representation compressed with the given encoding,
+    e.g. "abc-gzip" for "abc", since its bytes differ from the uncompressed one.
+
+    Args:
+        etag (str): ETag of the uncompressed representation.
+        encoding (str): Content encoding, "br" or "gzip".
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def decode_etags(if_none_match: str) -> typing.Tuple[str, typing.Optional[str]]:
+    """
+    Removes the encoding suffixes added by encode_etag from the ETags of an
+    If-None-Match header, so they match the ETags known to the handlers.
+
+    Args:
+        if_none_match (str): Value of the If-None-Match header.
+
+    Returns:
+        Tuple[str, Optional[str]]: The header without the suffixes and the
+            encoding of the last suffix removed, None if there was none.
+    """
+    candidates = []
+    encoding = None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        for etag_encoding in ETAG_ENCODINGS:
+            suffix = f'-{etag_encoding}"'
+            if candidate.endswith(suffix):
+                candidate = f'{candidate[: -len(suffix)]}"'
+                encoding = etag_encoding
+                break
+        candidates.append(candidate)
+    return ", ".join(candidates), encoding
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies with brotli or gzip, depending on the
+    Accept-Encoding header of the request. Bodies smaller than the minimum
+    size are sent uncompressed, since compressing them costs more CPU than it saves.
+    Streamed bodies are compressed chunk by chunk as they are sent.
+    Compressed responses get their own ETag, see encode_etag.
+    Records bytes on the wire and CPU time for every endpoint.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        stats: typing.Optional[typing.Dict[str, WireStats]] = None,
+    ) -> None:
+        """
+        Initializes the middleware.
+
+        Args:
+            app (ASGIApp): Application to be wrapped.
+            minimum_size (int): Minimum body size in bytes to be compressed.
+            gzip_level (int): Compression level for gzip (1-9).
+            brotli_quality (int): Compression quality for brotli (0-11).
+            stats (Optional[Dict[str, WireStats]]): Collected statistics per endpoint.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats if stats is not None else {}
+
+    def _select_encoding(self, headers: Headers) -> typing.Optional[str]:
+        """
+        Selects the encoding for the response.
+
+        Args:
+            headers (Headers): Headers of the request.
+
+        Returns:
+            Optional[str]: "br", "gzip" or None if the client accepts neither.
+        """
+        accepted = {
+            encoding.split(";")[0].strip().lower()
+            for encoding in headers.get("accept-encoding", "").split(",")
+        }
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        """Compresses the body with the given encoding."""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _stream_compressor(
+        self, encoding: str
+    ) -> typing.Tuple[typing.Callable[[bytes], bytes], typing.Callable[[], bytes]]:
+        """
+        Returns the functions compressing the chunks of a streamed body with
+        the given encoding and flushing the end of the compressed stream.
+        """
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        # wbits 31 writes the gzip header and trailer
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+    @staticmethod
+    def _mark_compressed(headers: MutableHeaders, encoding: str) -> None:
+        """Sets the headers of a response compressed with the given encoding."""
+        headers["Content-Encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = encode_etag(headers["etag"], encoding)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = self._select_encoding(request_headers)
+        etag_encoding = None
+        if if_none_match := request_headers.get("if-none-match"):
+            if_none_match, etag_encoding = decode_etags(if_none_match)
+            if etag_encoding is not None:
+                # The handler compares the ETags of the uncompressed representations
+                scope = {**scope, "headers": list(scope["headers"])}
+                MutableHeaders(scope=scope)["If-None-Match"] = if_none_match
+        start_message: typing.Optional[Message] = None
+        # Compress and flush functions while a streamed body is compressed
+        compressor: typing.Optional[
+            typing.Tuple[typing.Callable, typing.Callable]
+        ] = None
+        wire_bytes = 0
+        body_bytes = 0
+        compressed = False
+        compression_cpu_seconds = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, wire_bytes, body_bytes, compressed
+            nonlocal compression_cpu_seconds
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                if message["status"] == 304 and etag_encoding is not None:
+                    # Not modified, the client keeps its compressed representation
+                    headers = MutableHeaders(raw=message["headers"])
+                    if "etag" in headers:
+                        headers["ETag"] = encode_etag(headers["etag"], etag_encoding)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                compress = (
+                    encoding is not None
+                    and "content-encoding" not in headers
+                    and start_message["status"] not in (204, 304)
+                )
+                if not more_body:
+                    # The whole body in a single message
+                    body_bytes = len(body)
+                    if compress and body_bytes >= self.minimum_size:
+                        started = time.process_time()
+                        with tracing.span("compression"):
+                            body = self._compress(body, encoding)
+                        compression_cpu_seconds = time.process_time() - started
+                        compressed = True
+                        self._mark_compressed(headers, encoding)
+                        headers["Content-Length"] = str(len(body))
+                    wire_bytes = len(body)
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # A streamed body is not buffered, its size is not known yet
+                if compress:
+                    compressor = self._stream_compressor(encoding)
+                    compressed = True
+                    self._mark_compressed(headers, encoding)
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                await send(start_message)
+                start_message = None
+
+            body_bytes += len(body)
+            if compressor is not None:
+                started = time.process_time()
+                with tracing.span("compression"):
+                    compress_chunk, flush = compressor
+                    body = compress_chunk(body)
+                    if not more_body:
+                        body += flush()
+                compression_cpu_seconds += time.process_time() - started
+            wire_bytes += len(body)
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        started = time.process_time()
+        await self.app(scope, receive, send_wrapper)
+        handler_cpu_seconds = time.process_time() - started - compression_cpu_seconds
+
+        route = scope.get("route")
+        endpoint = (
+            f"{scope['method']} {route.path}" if route is not None else "unmatched"
+        )
+        stats = self.stats.setdefault(endpoint, WireStats())
+        stats.requests += 1
+        stats.compressed_responses += int(compressed)
+        stats.body_bytes += body_bytes
+        stats.wire_bytes += wire_bytes
+        stats.handler_cpu_seconds += handler_cpu_seconds
+        stats.compression_cpu_seconds += compression_cpu_seconds
+
+
+class MetricsMiddleware:
+    """
+    Records the latency and status code of every request per route.
+    Requests are labeled with the route template (e.g. /results/course/{course})
+    instead of the concrete path, to keep the number of time series bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initializes the middleware.
+
+        Args:
+            app (ASGIApp): Application to be wrapped.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            metrics.REQUEST_LATENCY.labels(scope["method"], route_path).observe(
+                time.perf_counter() - started
+            )
+            metrics.REQUESTS.labels(scope["method"], route_path, status_code).inc()
+
+
+class TracingMiddleware:
+    """
+    Traces every request while the tracer is enabled, so the spans recorded
+    by the handler (e.g. lookup, model build, serialization) are attributed
+    to it. Does nothing but check the tracer while it is disabled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        tracer: tracing.Tracer,
+        exempt_prefixes: typing.Iterable[str] = (),
+    ) -> None:
+        """
+        Initializes the middleware.
+
+        Args:
+            app (ASGIApp): Application to be wrapped.
+            tracer (tracing.Tracer): Tracer keeping the traces.
+            exempt_prefixes (Iterable[str]): Path prefixes which are never traced,
+                e.g. the endpoints reading the traces.
+        """
+        self.app = app
+        self.tracer = tracer
+        self.exempt_prefixes = tuple(exempt_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.tracer.enabled
+            or scope["path"].startswith(self.exempt_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        trace = self.tracer.start(scope["method"], scope["path"])
+        token = tracing.CURRENT_TRACE.set(trace)
+        profiler = self.tracer.start_profile()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            tracing.CURRENT_TRACE.reset(token)
+            route = scope.get("route")
+            self.tracer.finish(
+                trace,
+                route.path if route is not None else "unmatched",
+                status_code,
+                profiler,
+            )
@@ -0,0 +1,158 @@
+"""Cache of rendered dashboard payloads and the request frequency of the courses."""
+import json
+import os
+import threading
+import typing
+from collections import Counter, OrderedDict
+
+from evaluation_infrastructure.logger import logger
+
+
+class CachedPayload(typing.NamedTuple):
+    """Rendered body of a response and its media type."""
+
+    body: bytes
+    media_type: str
+
+
+class PayloadCache:
+    """
+    Rendered response bodies by their cache key, which includes the ETag,
+    so a changed version never hits an old entry. The least recently used
+    entries are dropped once the bodies exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_bytes (int): Maximum total size of the cached bodies.
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries: typing.OrderedDict[str, CachedPayload] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Optional[CachedPayload]:
+        """
+        Returns a cached payload.
+
+        Args:
+            key (str): Cache key of the payload.
+
+        Returns:
+            Optional[CachedPayload]: The payload, None if it is not cached.
+        """
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return payload
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key: str, body: bytes, media_type: str) -> None:
+        """
+        Caches a payload, dropping the least recently used ones if needed.
+
+        Args:
+            key (str): Cache key of the payload.
+            body (bytes): Rendered body.
+            media_type (str): Media type of the body.
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if (previous := self.entries.pop(key, None)) is not None:
+                self.size_bytes -= len(previous.body)
+            self.entries[key] = CachedPayload(body, media_type)
+            self.size_bytes += len(body)
+            while self.size_bytes > self.max_bytes:
+                _key, dropped = self.entries.popitem(last=False)
+                self.size_bytes -= len(dropped.body)
+
+    @property
+    def status(self) -> typing.Dict[str, int]:
+        """Number and size of the cached payloads, hits and misses."""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class RequestFrequency:
+    """
+    Number of dashboard requests per course, kept across restarts in a JSON
+    file. The counts of previous runs are multiplied by the decay when they
+    are loaded, so recent requests weigh more.
+    """
+
+    def __init__(self, path: typing.Optional[str], decay: float = 0.5) -> None:
+        """
+        Initializes the counts, loading them from the file if it exists.
+
+        Args:
+            path (Optional[str]): Path of the JSON file, None to keep the
+                counts in memory only.
+            decay (float): Factor applied to the counts of previous runs.
+        """
+        self.path = path
+        self.counts: typing.Counter[str] = Counter()
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    self.counts.update(
+                        {
+                            course: count * decay
+                            for course, count in json.load(file).items()
+                        }
+                    )
+            except (OSError, ValueError, AttributeError) as exc:
+                logger.warning(f"Ignoring the request frequency in {path}: {exc}")
+
+    def record(self, course: str) -> None:
+        """
+        Counts a request for the dashboard of a course.
+
+        Args:
+            course (str): Requested course.
+        """
+        with self.lock:
+            self.counts[course] += 1
+
+    def ranked(self, courses: typing.Iterable[str]) -> typing.List[str]:
+        """
+        Sorts the courses by their request frequency, most requested first.
+
+        Args:
+            courses (Iterable[str]): Courses to be sorted.
+
+        Returns:
+            List[str]: The courses, ties in their given order.
+        """
+        with self.lock:
+            return sorted(courses, key=lambda course: -self.counts.get(course, 0))
+
+    def save(self) -> None:
+        """Writes the counts to the file, replacing it atomically."""
+        if self.path is None:
+            return
+        with self.lock:
+            counts = dict(self.counts)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(counts, file)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,264 @@
+"""Rate limiting and admission control for the REST API."""
+import math
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from evaluation_infrastructure import metrics
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate up to its capacity.
+    Taking tokens fails while the bucket holds too few; charging always
+    succeeds and may leave the bucket in debt, which has to be refilled first.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens, the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """Adds the tokens accumulated since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float = 1.0, now: typing.Optional[float] = None) -> float:
+        """
+        Takes tokens from the bucket if it holds enough.
+
+        Args:
+            cost (float): Number of tokens to be taken.
+            now (Optional[float]): Current time of time.monotonic.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until
+                the bucket holds enough.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def charge(self, cost: float, now: typing.Optional[float] = None) -> None:
+        """
+        Takes tokens from the bucket, even if this leaves it in debt.
+
+        Args:
+            cost (float): Number of tokens to be taken.
+            now (Optional[float]): Current time of time.monotonic.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= cost
+
+    def debt_seconds(self, now: typing.Optional[float] = None) -> float:
+        """
+        Returns the seconds until the debt of the bucket is refilled.
+
+        Args:
+            now (Optional[float]): Current time of time.monotonic.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        return max(0.0, -self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token bucket per client. The buckets of the least recently seen clients
+    are dropped once more than max_clients are tracked, dropped clients
+    start again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10_000) -> None:
+        """
+        Initializes the rate limiter.
+
+        Args:
+            rate (float): Requests per second and client.
+            burst (float): Requests a client can send at once.
+            max_clients (int): Maximum number of tracked clients.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: typing.OrderedDict[str, TokenBucket] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def check(self, client: str) -> float:
+        """
+        Counts a request of the client.
+
+        Args:
+            client (str): Identifier of the client, e.g. its address.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until it is.
+        """
+        with self.lock:
+            if (bucket := self.buckets.get(client)) is None:
+                bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+                if len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client)
+            return bucket.take()
+
+
+def retry_after_header(retry_after: float) -> typing.Dict[str, str]:
+    """
+    Returns the Retry-After header in whole seconds, at least one.
+
+    Args:
+        retry_after (float): Seconds until the client should retry.
+    """
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+class RateLimitMiddleware:
+    """
+    Limits the requests per client with separate token buckets for reads and
+    writes, so a client importing evaluations cannot use up the reads of others.
+    Clients are identified by their address. Exempt paths (e.g. health probes)
+    are never limited.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        reads: RateLimiter,
+        writes: RateLimiter,
+        exempt_paths: typing.Iterable[str] = (),
+    ) -> None:
+        """
+        Initializes the middleware.
+
+        Args:
+            app (ASGIApp): Application to be wrapped.
+            reads (RateLimiter): Limits of GET, HEAD and OPTIONS requests.
+            writes (RateLimiter): Limits of all other requests.
+            exempt_paths (Iterable[str]): Paths which are never limited.
+        """
+        self.app = app
+        self.reads = reads
+        self.writes = writes
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        write = scope["method"] in WRITE_METHODS
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        retry_after = (self.writes if write else self.reads).check(client)
+        if retry_after:
+            metrics.REJECTED_REQUESTS.labels("write" if write else "read").inc()
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests."},
+                headers=retry_after_header(retry_after),
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class IngestAdmission:
+    """
+    Admission control of the write endpoints. A write is rejected while
+    too many writes are in flight, while the comments ingested per second
+    exceed their limit, or while too many changes wait for the next backup.
+    In the last case a backup is requested, so the pending changes drain.
+    """
+
+    def __init__(
+        self,
+        evaluation_system: EvaluationSystem,
+        max_in_flight: int,
+        comments_per_second: float,
+        comment_burst: float,
+        max_pending_changes: int,
+        pending_retry_after_seconds: float = 5.0,
+        request_backup: typing.Optional[typing.Callable[[], typing.Any]] = None,
+    ) -> None:
+        """
+        Initializes the admission control.
+
+        Args:
+            evaluation_system (EvaluationSystem): Evaluation system written to.
+            max_in_flight (int): Maximum number of writes handled at once.
+            comments_per_second (float): Sustained comments ingested per second.
+            comment_burst (float): Comments which can be ingested at once.
+            max_pending_changes (int): Pending changes from which writes are rejected.
+            pending_retry_after_seconds (float): Retry-After while changes are pending.
+            request_backup (Optional[Callable[[], Any]]): Requests a backup.
+        """
+        self.evaluation_system = evaluation_system
+        self.max_in_flight = max_in_flight
+        self.comments = TokenBucket(comments_per_second, comment_burst)
+        self.max_pending_changes = max_pending_changes
+        self.pending_retry_after_seconds = pending_retry_after_seconds
+        self.request_backup = request_backup
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self._ingested = evaluation_system.comments_ingested
+
+    def acquire(self) -> float:
+        """
+        Admits a write, which has to be released once it is handled.
+        Comments ingested since the last call are charged to the throughput limit.
+
+        Returns:
+            float: 0 if the write is admitted, otherwise the seconds after
+                which the client should retry.
+        """
+        with self.lock:
+            ingested = self.evaluation_system.comments_ingested
+            self.comments.charge(ingested - self._ingested)
+            self._ingested = ingested
+            if self.in_flight >= self.max_in_flight:
+                reason, retry_after = "in_flight", 1.0
+            elif retry_after := self.comments.debt_seconds():
+                reason = "throughput"
+            elif self.evaluation_system.pending_changes >= self.max_pending_changes:
+                reason, retry_after = "pending", self.pending_retry_after_seconds
+            else:
+                self.in_flight += 1
+                return 0.0
+        if reason == "pending" and self.request_backup is not None:
+            self.request_backup()
+        metrics.REJECTED_REQUESTS.labels(f"ingest_{reason}").inc()
+        return retry_after
+
+    def release(self) -> None:
+        """Releases an admitted write."""
+        with self.lock:
+            self.in_flight -= 1
+
+    @property
+    def status(self) -> typing.Dict[str, typing.Any]:
+        """Writes in flight and the state of the limits."""
+        with self.lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "throughput_debt_seconds": self.comments.debt_seconds(),
+                "pending_changes": self.evaluation_system.pending_changes,
+                "max_pending_changes": self.max_pending_changes,
+            }
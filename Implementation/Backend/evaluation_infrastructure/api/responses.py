@@ -0,0 +1,177 @@
+"""Response classes and content negotiation for the REST API."""
+import json
+import typing
+from array import array
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON is always available
+    msgpack = None
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from evaluation_infrastructure import tracing
+from evaluation_infrastructure.logic.comment_store import StoredComments
+from evaluation_infrastructure.logic.evaluation import Evaluation
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+# Small parts of a streamed response are joined into chunks of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class MsgPackResponse(Response):
+    """Response encoded as MessagePack."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: typing.Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """
+    Checks whether the client asked for a MessagePack response.
+
+    Args:
+        request (Request): Incoming request.
+
+    Returns:
+        bool: True if MessagePack is available and accepted by the client.
+    """
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def render_content(
+    content: typing.Any,
+    msgpack_format: bool = False,
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+) -> Response:
+    """
+    Encodes the content as MessagePack or JSON.
+
+    Args:
+        content (Any): Content to be encoded.
+        msgpack_format (bool): Whether to encode as MessagePack.
+        headers (Optional[Dict[str, str]]): Headers of the response.
+
+    Returns:
+        Response: MessagePack or JSON response.
+    """
+    response_class = MsgPackResponse if msgpack_format else JSONResponse
+    with tracing.span("serialization"):
+        return response_class(
+            content=jsonable_encoder(
+                content, custom_encoder={array: array.tolist, StoredComments: list}
+            ),
+            headers=headers,
+        )
+
+
+def negotiate_response(
+    request: Request,
+    content: typing.Any,
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+) -> Response:
+    """
+    Encodes the content as MessagePack or JSON, depending on the Accept header.
+
+    Args:
+        request (Request): Incoming request.
+        content (Any): Content to be encoded.
+        headers (Optional[Dict[str, str]]): Additional headers of the response.
+
+    Returns:
+        Response: MessagePack response if accepted, otherwise JSON response.
+    """
+    headers = {**(headers or {}), "Vary": "Accept"}
+    return render_content(content, wants_msgpack(request), headers)
+
+
+def _dumps(content: typing.Any) -> bytes:
+    """Encodes the content as compact JSON, like JSONResponse."""
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _stored_evaluations_json(
+    evaluations: typing.List[Evaluation],
+) -> typing.Iterator[typing.Union[bytes, memoryview]]:
+    """
+    Yields the parts of the JSON of evaluations with stored comments.
+    The comments are not decoded, the slices of the comment store are already
+    JSON string literals separated by commas.
+    """
+    yield b"["
+    for position, evaluation in enumerate(evaluations):
+        if position:
+            yield b","
+        # The key of the evaluation without the closing brace
+        yield _dumps(evaluation.query)[:-1]
+        yield b',"evaluations":['
+        chunks = [chunk for chunk in evaluation.evaluations.json_chunks() if chunk]
+        for index, chunk in enumerate(chunks):
+            if index:
+                yield b","
+            yield chunk
+        yield b'],"scores":'
+        yield _dumps(evaluation.scores.tolist())
+        yield b"}"
+    yield b"]"
+
+
+def _stream_chunks(
+    parts: typing.Iterable[typing.Union[bytes, memoryview]],
+    chunk_bytes: int = STREAM_CHUNK_BYTES,
+) -> typing.Iterator[typing.Union[bytes, memoryview]]:
+    """
+    Joins small parts into chunks of about chunk_bytes, parts at least that
+    large are passed on without copying them.
+    """
+    buffer = bytearray()
+    for part in parts:
+        if len(part) >= chunk_bytes:
+            if buffer:
+                yield bytes(buffer)
+                buffer.clear()
+            yield part
+            continue
+        buffer += part
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def evaluations_response(
+    request: Request,
+    evaluations: typing.List[Evaluation],
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+) -> Response:
+    """
+    Encodes evaluations like negotiate_response. Evaluations whose comments
+    are held in the comment store are streamed as JSON straight from the
+    memory-mapped slices of their comments, without joining them.
+
+    Args:
+        request (Request): Incoming request.
+        evaluations (List[Evaluation]): Evaluations to be encoded.
+        headers (Optional[Dict[str, str]]): Additional headers of the response.
+
+    Returns:
+        Response: MessagePack response if accepted, otherwise JSON response.
+    """
+    if wants_msgpack(request) or not all(
+        isinstance(evaluation.evaluations, StoredComments) for evaluation in evaluations
+    ):
+        return negotiate_response(request, evaluations, headers)
+    with tracing.span("serialization"):
+        return StreamingResponse(
+            _stream_chunks(_stored_evaluations_json(evaluations)),
+            media_type="application/json",
+            headers={**(headers or {}), "Vary": "Accept"},
+        )
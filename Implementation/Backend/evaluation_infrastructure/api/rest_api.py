@@ -1,56 +1,425 @@
 """Rest API for the evaluation system."""
+import asyncio
+import contextlib
+import hashlib
 import json
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import (
+    Depends,
+    FastAPI,
+    UploadFile,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-import uvicorn
 import pydantic
+import prometheus_client
 
 from evaluation_infrastructure import errors as custom_errors
+from evaluation_infrastructure import tracing
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.logger import logger
+from evaluation_infrastructure.api.middlewares import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    TracingMiddleware,
+    WireStats,
+)
+from evaluation_infrastructure.api.rate_limit import (
+    IngestAdmission,
+    RateLimiter,
+    RateLimitMiddleware,
+    retry_after_header,
+)
+from evaluation_infrastructure.api.payload_cache import PayloadCache, RequestFrequency
+from evaluation_infrastructure.api.responses import (
+    evaluations_response,
+    negotiate_response,
+    render_content,
+    wants_msgpack,
+)
 from evaluation_infrastructure.models.evaluations import (
+    EVALUATION_BATCH_ADAPTER,
     SingleEvaluation,
     MultipleEvaluations,
 )
 from evaluation_infrastructure.logic.evaluation import Evaluation
-from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
-from evaluation_infrastructure.scheduler.backup_scheduler import Scheduler
+from evaluation_infrastructure.logic.evaluation_system import (
+    EvaluationSystem,
+    SentimentGroup,
+)
+from evaluation_infrastructure.logic.search_index import SearchKind
+from evaluation_infrastructure.logic.semester import normalize_semester
+from evaluation_infrastructure.scheduler.backup_worker import BackupWorker
+from evaluation_infrastructure.scheduler.replica_follower import ReplicaFollower
 
 
 class RestService:
     """Rest API for the evaluation system."""
 
-    def __init__(self, evaluation_system: EvaluationSystem):
-        """Initializes the RestService."""
+    def __init__(
+        self,
+        evaluation_system: EvaluationSystem,
+        rate_limits: bool = True,
+        leader_url: typing.Optional[str] = None,
+    ):
+        """
+        Initializes the RestService.
+
+        Args:
+            evaluation_system (EvaluationSystem): Evaluation system to be served.
+            rate_limits (bool): Whether to limit the requests per client,
+                disabled e.g. for benchmarks driving the API from a single client.
+            leader_url (Optional[str]): URL of the writer. If given, the service is
+                a read-only replica following the writer instead of loading from
+                and backing up to the database.
+        """
 
-        self.app = FastAPI(title="Student Evaluation API")
+        self.app = FastAPI(title="Student Evaluation API", lifespan=self.lifespan)
 
         self.evaluation_system = evaluation_system
+        self.shutting_down = False
+        self.wire_stats: typing.Dict[str, WireStats] = {}
+        self.payload_cache = PayloadCache(config.PAYLOAD_CACHE_MAX_BYTES)
+        self.request_frequency = RequestFrequency(
+            config.PREWARM_FREQUENCY_PATH, decay=config.PREWARM_FREQUENCY_DECAY
+        )
+        # State of pre-rendering the dashboards: pending, running, done or skipped
+        self.prewarm_progress: typing.Dict[str, typing.Any] = {
+            "state": "pending" if config.PREWARM_ON_STARTUP else "skipped",
+            "rendered": 0,
+            "courses": 0,
+        }
+        self.tracer = tracing.Tracer(
+            enabled=config.PROFILING_ENABLED,
+            slow_request_seconds=config.PROFILING_SLOW_REQUEST_MS / 1000,
+            profile_sample_rate=config.PROFILING_SAMPLE_RATE,
+            max_traces=config.PROFILING_MAX_TRACES,
+            max_slow_traces=config.PROFILING_MAX_SLOW_TRACES,
+        )
+        self.backup_worker = BackupWorker(
+            evaluation_system,
+            interval_seconds=config.BACKUP_INTERVAL_MINUTES * 60,
+            max_pending_changes=config.BACKUP_MAX_PENDING_CHANGES,
+            score_sentiment=config.SENTIMENT_SCORE_ON_BACKUP,
+        )
+        self.rate_limits = rate_limits
+        self.follower = (
+            ReplicaFollower(
+                evaluation_system,
+                leader_url,
+                poll_seconds=config.REPLICATION_POLL_SECONDS,
+                batch_size=config.REPLICATION_BATCH_SIZE,
+                timeout_seconds=config.REPLICATION_TIMEOUT_SECONDS,
+            )
+            if leader_url
+            else None
+        )
+        self.ingest_admission = IngestAdmission(
+            evaluation_system,
+            max_in_flight=config.INGEST_MAX_IN_FLIGHT,
+            comments_per_second=config.INGEST_COMMENTS_PER_SECOND,
+            comment_burst=config.INGEST_COMMENT_BURST,
+            max_pending_changes=config.INGEST_MAX_PENDING_CHANGES,
+            pending_retry_after_seconds=config.INGEST_RETRY_AFTER_SECONDS,
+            request_backup=self.backup_worker.request_backup,
+        )
 
         self.declare_endpoints()
         self.declare_exception_handlers()
         self.configure_middlewares()
 
+    def _load_in_background(self) -> None:
+        """Loads the evaluation system from the database, then starts the backups."""
+        try:
+            self.evaluation_system.create_from_database()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Loading the evaluation system from the database failed.")
+            return
+        if config.ARCHIVE_BEFORE_SEMESTER and not self.shutting_down:
+            try:
+                self.evaluation_system.archive_semesters(config.ARCHIVE_BEFORE_SEMESTER)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Archiving the past semesters failed.")
+        if not self.shutting_down:
+            self.backup_worker.start()
+        if self.prewarm_progress["state"] == "pending" and not self.shutting_down:
+            self.prewarm_results()
+
+    def prewarm_results(self) -> int:
+        """
+        Renders the dashboard payloads of all courses into the payload cache,
+        most requested courses first, so the first requests after a start
+        are as fast as later ones.
+
+        Returns:
+            int: Number of payloads rendered.
+        """
+        with self.evaluation_system.lock:
+            courses = list(self.evaluation_system.results_by_course)
+        courses = self.request_frequency.ranked(courses)
+        self.prewarm_progress.update(state="running", rendered=0, courses=len(courses))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=config.PREWARM_WORKERS, thread_name_prefix="prewarm"
+        ) as executor:
+            for rendered in executor.map(self._render_results, courses):
+                self.prewarm_progress["rendered"] += int(rendered)
+        self.prewarm_progress["state"] = "done"
+        logger.info(
+            f"Rendered the dashboards of {self.prewarm_progress['rendered']} courses "
+            f"in {time.perf_counter() - started:.2f}s."
+        )
+        return self.prewarm_progress["rendered"]
+
+    def _render_results(self, course: str) -> bool:
+        """
+        Renders the default dashboard payload of a course (JSON, all semesters)
+        into the payload cache, unless it is cached already.
+
+        Args:
+            course (str): Course to be rendered.
+
+        Returns:
+            bool: True if the payload was rendered.
+        """
+        if self.shutting_down:
+            return False
+        key = self._payload_key(
+            f"results/{course}",
+            self._results_etag(course, None, None, None, False, None),
+        )
+        if key in self.payload_cache:
+            return False
+        try:
+            content = self.evaluation_system.return_results(course)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(f"Rendering the dashboard of {course} failed.")
+            return False
+        response = render_content(content)
+        self.payload_cache.put(key, response.body, response.media_type)
+        return True
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, _app: FastAPI):
+        """
+        Starts loading the evaluation system in the background, so the server
+        is reachable (and reports its progress on /readyz) while loading.
+        On shutdown, after uvicorn drained the in-flight requests,
+        runs a final backup so no changes are lost.
+        A read replica follows the writer instead and has nothing to back up.
+        """
+        if self.follower is not None:
+            self.prewarm_progress["state"] = "skipped"
+            self.follower.start()
+            yield
+            self.shutting_down = True
+            await asyncio.to_thread(self.follower.stop)
+            await asyncio.to_thread(self.request_frequency.save)
+            return
+        loader = threading.Thread(
+            target=self._load_in_background, name="database-loader", daemon=True
+        )
+        loader.start()
+        yield
+        self.shutting_down = True
+        logger.info("Shutting down, running final backup.")
+        await asyncio.to_thread(self.backup_worker.stop, flush=True)
+        await asyncio.to_thread(self.request_frequency.save)
+
+    def _require_writable(self) -> None:
+        """
+        Rejects writes while the evaluation system is loading or shutting down.
+
+        Raises:
+            HTTPException: 403 on a read replica,
+                503 if the evaluation system does not accept writes.
+        """
+        if self.follower is not None:
+            raise HTTPException(
+                status_code=403,
+                detail="Read-only replica, send writes to the writer.",
+            )
+        if self.shutting_down or not self.evaluation_system.accepts_writes:
+            raise HTTPException(
+                status_code=503,
+                detail="Evaluation system is not ready.",
+                headers={"Retry-After": "5"},
+            )
+
+    def _admit_ingest(self) -> typing.Iterator[None]:
+        """
+        Admits a write for the duration of the request, see IngestAdmission.
+
+        Raises:
+            HTTPException: 429 with Retry-After if the ingest is overloaded.
+        """
+        if retry_after := self.ingest_admission.acquire():
+            raise HTTPException(
+                status_code=429,
+                detail="Ingest is overloaded, retry later.",
+                headers=retry_after_header(retry_after),
+            )
+        try:
+            yield
+        finally:
+            self.ingest_admission.release()
+
     def configure_middlewares(self):
         """
         Configures the middlewares for the FastAPI application.
         In the current configuration, all origins are allowed.
+        Responses above the minimum size are compressed with brotli or gzip.
+        Latency and status code of every request are recorded for /metrics.
+        Requests are limited per client, reads and writes separately.
+        Requests are traced while profiling is enabled, see /admin/profiling.
         """
+        if self.rate_limits:
+            self.app.add_middleware(
+                RateLimitMiddleware,
+                reads=RateLimiter(
+                    config.RATE_LIMIT_READS_PER_SECOND,
+                    config.RATE_LIMIT_READ_BURST,
+                    config.RATE_LIMIT_MAX_CLIENTS,
+                ),
+                writes=RateLimiter(
+                    config.RATE_LIMIT_WRITES_PER_SECOND,
+                    config.RATE_LIMIT_WRITE_BURST,
+                    config.RATE_LIMIT_MAX_CLIENTS,
+                ),
+                exempt_paths=config.RATE_LIMIT_EXEMPT_PATHS,
+            )
+        self.app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=config.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+            stats=self.wire_stats,
+        )
+        self.app.add_middleware(MetricsMiddleware)
+        self.app.add_middleware(
+            TracingMiddleware, tracer=self.tracer, exempt_prefixes=("/admin/",)
+        )
         self.app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],  # Allow requests from all origins
             allow_credentials=True,
             allow_methods=["*"],  # Allow all HTTP methods
             allow_headers=["*"],  # Allow all headers
+            expose_headers=["ETag"],  # Allow clients to revalidate cached lists
         )
 
+    @staticmethod
+    def _etag_matches(if_none_match: typing.Optional[str], etag: str) -> bool:
+        """
+        Checks whether the If-None-Match header of a request matches the given ETag.
+
+        Args:
+            if_none_match (Optional[str]): Value of the If-None-Match header.
+            etag (str): Current ETag of the resource.
+
+        Returns:
+            bool: True if the client already has the current version of the resource.
+        """
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or any(
+            candidate.removeprefix("W/") == etag for candidate in candidates
+        )
+
+    @staticmethod
+    def _payload_key(resource: str, etag: str) -> str:
+        """Returns the key of a rendered payload in the payload cache."""
+        return f"{resource}:{etag}"
+
+    def _results_etag(
+        self,
+        course: str,
+        start: typing.Optional[str],
+        end: typing.Optional[str],
+        window: typing.Optional[int],
+        deltas: bool,
+        lecturer: typing.Optional[str],
+    ) -> str:
+        """
+        Returns the ETag of the JSON results of a course for the given parameters.
+
+        Returns:
+            str: ETag, changes whenever the results of the course change.
+        """
+        version = self.evaluation_system.get_course_version(course)
+        parameters = hashlib.blake2b(
+            repr((start, end, window, deltas, lecturer)).encode(), digest_size=6
+        ).hexdigest()
+        return f'"results-{version}-{parameters}"'
+
+    async def _cached_response(
+        self,
+        request: Request,
+        etag: str,
+        build_content: typing.Callable[[], typing.Any],
+        resource: typing.Optional[str] = None,
+    ) -> Response:
+        """
+        Returns a response carrying ETag and Cache-Control headers.
+        If the client already has the current version, a 304 is returned
+        without building the content, which is built in a worker thread
+        otherwise. The ETag differs per representation (JSON or MessagePack).
+        If a resource is given, the rendered payload is kept in the payload
+        cache under the resource and the ETag.
+
+        Args:
+            request (Request): Incoming request.
+            etag (str): Current ETag of the resource.
+            build_content (Callable[[], Any]): Builds the content of the response.
+            resource (Optional[str]): Name of the resource in the payload cache,
+                None to render the content on every request.
+
+        Returns:
+            Response: 304 Not Modified or 200 with the content.
+        """
+        if wants_msgpack(request):
+            etag = f'{etag[:-1]}-msgpack"'
+        headers = {"ETag": etag, "Cache-Control": config.CACHE_CONTROL}
+        if self._etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if resource is None:
+            content = await asyncio.to_thread(build_content)
+            return negotiate_response(request, content, headers=headers)
+        key = self._payload_key(resource, etag)
+        if (payload := self.payload_cache.get(key)) is not None:
+            return Response(
+                content=payload.body,
+                media_type=payload.media_type,
+                headers={**headers, "Vary": "Accept"},
+            )
+        content = await asyncio.to_thread(build_content)
+        response = negotiate_response(request, content, headers=headers)
+        self.payload_cache.put(key, response.body, response.media_type)
+        return response
+
     def declare_endpoints(self):
         """
         Declares the endpoints for the FastAPI application.
         """
 
-        @self.app.post("/evaluation/single", status_code=201)
+        @self.app.post(
+            "/evaluation/single",
+            status_code=201,
+            dependencies=[
+                Depends(self._require_writable),
+                Depends(self._admit_ingest),
+            ],
+        )
         async def single_evaluation(evaluation: SingleEvaluation) -> None:
             """_summary_
 
@@ -60,13 +429,29 @@ class RestService:
             Returns:
                 _type_: _description_
             """
-            evaluation.evaluations = [evaluation.evaluations]
-            response = self.evaluation_system.add_or_update_evaluation(
-                Evaluation(**evaluation.model_dump())
+            # Writes take the lock of the evaluation system, so they are
+            # applied in a worker thread instead of blocking the event loop
+            response = await asyncio.to_thread(
+                self.evaluation_system.add_or_update_evaluation,
+                Evaluation(
+                    semester=evaluation.semester,
+                    cohort=evaluation.cohort,
+                    faculty=evaluation.faculty,
+                    course=evaluation.course,
+                    lecturer=evaluation.lecturer,
+                    evaluations=[evaluation.evaluations],
+                ),
             )
             return {"detail": response}
 
-        @self.app.post("/evaluation/multiple", status_code=201)
+        @self.app.post(
+            "/evaluation/multiple",
+            status_code=201,
+            dependencies=[
+                Depends(self._require_writable),
+                Depends(self._admit_ingest),
+            ],
+        )
         async def multiple_evaluations(evaluations: MultipleEvaluations):
             """_summary_
 
@@ -76,12 +461,62 @@ class RestService:
             Returns:
                 _type_: _description_
             """
-            response = self.evaluation_system.add_or_update_evaluation(
-                Evaluation(**evaluations.model_dump())
+            response = await asyncio.to_thread(
+                self.evaluation_system.add_or_update_evaluation,
+                Evaluation(**dict(evaluations)),
             )
             return {"detail": response}
 
-        @self.app.post("/evaluation/file", status_code=201)
+        @self.app.post(
+            "/evaluation/batch",
+            status_code=201,
+            dependencies=[
+                Depends(self._require_writable),
+                Depends(self._admit_ingest),
+            ],
+        )
+        async def batch_evaluations(request: Request):
+            """
+            Adds or updates a list of evaluations in one request.
+            The body is validated straight from JSON, all evaluations are
+            applied or, if one of them is invalid, none of them.
+
+            Returns:
+                dict: Number of evaluations added and updated.
+
+            Raises:
+                HTTPException: 413 if the body is too large,
+                    422 with the errors per evaluation if it is invalid.
+            """
+            if int(request.headers.get("content-length") or 0) > config.MAX_BATCH_BYTES:
+                raise HTTPException(status_code=413, detail="Batch too large.")
+            body = await request.body()
+            if len(body) > config.MAX_BATCH_BYTES:
+                raise HTTPException(status_code=413, detail="Batch too large.")
+            try:
+                records = EVALUATION_BATCH_ADAPTER.validate_json(body)
+            except pydantic.ValidationError as exc:
+                raise HTTPException(
+                    status_code=422,
+                    detail=exc.errors(
+                        include_url=False, include_context=False, include_input=False
+                    ),
+                ) from exc
+            # Applied in a worker thread like all writes, so reads are not
+            # blocked on the event loop meanwhile
+            return await asyncio.to_thread(
+                self.evaluation_system.add_or_update_evaluations,
+                [Evaluation(**record) for record in records],
+            )
+
+        @self.app.post(
+            "/evaluation/file",
+            status_code=201,
+            dependencies=[
+                Depends(self._require_writable),
+                Depends(self._admit_ingest),
+            ],
+        )
         async def file_evaluation(file: UploadFile):
             """_summary_
 
@@ -107,19 +542,25 @@ class RestService:
                         detail=f"Invalid file format. {exc.json()}",
                     ) from exc
                 data = MultipleEvaluations(**json.loads(contents))
-                response = self.evaluation_system.add_or_update_evaluation(
-                    Evaluation(**data.model_dump())
+                response = await asyncio.to_thread(
+                    self.evaluation_system.add_or_update_evaluation,
+                    Evaluation(**data.model_dump()),
                 )
                 return {"detail": response}
             except pydantic.ValidationError:
                 return HTTPException(status_code=422, detail="Invalid file format.")
 
         @self.app.get("/evaluations/course/{course}", status_code=200)
-        async def get_evaluations_by_course(course: str):
+        async def get_evaluations_by_course(
+            request: Request, course: str, include_archived: bool = False
+        ):
             """_summary_
 
             Args:
                 course (str): _description_
+                include_archived (bool): Whether to append the archived evaluations
+                    of the course, read from the archive files without restoring
+                    them. Only on the writer.
 
             Raises:
                 HTTPException: _description_
@@ -127,16 +568,28 @@ class RestService:
             Returns:
                 _type_: _description_
             """
+            archived = (
+                await asyncio.to_thread(
+                    self.evaluation_system.get_archived_evaluations_by_course, course
+                )
+                if include_archived
+                else []
+            )
             try:
-                evaluation = self.evaluation_system.get_evaluations_by_course(course)
+                # Merges the evaluations of all shards
+                evaluation = await asyncio.to_thread(
+                    self.evaluation_system.get_evaluations_by_course, course
+                )
             except custom_errors.CourseNotFoundError as exc:
-                raise HTTPException(
-                    status_code=404, detail="Evaluation not found."
-                ) from exc
-            return evaluation
+                if not archived:
+                    raise HTTPException(
+                        status_code=404, detail="Evaluation not found."
+                    ) from exc
+                evaluation = []
+            return evaluations_response(request, evaluation + archived)
 
         @self.app.get("/evaluations/cohort/{cohort}", status_code=200)
-        async def get_evaluations_by_cohort(cohort: str):
+        async def get_evaluations_by_cohort(request: Request, cohort: str):
             """_summary_
 
             Args:
@@ -149,49 +602,563 @@ class RestService:
                 _type_: _description_
             """
             try:
-                evaluation = self.evaluation_system.get_evaluations_by_cohort(cohort)
+                evaluation = await asyncio.to_thread(
+                    self.evaluation_system.get_evaluations_by_cohort, cohort
+                )
             except custom_errors.CohortNotFoundError as exc:
                 raise HTTPException(
                     status_code=404, detail="Evaluation not found."
                 ) from exc
-            return evaluation
+            return evaluations_response(request, evaluation)
 
         @self.app.get("/courses/list", status_code=200)
-        async def get_courses_list():
-            """_summary_
+        async def get_courses_list(request: Request):
+            """
+            Returns the list of all courses.
+            Supports conditional requests via If-None-Match.
 
             Returns:
-                _type_: _description_
+                Response: List of all courses or 304 if unchanged.
             """
-            return self.evaluation_system.get_all_courses()
+            version = self.evaluation_system.get_collection_version("courses")
+            return await self._cached_response(
+                request,
+                f'"courses-{version}"',
+                self.evaluation_system.get_all_courses,
+            )
 
         @self.app.get("/cohorts/list", status_code=200)
-        async def get_cohorts_list():
-            """_summary_
+        async def get_cohorts_list(request: Request):
+            """
+            Returns the list of all cohorts.
+            Supports conditional requests via If-None-Match.
 
             Returns:
-                _type_: _description_
+                Response: List of all cohorts or 304 if unchanged.
             """
-            return self.evaluation_system.get_all_cohorts()
+            version = self.evaluation_system.get_collection_version("cohorts")
+            return await self._cached_response(
+                request,
+                f'"cohorts-{version}"',
+                self.evaluation_system.get_all_cohorts,
+            )
 
         @self.app.get("/faculties/list", status_code=200)
-        async def get_faculties_list():
-            """_summary_
+        async def get_faculties_list(request: Request):
+            """
+            Returns the faculty course map.
+            Supports conditional requests via If-None-Match.
 
             Returns:
-                _type_: _description_
+                Response: Faculty course map or 304 if unchanged.
+            """
+            version = self.evaluation_system.get_collection_version("faculties")
+            return await self._cached_response(
+                request,
+                f'"faculties-{version}"',
+                self.evaluation_system.get_faculty_course_map,
+            )
+
+        @self.app.get("/search", status_code=200)
+        async def search(
+            q: str = "",
+            limit: int = Query(default=10, ge=1, le=100),
+            kind: typing.Optional[SearchKind] = None,
+            faculty: typing.Optional[str] = None,
+        ):
+            """
+            Returns courses, lecturers, faculties and cohorts with a word starting with q.
+
+            Args:
+                q (str): Prefix to be searched, case insensitive.
+                limit (int): Maximum number of matches.
+                kind (Optional[SearchKind]): Only return names of this kind.
+                faculty (Optional[str]): Only return names referenced in this faculty.
+
+            Returns:
+                list: Matches with the number of evaluations, most referenced first.
             """
-            return self.evaluation_system.get_faculty_course_map()
+            return self.evaluation_system.search(
+                q, limit=limit, kind=kind, faculty=faculty
+            )
 
         @self.app.get("/results/course/{course}", status_code=200)
-        async def get_results_by_course(course: str):
-            return self.evaluation_system.return_results(course)
+        async def get_results_by_course(
+            request: Request,
+            course: str,
+            start: typing.Optional[str] = None,
+            end: typing.Optional[str] = None,
+            window: typing.Optional[int] = Query(default=None, ge=1, le=20),
+            deltas: bool = False,
+            lecturer: typing.Optional[str] = None,
+        ):
+            """
+            Returns the results for a course for all semesters, or the semesters
+            between start and end, optionally with moving averages and the change
+            to the previous semester per topic.
+            Supports conditional requests via If-None-Match.
+
+            Args:
+                course (str): Course for which the results are to be retrieved.
+                start (Optional[str]): First semester, e.g. SS21.
+                end (Optional[str]): Last semester, e.g. WS22/23.
+                window (Optional[int]): Number of semesters of the moving averages.
+                deltas (bool): Whether to include the change to the previous semester.
+                lecturer (Optional[str]): Lecturer of the course, defaults to the first one.
+
+            Returns:
+                Response: Results of the course or 304 if unchanged.
+
+            Raises:
+                HTTPException: 422 if start or end is not a valid semester.
+            """
+            try:
+                start = normalize_semester(start) if start else None
+                end = normalize_semester(end) if end else None
+            except custom_errors.InvalidSemesterError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            # Only dashboards of existing courses are counted and cached
+            known = course in self.evaluation_system.results_by_course
+            if known:
+                self.request_frequency.record(course)
+            return await self._cached_response(
+                request,
+                self._results_etag(course, start, end, window, deltas, lecturer),
+                lambda: self.evaluation_system.return_results(
+                    course,
+                    start=start,
+                    end=end,
+                    window=window,
+                    deltas=deltas,
+                    lecturer=lecturer,
+                ),
+                resource=f"results/{course}" if known else None,
+            )
+
+        @self.app.get("/sentiment", status_code=200)
+        async def get_sentiment(
+            group_by: SentimentGroup = "course",
+            course: typing.Optional[str] = None,
+            lecturer: typing.Optional[str] = None,
+            semester: typing.Optional[str] = None,
+        ):
+            """
+            Returns the sentiment of the scored comments, aggregated per group.
+
+            Args:
+                group_by (SentimentGroup): Field the comments are grouped by.
+                course (Optional[str]): Only include comments of this course.
+                lecturer (Optional[str]): Only include comments of this lecturer.
+                semester (Optional[str]): Only include comments of this semester.
+
+            Returns:
+                list: Number of scored comments, mean score and shares of
+                    positive and negative comments per group.
+
+            Raises:
+                HTTPException: 422 if the semester is not valid.
+            """
+            try:
+                return await asyncio.to_thread(
+                    self.evaluation_system.get_sentiment,
+                    group_by,
+                    course=course,
+                    lecturer=lecturer,
+                    semester=semester,
+                )
+            except custom_errors.InvalidSemesterError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+        @self.app.post(
+            "/sentiment/score",
+            status_code=200,
+            dependencies=[Depends(self._require_writable)],
+        )
+        async def score_sentiment():
+            """
+            Scores the comments added since the last run, in a worker thread.
+            New comments are also scored before every backup.
+
+            Returns:
+                dict: Number of comments scored and the throughput per core.
+            """
+            run = await asyncio.to_thread(self.evaluation_system.score_sentiment)
+            return run.dict
+
+        @self.app.get("/stats/wire", status_code=200)
+        async def get_wire_stats():
+            """
+            Returns bytes on the wire and CPU cost per endpoint since startup.
+
+            Returns:
+                dict: Statistics per endpoint.
+            """
+            return {endpoint: stats.dict for endpoint, stats in self.wire_stats.items()}
+
+        @self.app.get("/healthz", status_code=200)
+        async def get_health():
+            """
+            Liveness probe, the server is up and handling requests.
+
+            Returns:
+                dict: Status of the server.
+            """
+            return {"status": "ok"}
+
+        @self.app.get("/readyz", status_code=200)
+        async def get_readiness():
+            """
+            Readiness probe, the evaluation system is loaded and the server is not
+            shutting down. Reports the progress of loading from the database.
+
+            Returns:
+                JSONResponse: 200 if ready, otherwise 503.
+            """
+            ready = (
+                self.evaluation_system.load_state == "ready" and not self.shutting_down
+            )
+            if config.PREWARM_BEFORE_READY:
+                ready = ready and self.prewarm_progress["state"] in ("done", "skipped")
+            replication = None
+            if self.follower is not None:
+                replication = self.follower.status()
+                staleness = self.follower.staleness_seconds
+                ready = ready and (
+                    staleness is not None
+                    and staleness <= config.REPLICATION_MAX_STALENESS_SECONDS
+                )
+            return JSONResponse(
+                status_code=200 if ready else 503,
+                content={
+                    "replication": replication,
+                    "ready": ready,
+                    "state": (
+                        "shutting_down"
+                        if self.shutting_down
+                        else self.evaluation_system.load_state
+                    ),
+                    "loaded": self.evaluation_system.load_progress,
+                    "prewarm": {
+                        **self.prewarm_progress,
+                        "cache": self.payload_cache.status,
+                    },
+                    "error": self.evaluation_system.load_error,
+                },
+            )
+
+        @self.app.post("/backup", status_code=202)
+        async def request_backup():
+            """
+            Requests a backup to the database, e.g. after a burst of writes.
+            Requests arriving while a backup runs are coalesced.
+
+            Returns:
+                dict: Status of the backup worker.
+            """
+            self.backup_worker.request_backup()
+            return self.backup_worker.status()
+
+        @self.app.get("/backup/status", status_code=200)
+        async def get_backup_status():
+            """
+            Returns the status of the backup worker, including the time of the
+            last successful backup and the lag of pending changes.
+
+            Returns:
+                dict: Status of the backup worker.
+            """
+            return self.backup_worker.status()
+
+        @self.app.get("/ingest/status", status_code=200)
+        async def get_ingest_status():
+            """
+            Returns the writes in flight and the state of the ingest limits.
+
+            Returns:
+                dict: Status of the ingest admission.
+            """
+            return self.ingest_admission.status
+
+        @self.app.get("/replication/snapshot", status_code=200)
+        async def get_replication_snapshot(request: Request):
+            """
+            Returns all evaluations and results for bootstrapping a read replica,
+            with the sequence of the change log the snapshot is consistent with.
+
+            Returns:
+                Response: Snapshot of the evaluation system.
+            """
+            snapshot = await asyncio.to_thread(self.evaluation_system.snapshot)
+            return negotiate_response(request, snapshot)
+
+        @self.app.get("/replication/changes", status_code=200)
+        async def get_replication_changes(
+            request: Request,
+            since: int = Query(ge=0),
+            epoch: typing.Optional[str] = None,
+            limit: int = Query(default=config.REPLICATION_BATCH_SIZE, ge=1),
+        ):
+            """
+            Returns the changes after a sequence of the change log, oldest first.
+
+            Args:
+                since (int): Last sequence the replica applied.
+                epoch (Optional[str]): Epoch of the snapshot the replica started from.
+                limit (int): Maximum number of changes.
+
+            Returns:
+                Response: Epoch and latest sequence of the log, and the changes.
+
+            Raises:
+                HTTPException: 410 if the writer restarted or dropped changes after
+                    the sequence, the replica has to bootstrap again.
+            """
+            if epoch is not None and epoch != self.evaluation_system.epoch:
+                raise HTTPException(status_code=410, detail="Epoch changed.")
+            change_log = self.evaluation_system.change_log
+            try:
+                changes = change_log.since(since, limit=limit)
+            except custom_errors.ChangeLogTruncatedError as exc:
+                raise HTTPException(status_code=410, detail=str(exc)) from exc
+            return negotiate_response(
+                request,
+                {
+                    "epoch": self.evaluation_system.epoch,
+                    "sequence": change_log.sequence,
+                    "changes": changes,
+                },
+            )
+
+        @self.app.get("/replication/status", status_code=200)
+        async def get_replication_status():
+            """
+            Returns the role of the service and its position in the change log.
+
+            Returns:
+                dict: Status of the writer or of the replica.
+            """
+            if self.follower is not None:
+                return {"role": "replica", **self.follower.status()}
+            return {
+                "role": "writer",
+                "epoch": self.evaluation_system.epoch,
+                "sequence": self.evaluation_system.change_log.sequence,
+            }
+
+        @self.app.get("/shards", status_code=200)
+        async def get_shards():
+            """
+            Returns the shards of the evaluations with their size,
+            pending changes and state.
+
+            Returns:
+                list: Status per shard.
+            """
+            return await asyncio.to_thread(self.evaluation_system.get_shards)
+
+        @self.app.post(
+            "/shards/freeze",
+            status_code=200,
+            dependencies=[Depends(self._require_writable)],
+        )
+        async def freeze_shard(name: str, frozen: bool = True):
+            """
+            Makes a shard read-only, or writable again with frozen=false.
+
+            Args:
+                name (str): Name of the shard, e.g. a semester.
+                frozen (bool): Whether the shard is to be read-only.
+
+            Raises:
+                HTTPException: 404 if the shard does not exist.
+            """
+            try:
+                await asyncio.to_thread(
+                    self.evaluation_system.freeze_shard, name, frozen=frozen
+                )
+            except custom_errors.ShardNotFoundError as exc:
+                raise HTTPException(
+                    status_code=404, detail=f"Shard {name} not found."
+                ) from exc
+            return {"name": name, "frozen": frozen}
+
+        @self.app.get("/archive", status_code=200)
+        async def get_archive():
+            """
+            Returns the archived semesters.
+
+            Returns:
+                list: File, number of evaluations and comments and courses
+                    per archived semester.
+            """
+            return await asyncio.to_thread(self.evaluation_system.get_archive)
+
+        @self.app.post(
+            "/archive", status_code=200, dependencies=[Depends(self._require_writable)]
+        )
+        async def archive_semesters(before: str):
+            """
+            Moves the evaluations of all semesters before the given one from
+            the database to compressed archive files, in a worker thread.
+
+            Args:
+                before (str): First semester to be kept, e.g. WS22/23.
+
+            Raises:
+                HTTPException: 422 if the semester is not valid.
+
+            Returns:
+                list: The semesters archived.
+            """
+            try:
+                archived = await asyncio.to_thread(
+                    self.evaluation_system.archive_semesters, before
+                )
+            except custom_errors.InvalidSemesterError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            return [semester.dict for semester in archived]
+
+        @self.app.post(
+            "/archive/restore",
+            status_code=200,
+            dependencies=[Depends(self._require_writable)],
+        )
+        async def restore_semester(semester: str):
+            """
+            Moves the evaluations of an archived semester back into the database.
+
+            Args:
+                semester (str): Archived semester, e.g. SS21.
+
+            Raises:
+                HTTPException: 404 if the semester is not archived,
+                    422 if it is not valid.
+
+            Returns:
+                dict: The semester and the number of evaluations restored.
+            """
+            try:
+                restored = await asyncio.to_thread(
+                    self.evaluation_system.restore_semester, semester
+                )
+            except custom_errors.InvalidSemesterError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            return {"semester": semester, "restored": restored}
+
+        @self.app.get("/admin/profiling", status_code=200)
+        async def get_profiling():
+            """
+            Returns the profiling settings and the mean duration of the requests
+            and their phases per route over the kept traces.
+
+            Returns:
+                dict: Settings and summary per route.
+            """
+            return {**self.tracer.settings, "routes": self.tracer.summary()}
+
+        @self.app.post("/admin/profiling", status_code=200)
+        async def configure_profiling(
+            enabled: typing.Optional[bool] = None,
+            slow_request_ms: typing.Optional[float] = Query(default=None, ge=0),
+            profile_sample_rate: typing.Optional[float] = Query(
+                default=None, ge=0, le=1
+            ),
+            clear: bool = False,
+        ):
+            """
+            Changes the profiling settings given, without a restart.
+
+            Args:
+                enabled (Optional[bool]): Whether requests are traced.
+                slow_request_ms (Optional[float]): Duration from which a request is slow.
+                profile_sample_rate (Optional[float]): Share of the traced requests
+                    run under cProfile.
+                clear (bool): Whether to drop the kept traces.
+
+            Returns:
+                dict: The new settings.
+            """
+            self.tracer.configure(
+                enabled=enabled,
+                slow_request_seconds=(
+                    slow_request_ms / 1000 if slow_request_ms is not None else None
+                ),
+                profile_sample_rate=profile_sample_rate,
+            )
+            if clear:
+                self.tracer.clear()
+            return self.tracer.settings
+
+        @self.app.get("/admin/traces", status_code=200)
+        async def get_traces(slow: bool = False, limit: int = Query(default=50, ge=1)):
+            """
+            Returns the most recent traces with the timings of their phases.
+
+            Args:
+                slow (bool): Whether to return only slow requests.
+                limit (int): Maximum number of traces.
+
+            Returns:
+                list: Traces, most recent first.
+            """
+            return [trace.dict for trace in self.tracer.get_traces(slow, limit)]
+
+        @self.app.get("/admin/traces/{trace_id}", status_code=200)
+        async def get_trace(trace_id: int):
+            """
+            Returns a trace with its cProfile output, if the request was profiled.
+
+            Args:
+                trace_id (int): Identifier of the trace.
+
+            Raises:
+                HTTPException: 404 if the trace is no longer kept.
+            """
+            if (trace := self.tracer.get_trace(trace_id)) is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Trace {trace_id} not found."
+                )
+            return {**trace.dict, "profile": trace.profile}
+
+        @self.app.get("/metrics", status_code=200)
+        async def get_metrics():
+            """
+            Returns the metrics in the Prometheus text format.
+
+            Returns:
+                Response: Metrics of this process.
+            """
+            return Response(
+                content=prometheus_client.generate_latest(),
+                media_type=prometheus_client.CONTENT_TYPE_LATEST,
+            )
 
     def declare_exception_handlers(self) -> None:
         """
         Rewrites the default exception handlers for the FastAPI application.
         """
 
+        @self.app.exception_handler(custom_errors.ShardFrozenError)
+        async def shard_frozen_exception_handler(
+            request, exc: custom_errors.ShardFrozenError
+        ):
+            """Returns 409 Conflict for writes to a read-only shard."""
+            return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+        @self.app.exception_handler(custom_errors.ArchiveNotFoundError)
+        async def archive_not_found_exception_handler(
+            request, exc: custom_errors.ArchiveNotFoundError
+        ):
+            """Returns 404 Not Found for semesters which are not archived."""
+            return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+        @self.app.exception_handler(custom_errors.ArchiveNotConfiguredError)
+        async def archive_not_configured_exception_handler(
+            request, exc: custom_errors.ArchiveNotConfiguredError
+        ):
+            """Returns 409 Conflict for archival without an archive directory."""
+            return JSONResponse(status_code=409, content={"detail": str(exc)})
+
         @self.app.exception_handler(RequestValidationError)
         async def custom_validation_exception_handler(
             request, exc: RequestValidationError
@@ -206,10 +1173,15 @@ class RestService:
             )
 
     def run(self, host: str = "127.0.0.1", port: int = 8000):
-        """Runs the FastAPI application."""
-        self.evaluation_system.create_from_database()
-        backup_scheduler = Scheduler()
-        backup_scheduler.add_task(self.evaluation_system.backup_to_database, 60)
-        backup_scheduler.start()
+        """
+        Runs the FastAPI application.
+        Loading from the database and the final backup happen in the lifespan.
+        """
+        import uvicorn  # pylint: disable=import-outside-toplevel
 
-        uvicorn.run(self.app, host=host, port=port)
+        uvicorn.run(
+            self.app,
+            host=host,
+            port=port,
+            timeout_graceful_shutdown=config.SHUTDOWN_GRACE_SECONDS,
+        )
@@ -1,11 +1,127 @@
 """Constants and configuration for the backend."""
+import typing
 
 DATABASE_HOST = "localhost"
 DATABASE_PORT = 27017
 DATABASE_NAME = "test"
 EVALUATIONS_COLLECTION = "evaluations"
 RESULTS_COLLECTION = "results"
+# Composite keys identifying a document, see Evaluation.query and Result.query.
+# The database backends enforce them with unique indexes.
+COLLECTION_KEYS = {
+    EVALUATIONS_COLLECTION: ("semester", "cohort", "faculty", "course", "lecturer"),
+    RESULTS_COLLECTION: ("faculty", "course", "lecturer"),
+}
 BACKUP_INTERVAL_MINUTES = 1
+# A backup is triggered early once this many evaluations/results changed.
+BACKUP_MAX_PENDING_CHANGES = 1000
+# Number of documents written per bulk upsert during a backup.
+BACKUP_BATCH_SIZE = 1000
+# Field holding the id of the last bulk append batch written to a document,
+# so a batch repeated after an interrupted load is not appended twice.
+BULK_BATCH_FIELD = "_bulk_batch"
+
+# Evaluations are partitioned into shards by this field, "semester" or "faculty".
+SHARD_KEY = "semester"
+# Shards which are read-only from the start, e.g. past semesters.
+FROZEN_SHARDS: tuple = ()
+# Minimum seconds between regular backups per shard, shards not listed are
+# backed up on every backup. Explicit and shutdown backups include all shards.
+SHARD_BACKUP_INTERVALS: dict = {}
+# Number of shards backed up in parallel.
+SHARD_BACKUP_WORKERS = 4
+
+# Comments per batch and worker processes of the sentiment scoring,
+# 1 worker scores in the calling thread.
+SENTIMENT_BATCH_SIZE = 2000
+SENTIMENT_WORKERS = 1
+# Scores between -threshold and threshold count as neutral.
+SENTIMENT_NEUTRAL_THRESHOLD = 0.05
+# New comments are scored before every backup, so their scores are saved with it.
+SENTIMENT_SCORE_ON_BACKUP = True
+
+# Limits of the ingested evaluations, longer names and comments are rejected.
+MAX_NAME_LENGTH = 200
+MAX_COMMENT_LENGTH = 10_000
+MAX_COMMENTS_PER_EVALUATION = 10_000
+# Limits of a single request to the batch ingest endpoint.
+MAX_BATCH_EVALUATIONS = 1000
+MAX_BATCH_BYTES = 16 * 2**20
+
+# Requests per second and client, and the burst allowed on top, separately for
+# reads (GET) and writes (POST). Health probes and metrics are not limited.
+RATE_LIMIT_READS_PER_SECOND = 50
+RATE_LIMIT_READ_BURST = 200
+RATE_LIMIT_WRITES_PER_SECOND = 5
+RATE_LIMIT_WRITE_BURST = 20
+RATE_LIMIT_MAX_CLIENTS = 10_000
+RATE_LIMIT_EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics")
+# Writes are rejected with 429 while this many are handled at once, while more
+# comments per second than the limit (plus burst) are ingested, or while this many
+# changes wait for the backup (a backup is requested then).
+INGEST_MAX_IN_FLIGHT = 4
+INGEST_COMMENTS_PER_SECOND = 20_000
+INGEST_COMMENT_BURST = 200_000
+INGEST_MAX_PENDING_CHANGES = 20 * BACKUP_MAX_PENDING_CHANGES
+INGEST_RETRY_AFTER_SECONDS = 5
+
+# Number of changes kept for read replicas, replicas falling further behind
+# bootstrap again from a snapshot.
+REPLICATION_LOG_SIZE = 100_000
+# URL of the writer (e.g. "http://writer:8000"). If set, the API runs as a
+# read-only replica bootstrapping from the writer and polling its changes.
+REPLICATION_LEADER_URL: typing.Optional[str] = None
+REPLICATION_POLL_SECONDS = 1.0
+REPLICATION_BATCH_SIZE = 5000
+REPLICATION_TIMEOUT_SECONDS = 10
+# A replica is reported not ready if it is more stale than this.
+REPLICATION_MAX_STALENESS_SECONDS = 30
+
+# File of the memory-mapped comment store (e.g. "/var/cache/tolik/comments.bin").
+# If set, comments are kept in the file instead of Python lists, see
+# logic.comment_store. The file is rebuilt from the database on every start.
+COMMENT_STORE_PATH: typing.Optional[str] = None
+
+# Directory of the archive (e.g. "/var/lib/tolik/archive"). Evaluations of
+# archived semesters are moved from the database to LZMA compressed files there,
+# only a stub per evaluation stays in memory, see logic.archive. If
+# ARCHIVE_BEFORE_SEMESTER is set, all semesters before it are archived on startup.
+ARCHIVE_DIRECTORY: typing.Optional[str] = None
+ARCHIVE_BEFORE_SEMESTER: typing.Optional[str] = None
+ARCHIVE_COMPRESSION_PRESET = 6
+
+# Rendered dashboard payloads (/results/course/{course}) are cached per course
+# version up to this size. After loading, the payloads of all courses are
+# rendered in the background, most requested courses first, and the server
+# reports ready once they are. The request counts are kept in the file across
+# restarts, the counts of previous runs weigh less by the decay.
+PAYLOAD_CACHE_MAX_BYTES = 64 * 2**20
+PREWARM_ON_STARTUP = True
+PREWARM_BEFORE_READY = True
+PREWARM_WORKERS = 4
+PREWARM_FREQUENCY_PATH: typing.Optional[str] = None
+PREWARM_FREQUENCY_DECAY = 0.5
+
+# Tracing of the requests and their phases (lookup, model build, serialization),
+# switchable at runtime through /admin/profiling. A share of the traced requests
+# runs under cProfile, the profile is kept if the request is slow.
+PROFILING_ENABLED = False
+PROFILING_SLOW_REQUEST_MS = 500
+PROFILING_SAMPLE_RATE = 0.05
+PROFILING_MAX_TRACES = 200
+PROFILING_MAX_SLOW_TRACES = 50
 
 REST_API_HOST = "localhost"
 REST_API_PORT = 8000
+
+# Read endpoints are revalidated with If-None-Match on every request;
+# unchanged data is answered with 304 Not Modified.
+CACHE_CONTROL = "no-cache"
+
+# Responses smaller than this are not compressed.
+COMPRESSION_MINIMUM_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Time given to in-flight requests to finish on shutdown, before the final backup.
+SHUTDOWN_GRACE_SECONDS = 30
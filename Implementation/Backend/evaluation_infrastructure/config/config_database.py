@@ -4,3 +4,27 @@ class ConfigDatabase:
     host = "mongodb://localhost:27017/"
     db_name = "evaluation_infrastructure"
     collection_name = "evaluation_infrastructure"
+
+    # Connection pool of the MongoClient
+    max_pool_size = 50
+    min_pool_size = 0
+
+    # Timeouts in milliseconds, so an unreachable or slow database fails fast
+    server_selection_timeout_ms = 5000
+    connect_timeout_ms = 5000
+    socket_timeout_ms = 30000
+
+    # Write concern, "majority" waits for the write to reach most replica set members
+    write_concern = 1
+    write_concern_timeout_ms = 10000
+    journal = True
+
+    # Retries of idempotent operations on transient errors, with exponential backoff
+    retry_attempts = 3
+    retry_backoff_seconds = 0.1
+    retry_backoff_max_seconds = 2.0
+
+    # Storage backend, "mongo", "sqlite" (embedded, no external service needed)
+    # or "memory" (transient, for tests and benchmarks)
+    backend = "mongo"
+    sqlite_path = "evaluation_system.sqlite3"
@@ -15,12 +15,21 @@ class DBInterface(Protocol[QK, QV]):
     def find_first(self, query: Mapping[QK, QV], table: str) -> object: ...
     def find_unique(self, query: Mapping[QK, QV], table: str) -> object: ...
     def find_all(self, table: str) -> list[object]: ...
-    def update(self, data: Mapping[QK, QV], table: str, query: Mapping[QK, QV]) -> object: ...
+    def fetch(self, table: str) -> list[object]: ...
+    def query(self, query: Mapping[QK, QV], table: str, projection: Mapping[str, int] | None = None) -> list[object]: ...
+    def exists(self, query: Mapping[QK, QV], table: str) -> bool: ...
+    def update(self, data: Mapping[QK, QV], table: str, query: Mapping[QK, QV], upsert: bool = False) -> object: ...
     def insert(self, data: Mapping[QK, QV], table: str) -> None: ...
+    def save(self, data: list[Mapping[QK, QV]], table: str) -> None: ...
+    def bulk_upsert(self, data: list[Mapping[QK, QV]], table: str) -> None: ...
+    def bulk_append(self, data: list[Mapping[QK, QV]], table: str, field: str, batch: str | None = None) -> None: ...
     def delete(self, query: Mapping[QK, QV], table: str) -> None: ...
-    def transaction(self) -> Connection: ...
+    def delete_many(self, query: Mapping[QK, QV], table: str) -> None: ...
+    def ensure_indexes(self) -> None: ...
 
 
+# Base of the transactions of the backends supporting them (memory and SQLite),
+# returned by their transaction method
 class Connection:
     def __init__(self, caller: DBInterface) -> None: ...
     def __enter__(self) -> Self: ...
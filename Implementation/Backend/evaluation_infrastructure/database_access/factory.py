@@ -0,0 +1,51 @@
+"""Creates the database interface of the configured storage backend."""
+import typing
+
+from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+)
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+
+def create_database_interface(
+    backend: str = ConfigDatabase.backend, location: typing.Optional[str] = None
+) -> DBInterface:
+    """
+    Creates the database interface of the given backend.
+
+    Args:
+        backend (str): "mongo" for MongoDB, "sqlite" for an embedded SQLite file,
+            "memory" for transient tables in memory (testing and benchmarks).
+        location (Optional[str]): Host of the mongod or path of the SQLite file,
+            defaults to ConfigDatabase.host or ConfigDatabase.sqlite_path.
+
+    Returns:
+        DBInterface: Interface to the selected database, connected on first use.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    # Imported here, so the drivers of unused backends are never loaded
+    if backend == "mongo":
+        from evaluation_infrastructure.database_access.mongo_interface import (  # pylint: disable=import-outside-toplevel
+            MongoInterface,
+        )
+
+        return MongoInterface(location or ConfigDatabase.host)
+    if backend == "sqlite":
+        from evaluation_infrastructure.database_access.sqlite_interface import (  # pylint: disable=import-outside-toplevel
+            SQLiteInterface,
+        )
+
+        return SQLiteInterface(location or ConfigDatabase.sqlite_path)
+    if backend == "memory":
+        from evaluation_infrastructure.database_access.memory_interface import (  # pylint: disable=import-outside-toplevel
+            InMemoryInterface,
+        )
+
+        return InMemoryInterface(location or "memory")
+    raise ValueError(
+        f"Unknown database backend {backend!r}, expected one of {BACKENDS}."
+    )
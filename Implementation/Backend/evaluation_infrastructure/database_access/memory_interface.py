@@ -0,0 +1,363 @@
+"""Script for the in-memory reference interface."""
+import copy
+import random
+import threading
+import time
+import typing
+from collections import Counter
+
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+    Connection,
+)
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.errors import DatabaseConnectionError, DuplicateKeyError
+
+
+class MemoryTransaction(Connection):
+    """
+    Groups the calls of an InMemoryInterface into one transaction.
+    The tables are restored to their state at the start of the block
+    if it is left with an exception.
+    """
+
+    def __init__(self, caller: "InMemoryInterface") -> None:
+        """
+        Initializes the transaction.
+
+        Args:
+            caller (InMemoryInterface): Interface the transaction belongs to.
+        """
+        self.caller = caller
+        self.snapshot: typing.Optional[dict] = None
+
+    def __enter__(self) -> "MemoryTransaction":
+        self.caller.lock.acquire()
+        self.snapshot = copy.deepcopy(self.caller.tables)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            if exc_type is not None:
+                self.caller.tables = self.snapshot
+        finally:
+            self.caller.lock.release()
+
+    def commit(self) -> None:
+        """Keeps the changes made so far, even if the block fails later."""
+        self.snapshot = copy.deepcopy(self.caller.tables)
+
+
+class InMemoryInterface(DBInterface):
+    """
+    Reference implementation of DBInterface holding the tables in dictionaries,
+    keyed by the key fields of config.COLLECTION_KEYS.
+    Every call can be slowed down by a simulated latency and made to fail
+    with DatabaseConnectionError, either for the next calls (fail_next) or
+    randomly with a seeded failure rate, so backup and load paths can be
+    measured and tested deterministically.
+    """
+
+    def __init__(
+        self,
+        host: str = "memory",
+        latency_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes the in-memory interface.
+
+        Args:
+            host (str): Name of the database, only used in error messages.
+            latency_seconds (float): Simulated latency of every call.
+            failure_rate (float): Probability of a call failing.
+            seed (int): Seed for the random failures.
+        """
+        self.host = host
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.tables: typing.Dict[str, typing.Dict[typing.Tuple, dict]] = {
+            table: {} for table in config.COLLECTION_KEYS
+        }
+        self.calls: typing.Counter[str] = Counter()
+        self.failures: typing.Counter[str] = Counter()
+        self._scheduled_failures: typing.Dict[typing.Optional[str], int] = {}
+
+    def fail_next(self, count: int = 1, operation: typing.Optional[str] = None) -> None:
+        """
+        Makes the next calls fail with DatabaseConnectionError.
+
+        Args:
+            count (int): Number of calls to fail.
+            operation (Optional[str]): Only fail calls of this method, e.g. "bulk_upsert".
+        """
+        self._scheduled_failures[operation] = (
+            self._scheduled_failures.get(operation, 0) + count
+        )
+
+    def _simulate(self, operation: str) -> None:
+        """Counts the call, waits for the simulated latency and injects failures."""
+        self.calls[operation] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        for scheduled in [operation, None]:
+            if self._scheduled_failures.get(scheduled):
+                self._scheduled_failures[scheduled] -= 1
+                break
+        else:
+            if not (self.failure_rate and self.random.random() < self.failure_rate):
+                return
+        self.failures[operation] += 1
+        raise DatabaseConnectionError(
+            f"Injected failure of {operation} on {self.host}."
+        )
+
+    @staticmethod
+    def _key(document: dict, table: str) -> typing.Tuple:
+        """Returns the key of the document."""
+        return tuple(document[key] for key in config.COLLECTION_KEYS[table])
+
+    @staticmethod
+    def _matches(document: dict, query: dict) -> bool:
+        """Checks whether the document has the values of the query."""
+        return all(document.get(field) == value for field, value in query.items())
+
+    @staticmethod
+    def _project(
+        document: dict, projection: typing.Optional[typing.Dict[str, int]]
+    ) -> dict:
+        """Applies an inclusion projection to a copy of the document."""
+        fields = [
+            field
+            for field, included in (projection or {}).items()
+            if included and field != "_id"
+        ]
+        if not fields:
+            return copy.deepcopy(document)
+        return {
+            field: copy.deepcopy(document[field])
+            for field in fields
+            if field in document
+        }
+
+    def connect(self) -> None:
+        """Nothing to connect to, the tables live in memory."""
+        self._simulate("connect")
+
+    def disconnect(self) -> None:
+        """Nothing to disconnect from, the tables are kept."""
+
+    def transaction(self) -> MemoryTransaction:
+        """
+        Returns a context manager running the calls inside it in one transaction.
+
+        Returns:
+            MemoryTransaction: Transaction to be entered with a with statement.
+        """
+        return MemoryTransaction(self)
+
+    def ensure_indexes(self) -> None:
+        """The tables are keyed dictionaries, so there is nothing to create."""
+        self._simulate("ensure_indexes")
+
+    def fetch(self, table: str) -> typing.List[dict]:
+        """Fetches all documents of the table."""
+        self._simulate("fetch")
+        with self.lock:
+            return copy.deepcopy(list(self.tables[table].values()))
+
+    def find_all(self, table: str) -> typing.List[dict]:
+        """Fetches all documents of the table."""
+        return self.fetch(table)
+
+    def query(
+        self,
+        query: dict,
+        table: str,
+        projection: typing.Optional[typing.Dict[str, int]] = None,
+    ) -> typing.List[dict]:
+        """
+        Fetches all documents matching the query.
+
+        Args:
+            query (dict): Fields and values to be matched.
+            table (str): Table to be queried.
+            projection (Optional[Dict[str, int]]): Fields to be returned.
+        """
+        self._simulate("query")
+        with self.lock:
+            return [
+                self._project(document, projection)
+                for document in self.tables[table].values()
+                if self._matches(document, query)
+            ]
+
+    def find(self, query: dict, table: str) -> typing.List[dict]:
+        """Fetches all documents matching the query."""
+        return self.query(query, table)
+
+    def find_first(self, query: dict, table: str) -> typing.Optional[dict]:
+        """Fetches the first document matching the query, None if there is none."""
+        documents = self.query(query, table)
+        return documents[0] if documents else None
+
+    def find_unique(self, query: dict, table: str) -> typing.Optional[dict]:
+        """Fetches the document with the given key, None if there is none."""
+        return self.find_first(query, table)
+
+    def exists(self, query: dict, table: str) -> bool:
+        """
+        Checks whether a document matching the query exists.
+
+        Args:
+            query (dict): Key of the document.
+            table (str): Table to be queried.
+        """
+        self._simulate("exists")
+        with self.lock:
+            return any(
+                self._matches(document, query)
+                for document in self.tables[table].values()
+            )
+
+    def update(self, data: dict, table: str, query: dict, upsert: bool = False) -> None:
+        """
+        Sets the given fields of the first document matching the query.
+
+        Args:
+            data (dict): Fields to be set.
+            table (str): Table to be updated.
+            query (dict): Query matching the document to be updated.
+            upsert (bool): Whether to insert the document if it does not exist.
+        """
+        self._simulate("update")
+        with self.lock:
+            rows = self.tables[table]
+            for key, document in rows.items():
+                if self._matches(document, query):
+                    del rows[key]
+                    updated = {**document, **copy.deepcopy(data)}
+                    rows[self._key(updated, table)] = updated
+                    return
+            if upsert:
+                inserted = {**copy.deepcopy(query), **copy.deepcopy(data)}
+                rows[self._key(inserted, table)] = inserted
+
+    def bulk_upsert(self, data: typing.List[dict], table: str) -> None:
+        """
+        Inserts or updates multiple documents, matched by the key of the table.
+        Fields of stored documents missing in the new ones are kept.
+
+        Args:
+            data (List[dict]): Documents to be written.
+            table (str): Table to be written to.
+        """
+        self._simulate("bulk_upsert")
+        with self.lock:
+            rows = self.tables[table]
+            for document in data:
+                key = self._key(document, table)
+                rows[key] = {**rows.get(key, {}), **copy.deepcopy(document)}
+
+    def bulk_append(
+        self,
+        data: typing.List[dict],
+        table: str,
+        field: str,
+        batch: typing.Optional[str] = None,
+    ) -> None:
+        """
+        Appends the values of a list field to the documents with the same key,
+        inserting the documents whose key does not exist.
+
+        Args:
+            data (List[dict]): Documents with the values to be appended.
+            table (str): Table to be written to.
+            field (str): List field the values are appended to.
+            batch (Optional[str]): Id of the batch, stored in the documents.
+                Documents already holding it are skipped, so a repeated call
+                does not append the values again.
+        """
+        self._simulate("bulk_append")
+        with self.lock:
+            rows = self.tables[table]
+            for document in copy.deepcopy(data):
+                key = self._key(document, table)
+                stored = rows.get(key, {})
+                if batch is not None:
+                    if stored.get(config.BULK_BATCH_FIELD) == batch:
+                        continue
+                    document[config.BULK_BATCH_FIELD] = batch
+                rows[key] = {
+                    **stored,
+                    **document,
+                    field: stored.get(field, []) + document[field],
+                }
+
+    def insert(self, data: dict, table: str) -> None:
+        """
+        Inserts the given document.
+
+        Args:
+            data (dict): Document to be inserted.
+            table (str): Table to be inserted into.
+
+        Raises:
+            DuplicateKeyError: If a document with the same key exists.
+        """
+        self.save([data], table)
+
+    def save(self, data: typing.List[dict], table: str) -> None:
+        """
+        Inserts multiple documents, none of them if one key exists already.
+
+        Args:
+            data (List[dict]): Documents to be inserted.
+            table (str): Table to be inserted into.
+
+        Raises:
+            DuplicateKeyError: If a document with the same key exists.
+        """
+        self._simulate("save")
+        with self.lock:
+            rows = self.tables[table]
+            documents = {self._key(document, table): document for document in data}
+            duplicates = [key for key in documents if key in rows]
+            if duplicates or len(documents) < len(data):
+                raise DuplicateKeyError(f"Duplicate keys in {table}: {duplicates}")
+            rows.update(copy.deepcopy(documents))
+
+    def delete(self, query: dict, table: str) -> None:
+        """
+        Deletes the first document matching the query.
+
+        Args:
+            query (dict): Query matching the document to be deleted.
+            table (str): Table to be deleted from.
+        """
+        self._simulate("delete")
+        with self.lock:
+            rows = self.tables[table]
+            for key, document in rows.items():
+                if self._matches(document, query):
+                    del rows[key]
+                    return
+
+    def delete_many(self, query: dict, table: str) -> None:
+        """
+        Deletes all documents matching the query.
+
+        Args:
+            query (dict): Query matching the documents to be deleted.
+            table (str): Table to be deleted from.
+        """
+        self._simulate("delete_many")
+        with self.lock:
+            self.tables[table] = {
+                key: document
+                for key, document in self.tables[table].items()
+                if not self._matches(document, query)
+            }
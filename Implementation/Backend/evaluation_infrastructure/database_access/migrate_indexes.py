@@ -0,0 +1,94 @@
+"""
+Verifies and creates the unique key indexes of the MongoDB collections.
+
+Usage:
+    python -m evaluation_infrastructure.database_access.migrate_indexes
+    python -m evaluation_infrastructure.database_access.migrate_indexes --apply
+
+Without --apply, only reports missing indexes, duplicate keys preventing the
+unique indexes, and whether key lookups are covered by the index.
+"""
+import argparse
+import sys
+import typing
+
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.database_access.mongo_interface import MongoInterface
+
+
+def _plan_stages(plan: dict) -> typing.List[str]:
+    """Returns the stages of a query plan, from the root to the leaves."""
+    stages = [plan["stage"]]
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            stages += _plan_stages(child)
+    return stages
+
+
+def verify(database_interface: MongoInterface) -> bool:
+    """
+    Prints the state of the indexes of every collection.
+
+    Args:
+        database_interface (MongoInterface): Database to be checked.
+
+    Returns:
+        bool: True if all indexes exist and key lookups are covered.
+    """
+    healthy = True
+    for table in config.COLLECTION_KEYS:
+        collection = database_interface.client["evaluation_system"][table]
+        index_name = MongoInterface.index_name(table)
+        has_index = index_name in collection.index_information()
+        duplicates = database_interface.find_duplicate_keys(table)
+        print(f"{table}: {collection.estimated_document_count()} documents")
+        print(f"  unique key index {index_name}: {'ok' if has_index else 'MISSING'}")
+        print(f"  duplicate keys: {len(duplicates)}")
+        for duplicate in duplicates[:10]:
+            print(f"    {duplicate['_id']} ({duplicate['count']} documents)")
+
+        explanation = (
+            database_interface.explain_key_lookup(table) if has_index else None
+        )
+        if explanation is not None:
+            stages = _plan_stages(explanation["winning_plan"])
+            covered = "IXSCAN" in stages and "FETCH" not in stages
+            print(
+                f"  key lookup plan: {' <- '.join(stages)}, "
+                f"documents examined: {explanation['documents_examined']}, "
+                f"covered: {'yes' if covered else 'NO'}"
+            )
+            healthy &= covered
+        healthy &= has_index and not duplicates
+    return healthy
+
+
+def main() -> None:
+    """Parses the arguments, applies the indexes if requested and verifies them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default=ConfigDatabase.host)
+    parser.add_argument(
+        "--apply", action="store_true", help="Create the missing indexes."
+    )
+    arguments = parser.parse_args()
+
+    # Connect without creating the indexes, so duplicates can be reported first
+    database_interface = MongoInterface(arguments.host, create_indexes=False)
+
+    if arguments.apply:
+        blocked = [
+            table
+            for table in config.COLLECTION_KEYS
+            if database_interface.find_duplicate_keys(table)
+        ]
+        if blocked:
+            print(f"Duplicate keys in {', '.join(blocked)}, merge them first.")
+        else:
+            database_interface.ensure_indexes()
+            print("Indexes created.")
+    sys.exit(0 if verify(database_interface) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,326 @@
 """Script for the MongoDB interface.""" ""
+import functools
+import random
+import time
 import typing
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo import errors as mongo_errors
+from pymongo.errors import AutoReconnect, ConnectionFailure
 
 from evaluation_infrastructure.database_access.abstract_database_interface import (
-    DBInterface, Connection
+    DBInterface,
 )
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.errors import DatabaseConnectionError, DuplicateKeyError
+from evaluation_infrastructure.logger import logger
+from evaluation_infrastructure import metrics
+
+# Code of the server error raised when a unique index meets duplicate keys
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def retry_transient(idempotent: bool = True) -> typing.Callable:
+    """
+    Retries a database call on transient errors (lost connection, network and
+    server selection timeouts) with exponential backoff and jitter.
+    Calls which are not idempotent are not retried, since the first attempt may
+    have been applied. Errors left after the last attempt are raised as
+    DatabaseConnectionError.
+
+    Args:
+        idempotent (bool): Whether the call can safely be repeated.
+    """
+
+    def decorator(method: typing.Callable) -> typing.Callable:
+        @functools.wraps(method)
+        def wrapper(self: "MongoInterface", *args, **kwargs):
+            attempts = self.retry_attempts if idempotent else 1
+            for attempt in range(1, attempts + 1):
+                try:
+                    return method(self, *args, **kwargs)
+                except AutoReconnect as exc:
+                    if attempt == attempts:
+                        raise DatabaseConnectionError(
+                            f"{method.__name__} failed after {attempt} attempts: {exc}"
+                        ) from exc
+                    delay = min(
+                        self.retry_backoff_max_seconds,
+                        self.retry_backoff_seconds * 2 ** (attempt - 1),
+                    )
+                    logger.warning(
+                        f"{method.__name__} failed ({exc}), retrying in {delay:.2f}s."
+                    )
+                    metrics.DATABASE_RETRIES.labels(method.__name__).inc()
+                    time.sleep(random.uniform(delay / 2, delay))
+                except ConnectionFailure as exc:
+                    raise DatabaseConnectionError(
+                        f"{method.__name__} failed: {exc}"
+                    ) from exc
+            return None
+
+        return wrapper
+
+    return decorator
 
 
 class MongoInterface(DBInterface):
-    """Interface for the MongoDB database."""
+    """
+    Interface for the MongoDB database.
+    The client is created on first use, so constructing the interface
+    does not touch the network.
+    """
 
-    def __init__(self, host: str) -> None:
+    def __init__(
+        self,
+        host: str,
+        client: typing.Optional[MongoClient] = None,
+        settings: typing.Type[ConfigDatabase] = ConfigDatabase,
+        create_indexes: bool = True,
+    ) -> None:
         """
         Initializes the MongoDB interface.
 
         Args:
             host (str): Host of the MongoDB database.
+            client (Optional[MongoClient]): Client to be used instead of connecting
+                to the host, e.g. a mongomock client.
+            settings (Type[ConfigDatabase]): Pool, timeout, write concern and retry settings.
+            create_indexes (bool): Whether to create the key indexes on connecting.
         """
         self.host = host
-        self.connect()
+        self.settings = settings
+        self.create_indexes = create_indexes
+        self.retry_attempts = settings.retry_attempts
+        self.retry_backoff_seconds = settings.retry_backoff_seconds
+        self.retry_backoff_max_seconds = settings.retry_backoff_max_seconds
+        self._client = client
+        self._indexes_created = False
+
+    @property
+    def client(self) -> MongoClient:
+        """Returns the client, connecting on first use."""
+        if self._client is None or (self.create_indexes and not self._indexes_created):
+            self.connect()
+        return self._client
 
     def connect(self) -> None:
-        """Connects to the MongoDB database."""
-        self.client = MongoClient(self.host)
+        """Connects to the MongoDB database and ensures the indexes exist."""
+        if self._client is None:
+            self._client = MongoClient(
+                self.host,
+                maxPoolSize=self.settings.max_pool_size,
+                minPoolSize=self.settings.min_pool_size,
+                serverSelectionTimeoutMS=self.settings.server_selection_timeout_ms,
+                connectTimeoutMS=self.settings.connect_timeout_ms,
+                socketTimeoutMS=self.settings.socket_timeout_ms,
+                w=self.settings.write_concern,
+                wTimeoutMS=self.settings.write_concern_timeout_ms,
+                journal=self.settings.journal,
+                retryWrites=True,
+                retryReads=True,
+                connect=False,
+            )
+        if self.create_indexes and not self._indexes_created:
+            # Set first, ensure_indexes accesses the client property
+            self._indexes_created = True
+            try:
+                self.ensure_indexes()
+            except DatabaseConnectionError:
+                self._indexes_created = False
+                raise
+
+    @staticmethod
+    def index_name(table: str) -> str:
+        """Returns the name of the unique key index of the table."""
+        return f"{table}_key"
+
+    @retry_transient()
+    def ensure_indexes(self) -> None:
+        """
+        Creates the compound unique indexes on the keys of the collections,
+        if they do not exist yet. Upserts and key lookups use them instead of
+        scanning the collection. A collection with duplicate keys is left
+        without its index and logged, so the backend still starts.
+        """
+        for table, keys in config.COLLECTION_KEYS.items():
+            with metrics.DATABASE_LATENCY.labels("ensure_indexes", table).time():
+                try:
+                    self.client["evaluation_system"][table].create_index(
+                        [(key, ASCENDING) for key in keys],
+                        unique=True,
+                        name=self.index_name(table),
+                    )
+                except mongo_errors.OperationFailure as exc:
+                    if exc.code != DUPLICATE_KEY_ERROR_CODE:
+                        raise
+                    logger.error(
+                        f"Unique key index of {table} not created, the collection "
+                        "has duplicate keys. Merge them and run python -m "
+                        "evaluation_infrastructure.database_access.migrate_indexes "
+                        f"--apply: {exc}"
+                    )
+
+    @staticmethod
+    def key_projection(table: str) -> typing.Dict[str, int]:
+        """
+        Returns a projection on the key fields of the table.
+        Queries on the key with this projection are covered by the key index,
+        so no documents have to be fetched.
+        """
+        return {"_id": 0, **{key: 1 for key in config.COLLECTION_KEYS[table]}}
 
     def disconnect(self) -> None:
         """Closes the connection to the MongoDB database."""
-        self.client.close()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            self._indexes_created = False
 
+    @retry_transient()
     def fetch(self, table: str) -> typing.List[dict]:
         """Fetches all evaluations from the MongoDB database."""
-        return list(self.client["evaluation_system"][table].find({}, {"_id": 0}))
+        with metrics.DATABASE_LATENCY.labels("fetch", table).time():
+            return list(self.client["evaluation_system"][table].find({}, {"_id": 0}))
 
-    def query(self, query: dict, table: str) -> typing.List[dict]:
-        """Fetches all evaluations from the MongoDB database."""
-        return list(self.client["evaluation_system"][table].find(query))
+    @retry_transient()
+    def query(
+        self,
+        query: dict,
+        table: str,
+        projection: typing.Optional[typing.Dict[str, int]] = None,
+    ) -> typing.List[dict]:
+        """
+        Fetches all documents matching the query from the MongoDB database.
+
+        Args:
+            query (dict): Query to be matched.
+            table (str): Table to be queried.
+            projection (Optional[Dict[str, int]]): Fields to be returned,
+                see key_projection for index-covered lookups. Defaults to all
+                fields except the _id, like fetch.
+        """
+        if projection is None:
+            projection = {"_id": 0}
+        with metrics.DATABASE_LATENCY.labels("query", table).time():
+            return list(self.client["evaluation_system"][table].find(query, projection))
 
-    def update(self, data: dict, table: str, query: dict) -> None:
+    @retry_transient()
+    def exists(self, query: dict, table: str) -> bool:
+        """
+        Checks whether a document with the given key exists.
+        The lookup is covered by the key index.
+
+        Args:
+            query (dict): Key of the document.
+            table (str): Table to be queried.
+        """
+        with metrics.DATABASE_LATENCY.labels("exists", table).time():
+            cursor = self.client["evaluation_system"][table].find(
+                query, self.key_projection(table)
+            )
+            return next(cursor.limit(1), None) is not None
+
+    @retry_transient()
+    def update(self, data: dict, table: str, query: dict, upsert: bool = False) -> None:
         """
         Updates the given data in the MongoDB database.
 
         Args:
             data (dict): Data to be updated.
+            table (str): Table to be updated.
+            query (dict): Query matching the document to be updated.
+            upsert (bool): Whether to insert the document if it does not exist.
         """
         data = {"$set": data}
-        self.client["evaluation_system"][table].update_one(query, data)
+        with metrics.DATABASE_LATENCY.labels("update", table).time():
+            self.client["evaluation_system"][table].update_one(
+                query, data, upsert=upsert
+            )
 
+    @retry_transient()
+    def bulk_upsert(self, data: typing.List[dict], table: str) -> None:
+        """
+        Inserts or updates multiple documents, matched by the key of the table,
+        in a single round trip.
+
+        Args:
+            data (List[dict]): Documents to be written.
+            table (str): Table to be written to.
+        """
+        if not data:
+            return
+        keys = config.COLLECTION_KEYS[table]
+        operations = [
+            UpdateOne(
+                {key: document[key] for key in keys}, {"$set": document}, upsert=True
+            )
+            for document in data
+        ]
+        with metrics.DATABASE_LATENCY.labels("bulk_upsert", table).time():
+            self.client["evaluation_system"][table].bulk_write(
+                operations, ordered=False
+            )
+
+    @retry_transient(idempotent=False)
+    def bulk_append(
+        self,
+        data: typing.List[dict],
+        table: str,
+        field: str,
+        batch: typing.Optional[str] = None,
+    ) -> None:
+        """
+        Appends the values of a list field to the documents with the same key
+        with $push, inserting the documents whose key does not exist, in a
+        single round trip. The stored documents are not read. Not retried,
+        without a batch id a repeated call appends the values again.
+
+        Args:
+            data (List[dict]): Documents with the values to be appended.
+            table (str): Table to be written to.
+            field (str): List field the values are appended to.
+            batch (Optional[str]): Id of the batch, stored in the documents.
+                Documents already holding it are skipped, so a repeated call
+                does not append the values again.
+        """
+        if not data:
+            return
+        keys = config.COLLECTION_KEYS[table]
+        operations = []
+        for document in data:
+            query = {key: document[key] for key in keys}
+            update = {"$push": {field: {"$each": document[field]}}}
+            other = {
+                name: value
+                for name, value in document.items()
+                if name != field and name not in keys
+            }
+            if batch is not None:
+                query[config.BULK_BATCH_FIELD] = {"$ne": batch}
+                other[config.BULK_BATCH_FIELD] = batch
+            if other:
+                update["$set"] = other
+            operations.append(UpdateOne(query, update, upsert=True))
+        with metrics.DATABASE_LATENCY.labels("bulk_append", table).time():
+            try:
+                self.client["evaluation_system"][table].bulk_write(
+                    operations, ordered=False
+                )
+            except mongo_errors.BulkWriteError as exc:
+                # A document holding the batch is not matched, its upsert
+                # collides with the key index and is skipped
+                if (
+                    batch is None
+                    or exc.details.get("writeConcernErrors")
+                    or any(
+                        error["code"] != DUPLICATE_KEY_ERROR_CODE
+                        for error in exc.details["writeErrors"]
+                    )
+                ):
+                    raise
+
+    @retry_transient(idempotent=False)
     def insert(self, data: dict, table: str) -> None:
         """
         Inserts the given data into the MongoDB database.
@@ -53,8 +328,14 @@ class MongoInterface(DBInterface):
         Args:
             data (dict): Data to be inserted.
         """
-        self.client["evaluation_system"][table].insert_one(data)
+        with metrics.DATABASE_LATENCY.labels("insert", table).time():
+            try:
+                # Copied, since pymongo adds the _id to the inserted document
+                self.client["evaluation_system"][table].insert_one(dict(data))
+            except mongo_errors.DuplicateKeyError as exc:
+                raise DuplicateKeyError(f"Duplicate key in {table}: {exc}") from exc
 
+    @retry_transient(idempotent=False)
     def save(self, data: list[dict], table: str) -> None:
         """
         Save multiple data entries into the MongoDB database.
@@ -62,8 +343,15 @@ class MongoInterface(DBInterface):
         Args:
             data (list[dict]): Data to be saved.
         """
-        self.client["evaluation_system"][table].insert_many(data)
+        with metrics.DATABASE_LATENCY.labels("save", table).time():
+            try:
+                self.client["evaluation_system"][table].insert_many(
+                    [dict(document) for document in data]
+                )
+            except mongo_errors.BulkWriteError as exc:
+                raise DuplicateKeyError(f"Duplicate keys in {table}: {exc}") from exc
 
+    @retry_transient()
     def delete(self, query: dict, table: str) -> None:
         """
         Deletes the given data from the MongoDB database.
@@ -72,7 +360,69 @@ class MongoInterface(DBInterface):
             query (dict): Query to be deleted.
             table (str): Table to be deleted from.
         """
-        return self.client["evaluation_system"][table].delete_one(query)
+        with metrics.DATABASE_LATENCY.labels("delete", table).time():
+            return self.client["evaluation_system"][table].delete_one(query)
 
+    @retry_transient()
+    def delete_many(self, query: dict, table: str) -> None:
+        """
+        Deletes all documents matching the query in a single round trip.
 
-mi: DBInterface = MongoInterface("G")
+        Args:
+            query (dict): Query matching the documents to be deleted.
+            table (str): Table to be deleted from.
+        """
+        with metrics.DATABASE_LATENCY.labels("delete_many", table).time():
+            self.client["evaluation_system"][table].delete_many(query)
+
+    @retry_transient()
+    def find_duplicate_keys(self, table: str) -> typing.List[dict]:
+        """
+        Returns the keys occurring in more than one document.
+        Duplicates prevent the unique key index from being created.
+
+        Args:
+            table (str): Table to be checked.
+
+        Returns:
+            List[dict]: Duplicate keys with the number of documents.
+        """
+        keys = config.COLLECTION_KEYS[table]
+        return list(
+            self.client["evaluation_system"][table].aggregate(
+                [
+                    {
+                        "$group": {
+                            "_id": {key: f"${key}" for key in keys},
+                            "count": {"$sum": 1},
+                        }
+                    },
+                    {"$match": {"count": {"$gt": 1}}},
+                ],
+                allowDiskUse=True,
+            )
+        )
+
+    def explain_key_lookup(self, table: str) -> typing.Optional[dict]:
+        """
+        Explains a key lookup on a sample document of the table.
+
+        Args:
+            table (str): Table to be checked.
+
+        Returns:
+            Optional[dict]: Winning plan and documents examined,
+                None if the table is empty.
+        """
+        collection = self.client["evaluation_system"][table]
+        projection = self.key_projection(table)
+        sample = collection.find_one({}, projection)
+        if sample is None:
+            return None
+        explanation = collection.find(sample, projection).explain()
+        return {
+            "winning_plan": explanation["queryPlanner"]["winningPlan"],
+            "documents_examined": explanation.get("executionStats", {}).get(
+                "totalDocsExamined"
+            ),
+        }
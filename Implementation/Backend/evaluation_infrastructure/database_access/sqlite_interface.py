@@ -0,0 +1,412 @@
+"""Script for the embedded SQLite interface."""
+import json
+import sqlite3
+import threading
+import typing
+
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+    Connection,
+)
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.errors import DatabaseConnectionError, DuplicateKeyError
+from evaluation_infrastructure import metrics
+
+
+class SQLiteTransaction(Connection):
+    """
+    Groups the calls of an SQLiteInterface into one transaction.
+    The changes are committed when the block is left without an exception,
+    otherwise they are rolled back.
+    """
+
+    def __init__(self, caller: "SQLiteInterface") -> None:
+        """
+        Initializes the transaction.
+
+        Args:
+            caller (SQLiteInterface): Interface the transaction belongs to.
+        """
+        self.caller = caller
+
+    def __enter__(self) -> "SQLiteTransaction":
+        self.caller.lock.acquire()
+        try:
+            if self.caller.transaction_depth == 0:
+                self.caller.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            # __exit__ is not called if entering fails
+            self.caller.lock.release()
+            raise
+        self.caller.transaction_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            self.caller.transaction_depth -= 1
+            if self.caller.transaction_depth == 0:
+                if exc_type is None:
+                    self.caller.connection.execute("COMMIT")
+                else:
+                    self.caller.connection.execute("ROLLBACK")
+        finally:
+            self.caller.lock.release()
+
+    def commit(self) -> None:
+        """Commits the changes made so far and continues the transaction."""
+        self.caller.connection.execute("COMMIT")
+        self.caller.connection.execute("BEGIN IMMEDIATE")
+
+
+class SQLiteInterface(DBInterface):
+    """
+    Interface for an embedded SQLite database, for single node deployments
+    and development without a running mongod.
+    Every table has one column per key field (see config.COLLECTION_KEYS),
+    which form the primary key, and the whole document as a JSON column.
+    The database runs in WAL mode, so readers in other processes are not
+    blocked by a running backup. Within the process all calls share one
+    connection and are serialized by its lock.
+    """
+
+    def __init__(self, host: str) -> None:
+        """
+        Initializes the SQLite interface. The database is opened on first use.
+
+        Args:
+            host (str): Path of the database file, ":memory:" for a transient database.
+        """
+        self.host = host
+        self.lock = threading.RLock()
+        self.transaction_depth = 0
+        self._connection: typing.Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Returns the connection, opening the database on first use."""
+        if self._connection is None:
+            self.connect()
+        return self._connection
+
+    def connect(self) -> None:
+        """Opens the database and creates the tables if they do not exist."""
+        with self.lock:
+            if self._connection is not None:
+                return
+            try:
+                # Transactions are managed explicitly, see SQLiteTransaction
+                self._connection = sqlite3.connect(
+                    self.host, check_same_thread=False, isolation_level=None
+                )
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+            except sqlite3.Error as exc:
+                raise DatabaseConnectionError(
+                    f"Cannot open SQLite database {self.host}: {exc}"
+                ) from exc
+            self.ensure_indexes()
+
+    def disconnect(self) -> None:
+        """Closes the database."""
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def transaction(self) -> SQLiteTransaction:
+        """
+        Returns a context manager running the calls inside it in one transaction.
+
+        Returns:
+            SQLiteTransaction: Transaction to be entered with a with statement.
+        """
+        return SQLiteTransaction(self)
+
+    def ensure_indexes(self) -> None:
+        """Creates the tables, whose primary keys are the unique key indexes."""
+        with self.transaction():
+            for table, keys in config.COLLECTION_KEYS.items():
+                columns = ", ".join(f'"{key}" TEXT NOT NULL' for key in keys)
+                primary_key = ", ".join(f'"{key}"' for key in keys)
+                self.connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                    f"{columns}, data TEXT NOT NULL, PRIMARY KEY ({primary_key})"
+                    ") WITHOUT ROWID"
+                )
+
+    @staticmethod
+    def _keys(table: str) -> typing.Tuple[str, ...]:
+        """Returns the key fields of the table."""
+        return config.COLLECTION_KEYS[table]
+
+    def _where(self, query: dict, table: str) -> typing.Tuple[str, list]:
+        """
+        Translates an equality query into a WHERE clause.
+        Key fields are matched on their columns, other fields inside the JSON document.
+
+        Returns:
+            Tuple[str, list]: The clause and its parameters.
+        """
+        if not query:
+            return "", []
+        conditions = []
+        parameters = []
+        for field, value in query.items():
+            if field in self._keys(table):
+                conditions.append(f'"{field}" = ?')
+            else:
+                conditions.append("json_extract(data, ?) = ?")
+                parameters.append(f'$."{field}"')
+            parameters.append(value)
+        return " WHERE " + " AND ".join(conditions), parameters
+
+    @staticmethod
+    def _project(
+        document: dict, projection: typing.Optional[typing.Dict[str, int]]
+    ) -> dict:
+        """Applies an inclusion projection to the document."""
+        fields = [
+            field
+            for field, included in (projection or {}).items()
+            if included and field != "_id"
+        ]
+        if not fields:
+            return document
+        return {field: document[field] for field in fields if field in document}
+
+    def _write(self, table: str, documents: typing.Iterable[dict]) -> None:
+        """Inserts or replaces the documents, matched by their key."""
+        keys = self._keys(table)
+        columns = ", ".join([*(f'"{key}"' for key in keys), "data"])
+        placeholders = ", ".join("?" * (len(keys) + 1))
+        self.connection.executemany(
+            f'INSERT OR REPLACE INTO "{table}" ({columns}) VALUES ({placeholders})',
+            (
+                [*(document[key] for key in keys), json.dumps(document)]
+                for document in documents
+            ),
+        )
+
+    def fetch(self, table: str) -> typing.List[dict]:
+        """Fetches all documents of the table."""
+        with metrics.DATABASE_LATENCY.labels("fetch", table).time(), self.lock:
+            rows = self.connection.execute(f'SELECT data FROM "{table}"').fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def find_all(self, table: str) -> typing.List[dict]:
+        """Fetches all documents of the table."""
+        return self.fetch(table)
+
+    def query(
+        self,
+        query: dict,
+        table: str,
+        projection: typing.Optional[typing.Dict[str, int]] = None,
+    ) -> typing.List[dict]:
+        """
+        Fetches all documents matching the query.
+
+        Args:
+            query (dict): Fields and values to be matched.
+            table (str): Table to be queried.
+            projection (Optional[Dict[str, int]]): Fields to be returned.
+        """
+        where, parameters = self._where(query, table)
+        with metrics.DATABASE_LATENCY.labels("query", table).time(), self.lock:
+            rows = self.connection.execute(
+                f'SELECT data FROM "{table}"{where}', parameters
+            ).fetchall()
+        return [self._project(json.loads(data), projection) for (data,) in rows]
+
+    def find(self, query: dict, table: str) -> typing.List[dict]:
+        """Fetches all documents matching the query."""
+        return self.query(query, table)
+
+    def find_first(self, query: dict, table: str) -> typing.Optional[dict]:
+        """Fetches the first document matching the query, None if there is none."""
+        documents = self.query(query, table)
+        return documents[0] if documents else None
+
+    def find_unique(self, query: dict, table: str) -> typing.Optional[dict]:
+        """Fetches the document with the given key, None if there is none."""
+        return self.find_first(query, table)
+
+    def exists(self, query: dict, table: str) -> bool:
+        """
+        Checks whether a document matching the query exists.
+
+        Args:
+            query (dict): Key of the document.
+            table (str): Table to be queried.
+        """
+        where, parameters = self._where(query, table)
+        with metrics.DATABASE_LATENCY.labels("exists", table).time(), self.lock:
+            return (
+                self.connection.execute(
+                    f'SELECT 1 FROM "{table}"{where} LIMIT 1', parameters
+                ).fetchone()
+                is not None
+            )
+
+    def update(self, data: dict, table: str, query: dict, upsert: bool = False) -> None:
+        """
+        Sets the given fields of the first document matching the query.
+
+        Args:
+            data (dict): Fields to be set.
+            table (str): Table to be updated.
+            query (dict): Query matching the document to be updated.
+            upsert (bool): Whether to insert the document if it does not exist.
+        """
+        with metrics.DATABASE_LATENCY.labels("update", table).time():
+            with self.transaction():
+                documents = self.query(query, table)
+                if documents:
+                    self.delete(query, table)
+                    self._write(table, [{**documents[0], **data}])
+                elif upsert:
+                    self._write(table, [{**query, **data}])
+
+    def bulk_upsert(self, data: typing.List[dict], table: str) -> None:
+        """
+        Inserts or updates multiple documents, matched by the key of the table,
+        in a single transaction. Fields of stored documents missing in the new
+        ones are kept, like with MongoDB's $set.
+
+        Args:
+            data (List[dict]): Documents to be written.
+            table (str): Table to be written to.
+        """
+        if not data:
+            return
+        keys = self._keys(table)
+        where = " AND ".join(f'"{key}" = ?' for key in keys)
+        with metrics.DATABASE_LATENCY.labels("bulk_upsert", table).time():
+            with self.transaction():
+                merged = []
+                for document in data:
+                    stored = self.connection.execute(
+                        f'SELECT data FROM "{table}" WHERE {where}',
+                        [document[key] for key in keys],
+                    ).fetchone()
+                    merged.append(
+                        {**json.loads(stored[0]), **document} if stored else document
+                    )
+                self._write(table, merged)
+
+    def bulk_append(
+        self,
+        data: typing.List[dict],
+        table: str,
+        field: str,
+        batch: typing.Optional[str] = None,
+    ) -> None:
+        """
+        Appends the values of a list field to the documents with the same key,
+        in a single transaction. Documents whose key does not exist are inserted.
+
+        Args:
+            data (List[dict]): Documents with the values to be appended.
+            table (str): Table to be written to.
+            field (str): List field the values are appended to.
+            batch (Optional[str]): Id of the batch, stored in the documents.
+                Documents already holding it are skipped, so a repeated call
+                does not append the values again.
+        """
+        if not data:
+            return
+        keys = self._keys(table)
+        where = " AND ".join(f'"{key}" = ?' for key in keys)
+        with metrics.DATABASE_LATENCY.labels("bulk_append", table).time():
+            with self.transaction():
+                merged = []
+                for document in data:
+                    stored = self.connection.execute(
+                        f'SELECT data FROM "{table}" WHERE {where}',
+                        [document[key] for key in keys],
+                    ).fetchone()
+                    stored = json.loads(stored[0]) if stored else {}
+                    if batch is not None:
+                        if stored.get(config.BULK_BATCH_FIELD) == batch:
+                            continue
+                        document = {**document, config.BULK_BATCH_FIELD: batch}
+                    merged.append(
+                        {
+                            **stored,
+                            **document,
+                            field: stored.get(field, []) + document[field],
+                        }
+                    )
+                self._write(table, merged)
+
+    def insert(self, data: dict, table: str) -> None:
+        """
+        Inserts the given document.
+
+        Args:
+            data (dict): Document to be inserted.
+            table (str): Table to be inserted into.
+
+        Raises:
+            DuplicateKeyError: If a document with the same key exists.
+        """
+        self.save([data], table)
+
+    def save(self, data: typing.List[dict], table: str) -> None:
+        """
+        Inserts multiple documents in a single transaction.
+
+        Args:
+            data (List[dict]): Documents to be inserted.
+            table (str): Table to be inserted into.
+
+        Raises:
+            DuplicateKeyError: If a document with the same key exists.
+        """
+        keys = self._keys(table)
+        columns = ", ".join([*(f'"{key}"' for key in keys), "data"])
+        placeholders = ", ".join("?" * (len(keys) + 1))
+        with metrics.DATABASE_LATENCY.labels("save", table).time():
+            try:
+                with self.transaction():
+                    self.connection.executemany(
+                        f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})',
+                        (
+                            [*(document[key] for key in keys), json.dumps(document)]
+                            for document in data
+                        ),
+                    )
+            except sqlite3.IntegrityError as exc:
+                raise DuplicateKeyError(f"Duplicate keys in {table}: {exc}") from exc
+
+    def delete(self, query: dict, table: str) -> None:
+        """
+        Deletes the first document matching the query.
+
+        Args:
+            query (dict): Query matching the document to be deleted.
+            table (str): Table to be deleted from.
+        """
+        keys = self._keys(table)
+        where, parameters = self._where(query, table)
+        key_columns = ", ".join(f'"{key}"' for key in keys)
+        with metrics.DATABASE_LATENCY.labels("delete", table).time():
+            with self.transaction():
+                self.connection.execute(
+                    f'DELETE FROM "{table}" WHERE ({key_columns}) IN '
+                    f'(SELECT {key_columns} FROM "{table}"{where} LIMIT 1)',
+                    parameters,
+                )
+
+    def delete_many(self, query: dict, table: str) -> None:
+        """
+        Deletes all documents matching the query.
+
+        Args:
+            query (dict): Query matching the documents to be deleted.
+            table (str): Table to be deleted from.
+        """
+        where, parameters = self._where(query, table)
+        with metrics.DATABASE_LATENCY.labels("delete_many", table).time():
+            with self.transaction():
+                self.connection.execute(f'DELETE FROM "{table}"{where}', parameters)
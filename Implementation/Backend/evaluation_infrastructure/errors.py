@@ -19,3 +19,35 @@ class EvaluationNotFoundError(NotFoundError):
 
 class DatabaseConnectionError(Exception):
     """Error raised when a database connection cannot be established."""
+
+
+class DuplicateKeyError(Exception):
+    """Error raised when a document with the same key already exists in the database."""
+
+
+class ShardNotFoundError(NotFoundError):
+    """Error raised when a shard is not found."""
+
+
+class ShardFrozenError(Exception):
+    """Error raised when writing to a frozen (read-only) shard."""
+
+
+class InvalidSemesterError(ValueError):
+    """Error raised when a semester label cannot be parsed."""
+
+
+class ChangeLogTruncatedError(Exception):
+    """Error raised when changes requested from the change log were already dropped."""
+
+
+class SemesterArchivedError(ShardFrozenError):
+    """Error raised when writing to an archived semester."""
+
+
+class ArchiveNotFoundError(NotFoundError):
+    """Error raised when a semester is not archived."""
+
+
+class ArchiveNotConfiguredError(Exception):
+    """Error raised when archiving without an archive directory."""
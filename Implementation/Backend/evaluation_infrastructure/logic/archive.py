@@ -0,0 +1,233 @@
+"""
+Cold storage of the evaluations of past semesters.
+
+Archived evaluations are removed from memory and from the database and kept
+as LZMA compressed JSON lines, one file per semester. A stub per evaluation
+(key, number of comments and its sentiment counts) stays in memory, so the
+archived semesters can still be listed and aggregated without reading them.
+"""
+import json
+import lzma
+import os
+import time
+import typing
+from dataclasses import dataclass, field
+
+from evaluation_infrastructure.logic.evaluation import Evaluation
+
+INDEX_FILE = "index.json"
+
+
+class EvaluationStub(typing.NamedTuple):
+    """Key and precomputed aggregates of an archived evaluation."""
+
+    semester: str
+    cohort: str
+    faculty: str
+    course: str
+    lecturer: str
+    comments: int
+    scored: int
+    score_sum: float
+    positive: int
+    negative: int
+
+    @classmethod
+    def from_evaluation(
+        cls, evaluation: Evaluation, threshold: float
+    ) -> "EvaluationStub":
+        """
+        Creates the stub of an evaluation.
+
+        Args:
+            evaluation (Evaluation): Evaluation to be archived.
+            threshold (float): Scores between -threshold and threshold are neutral.
+        """
+        return cls(
+            **evaluation.query,
+            comments=len(evaluation.evaluations),
+            scored=len(evaluation.scores),
+            score_sum=sum(evaluation.scores),
+            positive=sum(score > threshold for score in evaluation.scores),
+            negative=sum(score < -threshold for score in evaluation.scores),
+        )
+
+
+@dataclass
+class ArchivedSemester:
+    """Archived semester with the stubs of its evaluations."""
+
+    semester: str
+    file: str
+    archived_at: float = field(default_factory=time.time)
+    stubs: typing.List[EvaluationStub] = field(default_factory=list, repr=False)
+
+    @property
+    def courses(self) -> typing.Set[str]:
+        """Courses with archived evaluations."""
+        return {stub.course for stub in self.stubs}
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        """Converts the dataclass to a dictionary, summarizing the stubs"""
+        return {
+            "semester": self.semester,
+            "file": self.file,
+            "archived_at": self.archived_at,
+            "evaluations": len(self.stubs),
+            "comments": sum(stub.comments for stub in self.stubs),
+            "courses": sorted(self.courses),
+        }
+
+    @property
+    def document(self) -> typing.Dict[str, typing.Any]:
+        """Converts the dataclass to a JSON document, including the stubs."""
+        return {
+            "semester": self.semester,
+            "file": self.file,
+            "archived_at": self.archived_at,
+            "stubs": [list(stub) for stub in self.stubs],
+        }
+
+    @classmethod
+    def from_document(
+        cls, document: typing.Dict[str, typing.Any]
+    ) -> "ArchivedSemester":
+        """
+        Creates an archived semester from its JSON document.
+
+        Args:
+            document (dict): Document returned by ArchivedSemester.document.
+        """
+        return cls(
+            semester=document["semester"],
+            file=document["file"],
+            archived_at=document["archived_at"],
+            stubs=[EvaluationStub(*stub) for stub in document["stubs"]],
+        )
+
+
+class ArchiveStore:
+    """
+    Directory of compressed archive files with an index of the archived
+    semesters and their stubs.
+    """
+
+    def __init__(self, directory: str, preset: int = 6) -> None:
+        """
+        Initializes the store, creating the directory if needed.
+
+        Args:
+            directory (str): Directory of the archive files.
+            preset (int): LZMA compression preset, 0 (fastest) to 9 (smallest).
+        """
+        self.directory = directory
+        self.preset = preset
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file: str) -> str:
+        """Returns the path of a file of the store."""
+        return os.path.join(self.directory, file)
+
+    def _replace(self, file: str, write: typing.Callable[[str], None]) -> None:
+        """Writes a file to a temporary path first, then replaces it atomically."""
+        temporary_path = self._path(f"{file}.tmp")
+        write(temporary_path)
+        os.replace(temporary_path, self._path(file))
+
+    def write(self, semester: str, documents: typing.Iterable[dict]) -> str:
+        """
+        Writes the evaluations of a semester to its archive file.
+
+        Args:
+            semester (str): Archived semester.
+            documents (Iterable[dict]): Evaluations in the database format.
+
+        Returns:
+            str: Name of the archive file.
+        """
+        file = f"evaluations-{semester.replace('/', '-')}.jsonl.xz"
+
+        def write(path: str) -> None:
+            with lzma.open(path, "wt", encoding="utf-8", preset=self.preset) as archive:
+                for document in documents:
+                    archive.write(json.dumps(document, ensure_ascii=False))
+                    archive.write("\n")
+
+        self._replace(file, write)
+        return file
+
+    def read(self, file: str) -> typing.Iterator[dict]:
+        """
+        Reads the evaluations of an archive file.
+
+        Args:
+            file (str): Name of the archive file.
+
+        Yields:
+            dict: Evaluations in the database format.
+        """
+        with lzma.open(self._path(file), "rt", encoding="utf-8") as archive:
+            for line in archive:
+                yield json.loads(line)
+
+    def remove(self, file: str) -> None:
+        """
+        Removes an archive file.
+
+        Args:
+            file (str): Name of the archive file.
+        """
+        os.remove(self._path(file))
+
+    def size_bytes(self, file: str) -> int:
+        """Returns the compressed size of an archive file."""
+        return os.path.getsize(self._path(file))
+
+    def load_index(self) -> typing.Dict[str, ArchivedSemester]:
+        """
+        Reads the index of the archived semesters.
+
+        Returns:
+            Dict[str, ArchivedSemester]: Archived semesters by their label,
+                empty if nothing was archived yet.
+        """
+        if not os.path.exists(self._path(INDEX_FILE)):
+            return {}
+        with open(self._path(INDEX_FILE), encoding="utf-8") as index:
+            return {
+                document["semester"]: ArchivedSemester.from_document(document)
+                for document in json.load(index)
+            }
+
+    def save_index(self, archived: typing.Dict[str, ArchivedSemester]) -> None:
+        """
+        Writes the index of the archived semesters.
+
+        Args:
+            archived (Dict[str, ArchivedSemester]): Archived semesters by their label.
+        """
+
+        def write(path: str) -> None:
+            with open(path, "w", encoding="utf-8") as index:
+                json.dump([semester.document for semester in archived.values()], index)
+
+        self._replace(INDEX_FILE, write)
+
+
+def open_archive_store(
+    directory: typing.Optional[str], preset: int = 6
+) -> typing.Optional[ArchiveStore]:
+    """
+    Opens the archive store in the given directory.
+
+    Args:
+        directory (Optional[str]): Directory of the archive, None to disable archival.
+        preset (int): LZMA compression preset.
+
+    Returns:
+        Optional[ArchiveStore]: The store, None if no directory is given.
+    """
+    if directory is None:
+        return None
+    return ArchiveStore(directory, preset=preset)
@@ -0,0 +1,364 @@
+"""
+Bulk loader for historical evaluation exports.
+
+Reads a directory of exports, parses and validates the files in worker
+processes, merges their comments by the key of the evaluations and appends
+them to the stored evaluations with bulk appends, bypassing the evaluation
+system. The stored evaluations are not read. Files are loaded in chunks; after
+every written batch a checkpoint records the progress, so an interrupted load
+resumes where it stopped. Every batch has an id stored in its documents, so a
+batch written just before the interruption is not appended twice.
+
+Supported exports:
+    *.json: An evaluation as posted to /evaluation/file, or a list of them.
+    *.jsonl: One evaluation per line.
+    *.csv: One comment per row, with the columns semester, cohort, faculty,
+        course, lecturer and evaluations.
+
+The backend must not run during the load, its next backup would replace
+the appended comments with the ones it holds in memory.
+"""
+import csv
+import functools
+import itertools
+import json
+import os
+import time
+import typing
+import uuid
+from dataclasses import dataclass, field
+
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+)
+from evaluation_infrastructure.logger import logger
+
+EXPORT_SUFFIXES = (".json", ".jsonl", ".csv")
+KEYS = config.COLLECTION_KEYS[config.EVALUATIONS_COLLECTION]
+SEMESTER = KEYS.index("semester")
+# Invalid records reported per file, the others are only counted
+MAX_ERRORS_PER_FILE = 5
+
+EvaluationKey = typing.Tuple[str, ...]
+
+
+@dataclass
+class ParsedFile:
+    """Valid comments of an export by evaluation key, and its invalid records."""
+
+    path: str
+    evaluations: typing.Dict[EvaluationKey, typing.List[str]] = field(
+        default_factory=dict
+    )
+    # Number of valid records
+    records: int = 0
+    invalid: int = 0
+    errors: typing.List[str] = field(default_factory=list)
+
+    def reject(self, message: str) -> None:
+        """
+        Counts an invalid record.
+
+        Args:
+            message (str): Reason, kept for the first records of the file.
+        """
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS_PER_FILE:
+            self.errors.append(f"{self.path}: {message}")
+
+
+@dataclass
+class LoadReport:
+    """Progress and throughput of a load."""
+
+    files: int = 0
+    skipped_files: int = 0
+    records: int = 0
+    invalid: int = 0
+    comments: int = 0
+    archived_comments: int = 0
+    evaluations_written: int = 0
+    seconds: float = 0.0
+    errors: typing.List[str] = field(default_factory=list)
+
+    @property
+    def records_per_second(self) -> float:
+        """Valid records loaded per second."""
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        """Converts the dataclass to a dictionary"""
+        return {
+            "files": self.files,
+            "skipped_files": self.skipped_files,
+            "records": self.records,
+            "invalid": self.invalid,
+            "comments": self.comments,
+            "archived_comments": self.archived_comments,
+            "evaluations_written": self.evaluations_written,
+            "seconds": self.seconds,
+            "records_per_second": self.records_per_second,
+            "errors": self.errors,
+        }
+
+
+class Checkpoint:
+    """
+    Progress of a load in a JSON file: the files loaded completely, with
+    their size and modification time, and the current chunk with the
+    fingerprints of its files, the id of its batches and the evaluations
+    written so far. A changed file is loaded again.
+    """
+
+    def __init__(self, path: typing.Optional[str]) -> None:
+        """
+        Initializes the checkpoint, loading it from the file if it exists.
+
+        Args:
+            path (Optional[str]): Path of the JSON file, None to keep the
+                progress in memory only.
+        """
+        self.path = path
+        self.done: typing.Dict[str, str] = {}
+        self.pending: typing.Optional[typing.Dict[str, typing.Any]] = None
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                state = json.load(file)
+            self.done = state["done"]
+            self.pending = state["pending"]
+
+    def save(self) -> None:
+        """Writes the checkpoint to the file, replacing it atomically."""
+        if self.path is None:
+            return
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"done": self.done, "pending": self.pending}, file)
+        os.replace(temporary_path, self.path)
+
+
+def fingerprint(path: str) -> str:
+    """Returns the size and modification time of a file, to detect changes."""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def fingerprints(
+    directory: str, files: typing.List[str]
+) -> typing.Dict[str, typing.Optional[str]]:
+    """Returns the fingerprints of files of a directory, None for missing files."""
+    return {
+        file: fingerprint(path) if os.path.exists(path) else None
+        for file, path in ((file, os.path.join(directory, file)) for file in files)
+    }
+
+
+def find_exports(directory: str) -> typing.List[str]:
+    """
+    Finds the exports in a directory and its subdirectories,
+    ignoring hidden files such as the checkpoint.
+
+    Args:
+        directory (str): Directory of the exports.
+
+    Returns:
+        List[str]: Paths of the exports relative to the directory, sorted.
+    """
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory)
+        for root, _directories, names in os.walk(directory)
+        for name in names
+        if name.endswith(EXPORT_SUFFIXES) and not name.startswith(".")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _record_adapter():
+    """Returns the validator of a record, built once per process."""
+    # pydantic is only loaded by the processes parsing the exports
+    import pydantic  # pylint: disable=import-outside-toplevel
+
+    from evaluation_infrastructure.models.evaluations import (  # pylint: disable=import-outside-toplevel
+        EvaluationRecord,
+    )
+
+    return pydantic.TypeAdapter(EvaluationRecord)
+
+
+def _read_records(path: str) -> typing.Iterator[typing.Any]:
+    """Reads the records of an export in the format given by its suffix."""
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(file):
+                # One comment per row, like the body of /evaluation/single
+                yield {**row, "evaluations": [row.get("evaluations")]}
+        elif path.endswith(".jsonl"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            data = json.load(file)
+            yield from data if isinstance(data, list) else [data]
+
+
+def parse_export(path: str) -> ParsedFile:
+    """
+    Parses and validates an export, merging its records by evaluation key.
+    Invalid records are counted and skipped, the valid ones are kept.
+
+    Args:
+        path (str): Path of the export.
+
+    Returns:
+        ParsedFile: Valid comments by evaluation key and the invalid records.
+    """
+    import pydantic  # pylint: disable=import-outside-toplevel
+
+    adapter = _record_adapter()
+    parsed = ParsedFile(path)
+    try:
+        for number, record in enumerate(_read_records(path), start=1):
+            try:
+                evaluation = adapter.validate_python(record)
+            except pydantic.ValidationError as exc:
+                error = exc.errors()[0]
+                location = ".".join(map(str, error["loc"]))
+                parsed.reject(f"record {number}: {location} {error['msg']}")
+                continue
+            parsed.records += 1
+            key = tuple(evaluation[name] for name in KEYS)
+            parsed.evaluations.setdefault(key, []).extend(evaluation["evaluations"])
+    except (OSError, ValueError) as exc:  # Unreadable file or broken JSON
+        parsed.reject(f"unreadable: {exc}")
+    return parsed
+
+
+def _chunks(items: typing.List, size: int) -> typing.Iterator[typing.List]:
+    """Splits a list into chunks of the given size."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def load_exports(
+    database_interface: DBInterface,
+    directory: str,
+    workers: int = 1,
+    files_per_chunk: int = 64,
+    batch_size: int = 1000,
+    checkpoint_path: typing.Optional[str] = None,
+    archived_semesters: typing.Collection[str] = (),
+    progress: typing.Optional[typing.Callable[[LoadReport], None]] = None,
+) -> LoadReport:
+    """
+    Loads the exports of a directory into the database. The comments of
+    every evaluation are appended to the stored ones. Records of archived
+    semesters are skipped, the backend would ignore them on load.
+
+    Args:
+        database_interface (DBInterface): Database to write to.
+        directory (str): Directory of the exports.
+        workers (int): Number of processes parsing the files, 1 parses in this process.
+        files_per_chunk (int): Files merged and written together.
+        batch_size (int): Evaluations per bulk append.
+        checkpoint_path (Optional[str]): File of the checkpoint, None to
+            start over on every run.
+        archived_semesters (Collection[str]): Semesters which are archived.
+        progress (Optional[Callable[[LoadReport], None]]): Called after every chunk.
+
+    Returns:
+        LoadReport: Number of files, records and comments loaded and the throughput.
+    """
+    started = time.perf_counter()
+    checkpoint = Checkpoint(checkpoint_path)
+    report = LoadReport()
+    files = []
+    for file in find_exports(directory):
+        if checkpoint.done.get(file) == fingerprint(os.path.join(directory, file)):
+            report.skipped_files += 1
+        else:
+            files.append(file)
+    resumed = checkpoint.pending
+    if resumed is not None and resumed.get("fingerprints") != fingerprints(
+        directory, resumed["files"]
+    ):
+        # Its merged evaluations differ, the written batches cannot be skipped
+        logger.warning("Files of the interrupted chunk changed, loading them again.")
+        resumed = None
+    if resumed is not None:
+        # The interrupted chunk comes first, its written batches are skipped
+        files = [file for file in files if file not in resumed["files"]]
+    chunks = itertools.chain(
+        [resumed] if resumed is not None else [],
+        (
+            {
+                "files": chunk,
+                "fingerprints": fingerprints(directory, chunk),
+                "batch": uuid.uuid4().hex,
+                "written": 0,
+            }
+            for chunk in _chunks(files, files_per_chunk)
+        ),
+    )
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import (  # pylint: disable=import-outside-toplevel
+            ProcessPoolExecutor,
+        )
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for pending in chunks:
+            checkpoint.pending = pending
+            checkpoint.save()
+            paths = [os.path.join(directory, file) for file in pending["files"]]
+            parsed_files = (
+                executor.map(parse_export, paths)
+                if executor is not None
+                else map(parse_export, paths)
+            )
+            # Merged in the order of the files, so a resumed chunk is identical
+            merged: typing.Dict[EvaluationKey, typing.List[str]] = {}
+            for parsed in parsed_files:
+                report.files += 1
+                report.invalid += parsed.invalid
+                report.errors += parsed.errors
+                report.records += parsed.records
+                for key, comments in parsed.evaluations.items():
+                    if key[SEMESTER] in archived_semesters:
+                        report.archived_comments += len(comments)
+                        continue
+                    merged.setdefault(key, []).extend(comments)
+                    report.comments += len(comments)
+
+            remaining = list(merged.items())[pending["written"] :]
+            for batch in _chunks(remaining, batch_size):
+                database_interface.bulk_append(
+                    [
+                        {**dict(zip(KEYS, key)), "evaluations": comments}
+                        for key, comments in batch
+                    ],
+                    table=config.EVALUATIONS_COLLECTION,
+                    field="evaluations",
+                    # Identical when the batch is repeated after an interruption
+                    batch=f"{pending['batch']}-{pending['written']}",
+                )
+                pending["written"] += len(batch)
+                report.evaluations_written += len(batch)
+                checkpoint.save()
+
+            for file in pending["files"]:
+                if os.path.exists(os.path.join(directory, file)):
+                    checkpoint.done[file] = fingerprint(os.path.join(directory, file))
+            checkpoint.pending = None
+            checkpoint.save()
+            report.seconds = time.perf_counter() - started
+            if progress is not None:
+                progress(report)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,76 @@
+"""Log of the changes made to the evaluation system, tailed by read replicas."""
+import itertools
+import threading
+import typing
+from collections import deque
+
+from evaluation_infrastructure import errors as custom_errors
+
+
+class ChangeLog:
+    """
+    Ring buffer of the latest changes, numbered by a sequence starting at 1.
+    Evaluation changes hold the key and the comments added, score changes the
+    key, the position of the first new score and the scores added, result
+    changes the whole result. Applying the changes after a sequence to a snapshot
+    taken at that sequence reproduces the current state.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initializes an empty log.
+
+        Args:
+            capacity (int): Number of changes kept, older changes are dropped.
+        """
+        self.capacity = capacity
+        self.sequence = 0
+        self.changes: typing.Deque[typing.Dict[str, typing.Any]] = deque(
+            maxlen=capacity
+        )
+        self.lock = threading.Lock()
+
+    def append(self, table: str, data: typing.Dict[str, typing.Any]) -> int:
+        """
+        Appends a change.
+
+        Args:
+            table (str): Table of the change, e.g. "evaluations", "scores" or "results".
+            data (Dict[str, Any]): Document of the change.
+
+        Returns:
+            int: Sequence of the change.
+        """
+        with self.lock:
+            self.sequence += 1
+            self.changes.append(
+                {"sequence": self.sequence, "table": table, "data": data}
+            )
+            return self.sequence
+
+    def since(
+        self, sequence: int, limit: typing.Optional[int] = None
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Returns the changes after the given sequence, oldest first.
+
+        Args:
+            sequence (int): Last sequence the caller has applied.
+            limit (Optional[int]): Maximum number of changes to be returned.
+
+        Returns:
+            List[dict]: Changes with their sequence, table and document.
+
+        Raises:
+            ChangeLogTruncatedError: If changes after the sequence were dropped
+                or the sequence is ahead of the log.
+        """
+        with self.lock:
+            oldest = self.changes[0]["sequence"] if self.changes else self.sequence + 1
+            if sequence < oldest - 1 or sequence > self.sequence:
+                raise custom_errors.ChangeLogTruncatedError(
+                    f"Sequence {sequence} is not in the log ({oldest}-{self.sequence})."
+                )
+            start = sequence - oldest + 1
+            stop = None if limit is None else start + limit
+            return list(itertools.islice(self.changes, start, stop))
@@ -0,0 +1,289 @@
+"""
+Memory-mapped store for the comments of the evaluations.
+
+All comments are appended to a single file, each as its JSON string literal
+followed by a comma, and addressed by their number through an offsets array.
+Evaluations keep ranges of comment numbers instead of lists of strings, and
+consecutive comments of a range form one contiguous slice of the file, which
+is served as JSON without decoding the comments.
+The store is a cache of the database, it is rebuilt on every start.
+"""
+import bisect
+import itertools
+import json
+import mmap
+import os
+import threading
+import typing
+from array import array
+from collections.abc import Sequence
+
+
+class CommentStore:
+    """
+    Append-only file of comments with an in-memory offsets array.
+    Comment i is stored in bytes offsets[i] to offsets[i + 1] - 1 of the file,
+    the byte before offsets[i + 1] is the separating comma.
+    """
+
+    def __init__(self, path: str):
+        """
+        Creates an empty store, replacing the file if it exists.
+
+        Args:
+            path (str): Path of the file.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = array("Q", [0])
+        self._file = open(path, "w+b")  # pylint: disable=consider-using-with
+        self._map: typing.Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the file in bytes."""
+        return self.offsets[-1]
+
+    def close(self) -> None:
+        """Closes the file, the comments can no longer be read."""
+        with self.lock:
+            self._map = None
+            self._file.close()
+
+    def append(self, comments: typing.Iterable[str]) -> typing.Tuple[int, int]:
+        """
+        Appends comments to the store.
+
+        Args:
+            comments (Iterable[str]): Comments to be appended.
+
+        Returns:
+            Tuple[int, int]: Number of the first comment and one past the last one.
+        """
+        encoded = [
+            json.dumps(comment, ensure_ascii=False).encode() + b","
+            for comment in comments
+        ]
+        with self.lock:
+            start = len(self)
+            self._file.seek(self.offsets[-1])
+            self._file.write(b"".join(encoded))
+            self._file.flush()
+            # accumulate starts with the end offset of the previous comments
+            self.offsets.extend(
+                itertools.accumulate(map(len, encoded), initial=self.offsets.pop())
+            )
+            return start, len(self)
+
+    def _view(self, start_offset: int, stop_offset: int) -> memoryview:
+        """Returns a view of the bytes between the offsets, remapping if the file grew."""
+        with self.lock:
+            if self._map is None or len(self._map) < stop_offset:
+                # Views of the previous map stay valid until they are released
+                self._map = mmap.mmap(
+                    self._file.fileno(), self.offsets[-1], access=mmap.ACCESS_READ
+                )
+            return memoryview(self._map)[start_offset:stop_offset]
+
+    def json_slice(self, start: int, stop: int) -> memoryview:
+        """
+        Returns the comments start to stop - 1 as JSON string literals
+        separated by commas, without copying them.
+
+        Args:
+            start (int): Number of the first comment.
+            stop (int): One past the number of the last comment.
+        """
+        if start >= stop:
+            return memoryview(b"")
+        return self._view(self.offsets[start], self.offsets[stop] - 1)
+
+    def get(self, start: int, stop: int) -> typing.List[str]:
+        """
+        Returns the comments start to stop - 1.
+
+        Args:
+            start (int): Number of the first comment.
+            stop (int): One past the number of the last comment.
+        """
+        if start >= stop:
+            return []
+        return json.loads(b"[" + self.json_slice(start, stop) + b"]")
+
+    def scan(self, batch_size: int = 10_000) -> typing.Iterator[str]:
+        """
+        Iterates over all comments in the order they were appended.
+
+        Args:
+            batch_size (int): Number of comments decoded at once.
+
+        Yields:
+            str: Comments of the store.
+        """
+        for start in range(0, len(self), batch_size):
+            yield from self.get(start, min(len(self), start + batch_size))
+
+
+class StoredComments(Sequence):
+    """
+    Comments of an evaluation held in a CommentStore, as ranges of comment numbers.
+    Behaves like the list of comments it replaces: it can be indexed, sliced,
+    iterated, extended and compared to lists.
+    """
+
+    def __init__(
+        self, store: CommentStore, comments: typing.Iterable[str] = ()
+    ) -> None:
+        """
+        Initializes the comments.
+
+        Args:
+            store (CommentStore): Store holding the comments.
+            comments (Iterable[str]): Comments to be appended to the store.
+        """
+        self.store = store
+        # Start and stop of every range, flattened: start0, stop0, start1, ...
+        self.ranges = array("Q")
+        # Number of comments before every range, for indexing
+        self.counts = array("Q", [0])
+        self.extend(comments)
+
+    def __len__(self) -> int:
+        return self.counts[-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            return self._get(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("comment index out of range")
+        return self._get(index, index + 1)[0]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        ranges = self._ranges()
+        for position in range(0, len(ranges), 2):
+            yield from self.store.get(ranges[position], ranges[position + 1])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (StoredComments, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StoredComments({list(self)!r})"
+
+    def __deepcopy__(self, memo: dict) -> typing.List[str]:
+        """Copies are plain lists, detached from the store."""
+        return list(self)
+
+    def _ranges(self) -> array:
+        """Returns a copy of the ranges, taken while no comments are being added."""
+        with self.store.lock:
+            return self.ranges[:]
+
+    def _get(self, start: int, stop: int) -> typing.List[str]:
+        """Returns the comments start to stop - 1 of the evaluation."""
+        return list(self.view(start, stop))
+
+    def view(self, start: int, stop: int) -> "StoredComments":
+        """
+        Returns the comments start to stop - 1 without reading them,
+        e.g. to keep the comments just added to an evaluation.
+
+        Args:
+            start (int): Index of the first comment.
+            stop (int): One past the index of the last comment.
+
+        Returns:
+            StoredComments: Comments referring to the same ranges of the store.
+        """
+        view = StoredComments(self.store)
+        with self.store.lock:
+            position = bisect.bisect_right(self.counts, start) - 1
+            while start < stop and position < len(self.counts) - 1:
+                offset = self.ranges[2 * position] - self.counts[position]
+                first = offset + start
+                last = offset + min(stop, self.counts[position + 1])
+                view.ranges.extend((first, last))
+                view.counts.append(view.counts[-1] + last - first)
+                start = self.counts[position + 1]
+                position += 1
+        return view
+
+    def append(self, comment: str) -> None:
+        """Appends a comment."""
+        self.extend([comment])
+
+    def extend(self, comments: typing.Iterable[str]) -> None:
+        """
+        Appends comments to the store and to the ranges of the evaluation.
+        The ranges are updated under the lock of the store, so readers on
+        other threads never see a range without its count.
+
+        Args:
+            comments (Iterable[str]): Comments to be appended.
+        """
+        start, stop = self.store.append(comments)
+        if start == stop:
+            return
+        with self.store.lock:
+            if self.ranges and self.ranges[-1] == start:
+                # Continues the last range, e.g. comments added in a row while loading
+                self.ranges[-1] = stop
+                self.counts[-1] += stop - start
+            else:
+                self.ranges.extend((start, stop))
+                self.counts.append(self.counts[-1] + stop - start)
+
+    def json_chunks(self) -> typing.List[memoryview]:
+        """
+        Returns the comments as JSON string literals, one view per range
+        of comments separated by commas, without copying them.
+        """
+        ranges = self._ranges()
+        return [
+            self.store.json_slice(ranges[position], ranges[position + 1])
+            for position in range(0, len(ranges), 2)
+        ]
+
+
+def decode_comments(
+    document: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    """
+    Returns a document with its stored comments decoded into a list,
+    for databases and files that cannot encode a StoredComments.
+
+    Args:
+        document (dict): Document, e.g. the dict of an evaluation.
+
+    Returns:
+        dict: The document itself if it holds no stored comments.
+    """
+    comments = document.get("evaluations")
+    if isinstance(comments, StoredComments):
+        return {**document, "evaluations": list(comments)}
+    return document
+
+
+def open_comment_store(path: typing.Optional[str]) -> typing.Optional[CommentStore]:
+    """
+    Opens a comment store at the given path.
+
+    Args:
+        path (Optional[str]): Path of the file, None to keep comments in lists.
+
+    Returns:
+        Optional[CommentStore]: The store, None if no path is given.
+    """
+    if path is None:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return CommentStore(path)
@@ -1,13 +1,27 @@
-"""Script to generate dummy data for the evaluation system.""" ""
+"""
+Script to generate dummy data for the evaluation system.
+
+The generator is seeded and deterministic: the same configuration always produces
+the same data, independent of the number of worker processes. Data is produced in
+batches which can be written to the database with bulk inserts or to a snapshot file.
+"""
+
+import heapq
+import itertools
+import json
 import random
 import typing
+from dataclasses import dataclass
 
-from lorem_text import lorem
-
-from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+from evaluation_infrastructure.database_access.abstract_database_interface import (
+    DBInterface,
+)
 from evaluation_infrastructure.logic.evaluation import Evaluation
 from evaluation_infrastructure.logic.result import Result, ResultType
 
+if typing.TYPE_CHECKING:
+    from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
 faculties = [
     "Informatics",
     "Business Administration",
@@ -76,33 +90,203 @@ topics = [
 ]
 
 
-def generate_evaluation() -> typing.List[str]:
+words = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute "
+    "irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur "
+    "excepteur sint occaecat cupidatat non proident sunt culpa qui officia deserunt "
+    "mollit anim id est laborum lecture exercise exam slides lecturer course "
+    "interesting boring difficult easy helpful unclear structured practical theory "
+    "assignment feedback pace workload examples project group"
+).split()
+
+
+@dataclass
+class GeneratorConfig:
+    """
+    Parameters of the dummy data generator.
+
+    Args:
+        comment_count (int): Total number of comments to be generated.
+        comments_per_evaluation (int): Average number of comments per evaluation.
+            The number of evaluations is limited by the number of distinct keys.
+        course_skew (float): Zipf exponent of the popularity of courses, 0 is uniform.
+        lecturer_skew (float): Zipf exponent of the popularity of lecturers, 0 is uniform.
+        words_mu (float): Mean of the log-normal distribution of words per comment.
+        words_sigma (float): Standard deviation of the log-normal distribution.
+        max_words (int): Upper limit of words per comment.
+        batch_size (int): Number of evaluations per batch.
+        seed (int): Seed for the random generator.
+    """
+
+    comment_count: int = 7500
+    comments_per_evaluation: int = 25
+    course_skew: float = 1.0
+    lecturer_skew: float = 1.0
+    words_mu: float = 3.0
+    words_sigma: float = 0.8
+    max_words: int = 400
+    batch_size: int = 1000
+    seed: int = 0
+
+
+@dataclass
+class Batch:
+    """Keys and comment counts of the evaluations to be generated in one batch."""
+
+    index: int
+    keys: typing.List[typing.Tuple[str, str, str, str, str]]
+    comment_counts: typing.List[int]
+    config: GeneratorConfig
+
+
+def _zipf_weights(items: typing.List[str], skew: float) -> typing.Dict[str, float]:
+    """Returns a weight for each item, decreasing with its position."""
+    return {item: 1 / (rank + 1) ** skew for rank, item in enumerate(items)}
+
+
+def plan_batches(config: GeneratorConfig) -> typing.List[Batch]:
     """
-    Generates a list of evaluations.
+    Selects the evaluation keys and distributes the comments over them.
+    Keys are drawn without replacement, weighted by the popularity of
+    course and lecturer, so each key is generated exactly once.
+
+    Args:
+        config (GeneratorConfig): Parameters of the generator.
 
     Returns:
-        typing.List[str]: List of evaluations.
+        List[Batch]: Batches covering all evaluations to be generated.
     """
+    rng = random.Random(config.seed)
+    course_weights = _zipf_weights(courses, config.course_skew)
+    lecturer_weights = _zipf_weights(lecturers, config.lecturer_skew)
+    all_keys = list(
+        itertools.product(semesters, cohorts, faculties, courses, lecturers)
+    )
+    evaluation_count = min(
+        len(all_keys),
+        max(1, config.comment_count // max(1, config.comments_per_evaluation)),
+    )
+
+    def weight(key: typing.Tuple[str, str, str, str, str]) -> float:
+        return course_weights[key[3]] * lecturer_weights[key[4]]
+
+    # Weighted sampling without replacement (Efraimidis-Spirakis)
+    keys = heapq.nlargest(
+        evaluation_count, all_keys, key=lambda key: rng.random() ** (1 / weight(key))
+    )
+    total_weight = sum(weight(key) for key in keys)
+    comment_counts = [
+        max(1, int(config.comment_count * weight(key) / total_weight)) for key in keys
+    ]
+    for position in rng.choices(
+        range(len(keys)),
+        k=max(0, config.comment_count - sum(comment_counts)),
+    ):
+        comment_counts[position] += 1
+
     return [
-        "\n".join([lorem.paragraph() for _ in range(random.randint(1, 5))])
-        for _ in range(random.randint(1, 50))
+        Batch(
+            index=index,
+            keys=keys[start : start + config.batch_size],
+            comment_counts=comment_counts[start : start + config.batch_size],
+            config=config,
+        )
+        for index, start in enumerate(range(0, len(keys), config.batch_size))
     ]
 
 
-def generate_result() -> typing.List[ResultType]:
+def generate_batch(batch: Batch) -> typing.List[dict]:
+    """
+    Generates the evaluations of a batch.
+    All words of the batch are drawn in a single call and sliced into comments.
+
+    Args:
+        batch (Batch): Batch to be generated.
+
+    Returns:
+        List[dict]: Evaluations in the database format.
+    """
+    config = batch.config
+    rng = random.Random(f"{config.seed}-{batch.index}")
+    word_counts = [
+        min(
+            config.max_words,
+            max(1, int(rng.lognormvariate(config.words_mu, config.words_sigma))),
+        )
+        for _ in range(sum(batch.comment_counts))
+    ]
+    drawn_words = rng.choices(words, k=sum(word_counts))
+
+    evaluations = []
+    word_position = 0
+    comment_position = 0
+    for key, comment_count in zip(batch.keys, batch.comment_counts):
+        comments = []
+        for word_count in word_counts[
+            comment_position : comment_position + comment_count
+        ]:
+            comment = " ".join(drawn_words[word_position : word_position + word_count])
+            comments.append(comment.capitalize() + ".")
+            word_position += word_count
+        comment_position += comment_count
+        semester, cohort, faculty, course, lecturer = key
+        evaluations.append(
+            {
+                "semester": semester,
+                "cohort": cohort,
+                "faculty": faculty,
+                "course": course,
+                "lecturer": lecturer,
+                "evaluations": comments,
+            }
+        )
+    return evaluations
+
+
+def generate_batches(
+    config: GeneratorConfig, workers: int = 1
+) -> typing.Iterator[typing.List[dict]]:
+    """
+    Generates the evaluations batch by batch, in order.
+
+    Args:
+        config (GeneratorConfig): Parameters of the generator.
+        workers (int): Number of worker processes, 1 generates in this process.
+
+    Yields:
+        List[dict]: Evaluations of a batch in the database format.
+    """
+    batches = plan_batches(config)
+    if workers <= 1:
+        yield from map(generate_batch, batches)
+        return
+    from concurrent.futures import (  # pylint: disable=import-outside-toplevel
+        ProcessPoolExecutor,
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(generate_batch, batches)
+
+
+def generate_result(
+    rng: typing.Optional[random.Random] = None,
+) -> typing.List[ResultType]:
     """Dummy result generator"""
+    rng = rng or random.Random()
     results = []
     for semester in semesters:
-        result_topics = random.sample(topics, random.randint(3, len(topics)))
+        result_topics = rng.sample(topics, rng.randint(3, len(topics)))
         topics_distribution = {}
         total_weight = 0
         for topic in result_topics:
-            weight = random.uniform(0, 1 - total_weight)
+            weight = rng.uniform(0, 1 - total_weight)
             topics_distribution[topic] = weight
             total_weight += weight
 
         if total_weight < 1:
-            remaining_topic = random.choice(result_topics)
+            remaining_topic = rng.choice(result_topics)
             topics_distribution[remaining_topic] += 1 - total_weight
         topics_distribution = dict(sorted(topics_distribution.items()))
 
@@ -115,30 +299,132 @@ def generate_result() -> typing.List[ResultType]:
     return results
 
 
-def generate_dummy_data(evaluation_system: EvaluationSystem):
+def generate_results(
+    config: GeneratorConfig, course_names: typing.Iterable[str]
+) -> typing.List[Result]:
+    """
+    Generates a dummy result for each course.
+
+    Args:
+        config (GeneratorConfig): Parameters of the generator.
+        course_names (Iterable[str]): Courses for which results are to be generated.
+
+    Returns:
+        List[Result]: One result per course.
+    """
+    rng = random.Random(f"{config.seed}-results")
+    return [
+        Result(
+            faculty=rng.choice(faculties),
+            course=course,
+            lecturer=rng.choice(lecturers),
+            results=generate_result(rng),
+        )
+        for course in sorted(course_names)
+    ]
+
+
+def generate_dummy_data(
+    evaluation_system: "EvaluationSystem",
+    config: typing.Optional[GeneratorConfig] = None,
+    workers: int = 1,
+):
     """
     Generates dummy data for the evaluation system.
+
+    Args:
+        evaluation_system (EvaluationSystem): Evaluation system to be filled.
+        config (Optional[GeneratorConfig]): Parameters of the generator.
+        workers (int): Number of worker processes.
     """
+    config = config or GeneratorConfig()
+    for batch in generate_batches(config, workers):
+        for evaluation in batch:
+            evaluation_system._add_new_evaluation(  # pylint: disable=protected-access
+                Evaluation(**evaluation)
+            )
 
-    for _ in range(300):
-        evaluation = Evaluation(
-            semester=random.choice(semesters),
-            cohort=random.choice(cohorts),
-            faculty=random.choice(faculties),
-            course=random.choice(courses),
-            lecturer=random.choice(lecturers),
-            evaluations=generate_evaluation(),
-        )
-        evaluation_system._add_new_evaluation(
-            evaluation
-        )  # pylint: disable=protected-access
+    for result in generate_results(config, evaluation_system.get_all_courses()):
+        evaluation_system._add_result(result)  # pylint: disable=protected-access
 
-    for course in evaluation_system.get_all_courses():
-        result = Result(
-            faculty=random.choice(faculties),
-            course=course,
-            lecturer=random.choice(lecturers),
-            results=generate_result(),
+
+def write_to_database(
+    database_interface: DBInterface,
+    config: typing.Optional[GeneratorConfig] = None,
+    workers: int = 1,
+) -> int:
+    """
+    Generates dummy data and writes it straight to the database with bulk inserts,
+    without going through the evaluation system. Expects empty collections.
+
+    Args:
+        database_interface (DBInterface): Database to write to.
+        config (Optional[GeneratorConfig]): Parameters of the generator.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: Number of evaluations written.
+    """
+    config = config or GeneratorConfig()
+    course_names = set()
+    evaluation_count = 0
+    for batch in generate_batches(config, workers):
+        database_interface.save(batch, table="evaluations")
+        course_names.update(evaluation["course"] for evaluation in batch)
+        evaluation_count += len(batch)
+
+    results = generate_results(config, course_names)
+    if results:
+        database_interface.save([result.dict for result in results], table="results")
+    return evaluation_count
+
+
+def write_snapshot(
+    path: str,
+    config: typing.Optional[GeneratorConfig] = None,
+    workers: int = 1,
+) -> int:
+    """
+    Generates dummy data and writes it to a snapshot file.
+    Every line holds one JSON document: {"table": ..., "data": ...}.
+
+    Args:
+        path (str): File to write to.
+        config (Optional[GeneratorConfig]): Parameters of the generator.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: Number of evaluations written.
+    """
+    config = config or GeneratorConfig()
+    course_names = set()
+    evaluation_count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for batch in generate_batches(config, workers):
+            file.writelines(
+                json.dumps({"table": "evaluations", "data": evaluation}) + "\n"
+                for evaluation in batch
+            )
+            course_names.update(evaluation["course"] for evaluation in batch)
+            evaluation_count += len(batch)
+        file.writelines(
+            json.dumps({"table": "results", "data": result.dict}) + "\n"
+            for result in generate_results(config, course_names)
         )
-        # generate a dummy result
-        evaluation_system._add_result(result)
+    return evaluation_count
+
+
+def read_snapshot(path: str) -> typing.Iterator[typing.Tuple[str, dict]]:
+    """
+    Reads a snapshot file written by write_snapshot.
+
+    Args:
+        path (str): File to read from.
+
+    Yields:
+        Tuple[str, dict]: Table and document of every line.
+    """
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            yield entry["table"], entry["data"]
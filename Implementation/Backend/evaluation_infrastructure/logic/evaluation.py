@@ -1,10 +1,15 @@
 """Evaluation class for the evaluation infrastructure.""" ""
 import typing
+from array import array
 from dataclasses import dataclass, field
+from evaluation_infrastructure.logic.comment_store import (
+    StoredComments,
+    decode_comments,
+)
 from evaluation_infrastructure.logic.my_abstract_dataclass import AbstractDataclass
 
 from evaluation_infrastructure.database_access.abstract_database_interface import (
-    AbstractDatabaseInterface,
+    DBInterface,
 )
 
 
@@ -17,7 +22,19 @@ class Evaluation(AbstractDataclass):
     faculty: str
     course: str
     lecturer: str
+    # A StoredComments instead of a list if the comment store is enabled
     evaluations: typing.List[str] = field(default_factory=list)
+    # Sentiment scores of the first len(scores) comments, see logic.sentiment
+    scores: array = field(default_factory=lambda: array("f"), repr=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.scores, array):
+            self.scores = array("f", self.scores[: len(self.evaluations)])
+
+    @property
+    def unscored(self) -> typing.List[str]:
+        """Comments without a sentiment score yet."""
+        return self.evaluations[len(self.scores) :]
 
     def add_evaluations(self, new_evaluations: typing.List[str]) -> None:
         """
@@ -28,17 +45,19 @@ class Evaluation(AbstractDataclass):
         """
         self.evaluations.extend(new_evaluations)
 
-    def save_to_database(self, database: AbstractDatabaseInterface):
+    def save_to_database(self, database: DBInterface):
         """
         Saves the evaluation to the database.
 
         Args:
-            database (AbstractDatabaseInterface): Database to save the evaluation to.
+            database (DBInterface): Database to save the evaluation to.
         """
-        if database.query(self.query, table="evaluations"):
-            database.update(data=self.dict, table="evaluations", query=self.query)
-        else:
-            database.insert(data=self.dict, table="evaluations")
+        database.update(
+            data=decode_comments(self.dict),
+            table="evaluations",
+            query=self.query,
+            upsert=True,
+        )
 
     @property
     def query(self) -> typing.Dict[str, str]:
@@ -58,12 +77,24 @@ class Evaluation(AbstractDataclass):
 
     @property
     def dict(self) -> typing.Dict[str, typing.Union[str, typing.List[str]]]:
-        """Converts the dataclass to a dictionary"""
-        return {
+        """
+        Converts the dataclass to a dictionary, with the scores once there are any.
+        Stored comments are not decoded, the dictionary holds a view of their
+        current ranges, see comment_store.decode_comments.
+        """
+        comments = self.evaluations
+        if isinstance(comments, StoredComments):
+            comments = comments.view(0, len(comments))
+        else:
+            comments = list(comments)
+        document = {
             "semester": self.semester,
             "cohort": self.cohort,
             "faculty": self.faculty,
             "course": self.course,
             "lecturer": self.lecturer,
-            "evaluations": self.evaluations,
+            "evaluations": comments,
         }
+        if self.scores:
+            document["scores"] = [round(score, 4) for score in self.scores]
+        return document
@@ -0,0 +1,124 @@
+"""Partition of the evaluations held by the evaluation system."""
+import time
+import typing
+from collections import defaultdict
+
+from evaluation_infrastructure.logic.evaluation import Evaluation
+
+
+class EvaluationShard:
+    """
+    Evaluations sharing the value of the shard key (e.g. all evaluations of one semester),
+    with their own indexes, pending changes and backup cadence.
+    A frozen shard is read-only, new evaluations and comments are rejected.
+    """
+
+    def __init__(
+        self, name: str, frozen: bool = False, backup_interval_seconds: float = 0.0
+    ):
+        """
+        Initializes the shard.
+
+        Args:
+            name (str): Value of the shard key of the evaluations in the shard.
+            frozen (bool): Whether the shard is read-only.
+            backup_interval_seconds (float): Minimum time between two regular
+                backups of the shard, 0 to back it up on every backup.
+        """
+        self.name = name
+        self.frozen = frozen
+        self.backup_interval_seconds = backup_interval_seconds
+        self.last_backup: typing.Optional[float] = None
+
+        self.evaluations: typing.List[Evaluation] = []
+        self.evaluation_index: typing.Dict[typing.Tuple[str, ...], Evaluation] = {}
+        self.course_map: typing.Dict[str, typing.List[Evaluation]] = defaultdict(list)
+        self.cohort_map: typing.Dict[str, typing.List[Evaluation]] = defaultdict(list)
+        # Evaluations changed since the last backup of the shard, by their database key
+        self.dirty: typing.Dict[typing.Tuple[str, ...], Evaluation] = {}
+
+    def get(self, key: typing.Tuple[str, ...]) -> typing.Optional[Evaluation]:
+        """
+        Returns the evaluation with the given database key.
+
+        Args:
+            key (Tuple[str, ...]): Values of Evaluation.query.
+
+        Returns:
+            Optional[Evaluation]: The evaluation, None if it is not in the shard.
+        """
+        return self.evaluation_index.get(key)
+
+    def add(self, evaluation: Evaluation) -> None:
+        """
+        Adds an evaluation to the indexes of the shard.
+
+        Args:
+            evaluation (Evaluation): Evaluation to be added.
+        """
+        self.evaluations.append(evaluation)
+        self.evaluation_index[tuple(evaluation.query.values())] = evaluation
+        self.course_map[evaluation.course].append(evaluation)
+        self.cohort_map[evaluation.cohort].append(evaluation)
+
+    def remove(self, evaluations: typing.Iterable[Evaluation]) -> None:
+        """
+        Removes evaluations from the indexes and pending changes of the shard.
+
+        Args:
+            evaluations (Iterable[Evaluation]): Evaluations of the shard to be removed.
+        """
+        removed = {id(evaluation): evaluation for evaluation in evaluations}
+        self.evaluations = [
+            evaluation
+            for evaluation in self.evaluations
+            if id(evaluation) not in removed
+        ]
+        for evaluation in removed.values():
+            key = tuple(evaluation.query.values())
+            self.evaluation_index.pop(key, None)
+            self.dirty.pop(key, None)
+        for index, attribute in (
+            (self.course_map, "course"),
+            (self.cohort_map, "cohort"),
+        ):
+            for name in {
+                getattr(evaluation, attribute) for evaluation in removed.values()
+            }:
+                remaining = [
+                    evaluation
+                    for evaluation in index.get(name, ())
+                    if id(evaluation) not in removed
+                ]
+                if remaining:
+                    index[name] = remaining
+                else:
+                    index.pop(name, None)
+
+    def backup_due(self, now: float) -> bool:
+        """
+        Checks whether the backup interval of the shard elapsed.
+
+        Args:
+            now (float): Current time of time.monotonic.
+        """
+        return (
+            self.last_backup is None
+            or now - self.last_backup >= self.backup_interval_seconds
+        )
+
+    @property
+    def status(self) -> typing.Dict[str, typing.Any]:
+        """Size, pending changes and state of the shard."""
+        return {
+            "name": self.name,
+            "evaluations": len(self.evaluations),
+            "pending_changes": len(self.dirty),
+            "frozen": self.frozen,
+            "backup_interval_seconds": self.backup_interval_seconds,
+            "seconds_since_backup": (
+                time.monotonic() - self.last_backup
+                if self.last_backup is not None
+                else None
+            ),
+        }
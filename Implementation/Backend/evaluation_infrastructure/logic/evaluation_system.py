@@ -1,40 +1,262 @@
 """Implementation of the Evaluation System."""
 
+import itertools
+import threading
+import time
 import typing
+import uuid
 from collections import defaultdict
-from evaluation_infrastructure.logic.result import (
-    Result,
-    ResultOutputDashboard,
-    ResultType,
-)
+from concurrent.futures import ThreadPoolExecutor
+from evaluation_infrastructure.logic.result import Result, ResultType
 from evaluation_infrastructure.database_access.abstract_database_interface import (
-    AbstractDatabaseInterface,
+    DBInterface,
 )
 
+from evaluation_infrastructure.logic.archive import (
+    ArchivedSemester,
+    ArchiveStore,
+    EvaluationStub,
+)
+from evaluation_infrastructure.logic.change_log import ChangeLog
+from evaluation_infrastructure.logic.comment_store import (
+    CommentStore,
+    StoredComments,
+    decode_comments,
+)
 from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_shard import EvaluationShard
+from evaluation_infrastructure.logic.search_index import PrefixIndex, SearchMatch
+from evaluation_infrastructure.logic.semester import normalize_semester, parse_semester
+from evaluation_infrastructure.logic import sentiment
 from evaluation_infrastructure.logger import logger
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure import metrics, tracing
 import evaluation_infrastructure.errors as custom_errors
 
+if typing.TYPE_CHECKING:
+    from evaluation_infrastructure.models.dashboard import ResultOutputDashboard
+
+SentimentGroup = typing.Literal["course", "lecturer", "semester", "faculty", "cohort"]
+
 
 class EvaluationSystem:
     """
     Evaluation system for the courses.
     Holds the evaluations and results for the courses.
+    The evaluations are partitioned into shards by config.SHARD_KEY,
+    each with its own indexes, pending changes and backup cadence.
     """
 
-    def __init__(self, database_interface: AbstractDatabaseInterface):
+    def __init__(
+        self,
+        database_interface: DBInterface,
+        comment_store: typing.Optional[CommentStore] = None,
+        archive_store: typing.Optional[ArchiveStore] = None,
+    ):
         """
         Initializes the evaluation system.
         Evaluations are stored in a list of Evaluation objects.
         The Evauation System is backed up to the database every [Backup Interval] Minutes.
+
+        Args:
+            database_interface (DBInterface): Database the evaluations are backed up to.
+            comment_store (Optional[CommentStore]): Store holding the comments of
+                the evaluations, by default they are kept in lists.
+            archive_store (Optional[ArchiveStore]): Cold storage of the evaluations
+                of past semesters, None to disable archival.
         """
         self.database_interface = database_interface
+        self.comment_store = comment_store
+        self.archive_store = archive_store
+        # Archived semesters with the stubs of their evaluations, see archive_semesters
+        self.archived: typing.Dict[str, ArchivedSemester] = {}
+        # Semesters being archived, with their archived semester once the file
+        # is written, so it is listed in the index before the deletion
+        self._archiving: typing.Dict[str, typing.Optional[ArchivedSemester]] = {}
 
-        self.evaluations: typing.List[Evaluation] = []
+        self.shard_key: str = config.SHARD_KEY
+        self.shards: typing.Dict[str, EvaluationShard] = {}
         self.results: typing.List[Result] = []
+        # Results per course, one per lecturer
+        self.results_by_course: typing.Dict[str, typing.List[Result]] = defaultdict(
+            list
+        )
+        # Names across all shards, for the list endpoints and the search
         self.faculty_course_map: typing.Dict[str, typing.Set[str]] = defaultdict(set)
-        self.course_map: typing.Dict[str, typing.List[Evaluation]] = defaultdict(list)
-        self.cohort_map: typing.Dict[str, typing.List[Evaluation]] = defaultdict(list)
+        self.course_names: typing.Dict[str, None] = {}
+        self.cohort_names: typing.Dict[str, None] = {}
+        self.search_index = PrefixIndex()
+
+        # Version counters are bumped whenever the data behind a read endpoint changes.
+        # The epoch distinguishes counters of different processes (e.g. after a restart),
+        # read replicas take both from the snapshot of their writer.
+        self.epoch: str = uuid.uuid4().hex[:8]
+        self.collection_versions: typing.Dict[str, int] = defaultdict(int)
+        self.course_versions: typing.Dict[str, int] = defaultdict(int)
+
+        # Results changed since the last backup, by their database key (evaluations
+        # are tracked per shard). The lock guards the changes and the indexes
+        # against the backup and the loading running in background threads.
+        self.lock = threading.RLock()
+        self.dirty_results: typing.Dict[typing.Tuple[str, ...], Result] = {}
+        self.change_listeners: typing.List[typing.Callable[[], None]] = []
+        self.last_scoring: typing.Optional[sentiment.ScoringRun] = None
+        # Comments added since startup, for the ingest throughput limit
+        self.comments_ingested = 0
+        # Changes for read replicas, see snapshot and apply_changes
+        self.change_log = ChangeLog(config.REPLICATION_LOG_SIZE)
+
+        # State of loading from the database: empty, loading, ready or failed
+        self.load_state: str = "empty"
+        self.load_progress: typing.Dict[str, int] = {"evaluations": 0, "results": 0}
+        self.load_error: typing.Optional[str] = None
+
+        metrics.EVALUATIONS.set_function(
+            lambda: sum(len(shard.evaluations) for shard in self.shards.values())
+        )
+        metrics.RESULTS.set_function(lambda: len(self.results))
+        metrics.PENDING_CHANGES.set_function(lambda: self.pending_changes)
+
+    @property
+    def accepts_writes(self) -> bool:
+        """
+        Whether new evaluations can be added.
+        Writes are rejected while loading from the database and if loading failed,
+        since they would be overwritten or lost.
+        """
+        return self.load_state in ("empty", "ready")
+
+    @property
+    def pending_changes(self) -> int:
+        """Number of evaluations and results changed since the last backup."""
+        # Copied under the lock, the admission and the backup worker read it
+        # from other threads while shards are added
+        with self.lock:
+            shards = list(self.shards.values())
+        return sum(len(shard.dirty) for shard in shards) + len(self.dirty_results)
+
+    @property
+    def evaluations(self) -> typing.List[Evaluation]:
+        """All evaluations, shard by shard."""
+        return [
+            evaluation
+            for shard in list(self.shards.values())
+            for evaluation in shard.evaluations
+        ]
+
+    @property
+    def course_map(self) -> typing.Dict[str, typing.List[Evaluation]]:
+        """Evaluations of all shards by course."""
+        return {
+            course: self._merge_shards("course_map", course)
+            for course in self.course_names
+        }
+
+    @property
+    def cohort_map(self) -> typing.Dict[str, typing.List[Evaluation]]:
+        """Evaluations of all shards by cohort."""
+        return {
+            cohort: self._merge_shards("cohort_map", cohort)
+            for cohort in self.cohort_names
+        }
+
+    def _merge_shards(self, index: str, name: str) -> typing.List[Evaluation]:
+        """
+        Returns the evaluations of all shards under the name in the given index.
+
+        Args:
+            index (str): Index of the shards, "course_map" or "cohort_map".
+            name (str): Course or cohort.
+        """
+        return [
+            evaluation
+            for shard in list(self.shards.values())
+            for evaluation in getattr(shard, index).get(name, ())
+        ]
+
+    def _get_shard(self, evaluation: Evaluation) -> EvaluationShard:
+        """
+        Returns the shard of the evaluation, creating it if it does not exist.
+
+        Args:
+            evaluation (Evaluation): Evaluation whose shard is to be returned.
+        """
+        name = getattr(evaluation, self.shard_key)
+        if (shard := self.shards.get(name)) is None:
+            shard = self.shards[name] = EvaluationShard(
+                name,
+                frozen=name in config.FROZEN_SHARDS,
+                backup_interval_seconds=config.SHARD_BACKUP_INTERVALS.get(name, 0.0),
+            )
+        return shard
+
+    def freeze_shard(self, name: str, frozen: bool = True) -> None:
+        """
+        Makes a shard read-only, or writable again.
+        Changes made before freezing are still backed up.
+
+        Args:
+            name (str): Name of the shard.
+            frozen (bool): Whether the shard is to be read-only.
+
+        Raises:
+            ShardNotFoundError: If the shard does not exist.
+        """
+        with self.lock:
+            if name not in self.shards:
+                raise custom_errors.ShardNotFoundError
+            self.shards[name].frozen = frozen
+
+    def get_shards(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Returns the status of all shards.
+
+        Returns:
+            typing.List[dict]: Name, size, pending changes and state per shard.
+        """
+        with self.lock:
+            return [shard.status for shard in self.shards.values()]
+
+    def _mark_dirty(self, entry: typing.Union[Evaluation, Result]) -> None:
+        """
+        Marks an evaluation or result to be saved with the next backup
+        and notifies the change listeners.
+
+        Args:
+            entry (Union[Evaluation, Result]): Changed evaluation or result.
+        """
+        dirty = (
+            self._get_shard(entry).dirty
+            if isinstance(entry, Evaluation)
+            else self.dirty_results
+        )
+        dirty[tuple(entry.query.values())] = entry
+        for listener in self.change_listeners:
+            listener()
+
+    def get_collection_version(self, collection: str) -> str:
+        """
+        Returns the current version of a collection ("courses", "cohorts" or "faculties").
+
+        Args:
+            collection (str): Collection for which the version is to be retrieved.
+
+        Returns:
+            str: Version of the collection, changes whenever the collection changes.
+        """
+        return f"{self.epoch}-{self.collection_versions.get(collection, 0)}"
+
+    def get_course_version(self, course: str) -> str:
+        """
+        Returns the current version of the results of a course.
+
+        Args:
+            course (str): Course for which the version is to be retrieved.
+
+        Returns:
+            str: Version of the results, changes whenever the results of the course change.
+        """
+        return f"{self.epoch}-{self.course_versions.get(course, 0)}"
 
     def get_evaluations_by_course(
         self, course: str
@@ -48,7 +270,9 @@ class EvaluationSystem:
         Returns:
             typing.Optional[Evaluation]: Evaluation for the given course if it exists, otherwise None.
         """
-        if output := self.course_map.get(course):
+        with tracing.span("lookup"):
+            output = self._merge_shards("course_map", course)
+        if output:
             return output
         raise custom_errors.CourseNotFoundError
 
@@ -64,7 +288,9 @@ class EvaluationSystem:
         Returns:
             typing.List[Evaluation]: Evaluations for the given cohort if it exists, otherwise None.
         """
-        if output := self.cohort_map.get(cohort_name):
+        with tracing.span("lookup"):
+            output = self._merge_shards("cohort_map", cohort_name)
+        if output:
             return output
         raise custom_errors.CohortNotFoundError
 
@@ -89,34 +315,110 @@ class EvaluationSystem:
         Returns:
             typing.Optional[Evaluation]: Evaluation, if it exists, otherwise error.
         """
-        for single_evaluation in self.evaluations:
-            if (
-                single_evaluation.semester == semester_name
-                and single_evaluation.cohort == cohort_name
-                and single_evaluation.faculty == faculty_name
-                and single_evaluation.course == course_name
-                and single_evaluation.lecturer == lecturer_name
-            ):
-                return single_evaluation
+        key = (semester_name, cohort_name, faculty_name, course_name, lecturer_name)
+        shard = self.shards.get(
+            {"semester": semester_name, "faculty": faculty_name}[self.shard_key]
+        )
+        if shard is not None and (evaluation := shard.get(key)) is not None:
+            return evaluation
         raise custom_errors.EvaluationNotFoundError
 
-    def return_results(self, course: str) -> ResultOutputDashboard:
+    @metrics.OPERATION_LATENCY.labels("return_results").time()
+    def return_results(
+        self,
+        course: str,
+        start: typing.Optional[str] = None,
+        end: typing.Optional[str] = None,
+        window: typing.Optional[int] = None,
+        deltas: bool = False,
+        lecturer: typing.Optional[str] = None,
+    ) -> typing.Optional["ResultOutputDashboard"]:
         """
-        Returns the results for a course for all semesters
+        Returns the results for a course for all semesters, or the semesters in a range
 
         Args:
             course (str): Course for which the results are to be retrieved.
+            start (Optional[str]): First semester to be included.
+            end (Optional[str]): Last semester to be included.
+            window (Optional[int]): Number of semesters of the moving averages.
+            deltas (bool): Whether to include the change to the previous semester.
+            lecturer (Optional[str]): Lecturer of the course, defaults to the first one.
 
         Returns:
-            ResultOutputDashboard: Result type for a course for all semesters
+            ResultOutputDashboard: Result type for a course for all semesters,
+                None if the course has no results.
+
+        Raises:
+            InvalidSemesterError: If start or end is not a valid semester.
         """
-        for result in self.results:
-            if result.course == course:
-                return result.return_results()
+        with tracing.span("lookup"):
+            result = next(
+                (
+                    result
+                    for result in self.results_by_course.get(course, ())
+                    if lecturer is None or result.lecturer == lecturer
+                ),
+                None,
+            )
+        if result is None:
+            return None
+        with tracing.span("model_build"):
+            return result.return_results(
+                start=start, end=end, window=window, deltas=deltas
+            )
 
     def _add_result(self, result: Result) -> None:
-        self.results.append(result)
+        """
+        Adds a new result to the system and marks it for the next backup.
+
+        Args:
+            result (Result): Result to be added.
+        """
+        with self.lock:
+            self._index_result(result)
+            self._mark_dirty(result)
+            self.change_log.append("results", result.dict)
+
+    def _index_result(self, result: Result) -> None:
+        """
+        Adds a result to the in-memory structures,
+        replacing the result with the same key if there is one.
+
+        Args:
+            result (Result): Result to be added.
+        """
+        course_results = self.results_by_course[result.course]
+        for position, existing in enumerate(course_results):
+            if existing.query == result.query:
+                course_results[position] = result
+                self.results[self.results.index(existing)] = result
+                break
+        else:
+            self.results.append(result)
+            course_results.append(result)
+        self.course_versions[result.course] += 1
+
+    @staticmethod
+    def _result_from_document(document: dict) -> Result:
+        """
+        Creates a result from its database document.
 
+        Args:
+            document (dict): Document of the result.
+
+        Raises:
+            InvalidSemesterError: If the semester of a result type is not valid.
+        """
+        return Result(
+            course=document["course"],
+            lecturer=document["lecturer"],
+            faculty=document["faculty"],
+            results=[
+                ResultType(**single_result) for single_result in document["results"]
+            ],
+        )
+
+    @metrics.OPERATION_LATENCY.labels("add_or_update_evaluation").time()
     def add_or_update_evaluation(self, new_evaluation: Evaluation) -> str:
         """
         If the course is already in the system, then the evaluation is added to the existing evaluation.
@@ -126,32 +428,297 @@ class EvaluationSystem:
 
         Returns:
             str: Updated or added successfully.
+
+        Raises:
+            InvalidSemesterError: If the semester of the evaluation is not valid.
+            ShardFrozenError: If the shard of the evaluation is read-only.
         """
-        try:
-            check_evaluation = self.get_evaluation(
-                new_evaluation.semester,
-                new_evaluation.cohort,
-                new_evaluation.faculty,
-                new_evaluation.course,
-                new_evaluation.lecturer,
-            )
-            check_evaluation.add_evaluations(new_evaluation.evaluations)
-            return "Evaluation updated successfully."
-        except custom_errors.EvaluationNotFoundError:
-            self._add_new_evaluation(new_evaluation)
-            return "Evaluation added successfully."
+        new_evaluation.semester = normalize_semester(new_evaluation.semester)
+        with self.lock:
+            self._check_writable(new_evaluation)
+            metrics.COMMENTS_INGESTED.inc(len(new_evaluation.evaluations))
+            self.comments_ingested += len(new_evaluation.evaluations)
+            try:
+                check_evaluation = self.get_evaluation(
+                    new_evaluation.semester,
+                    new_evaluation.cohort,
+                    new_evaluation.faculty,
+                    new_evaluation.course,
+                    new_evaluation.lecturer,
+                )
+                check_evaluation.add_evaluations(new_evaluation.evaluations)
+                self._mark_dirty(check_evaluation)
+                self._record_evaluation_change(
+                    check_evaluation, len(new_evaluation.evaluations)
+                )
+                return "Evaluation updated successfully."
+            except custom_errors.EvaluationNotFoundError:
+                self._add_new_evaluation(new_evaluation)
+                return "Evaluation added successfully."
+
+    @metrics.OPERATION_LATENCY.labels("add_or_update_evaluations").time()
+    def add_or_update_evaluations(
+        self, new_evaluations: typing.List[Evaluation]
+    ) -> typing.Dict[str, int]:
+        """
+        Adds or updates multiple evaluations under a single acquisition of the lock.
+        Either all evaluations are applied or, if one of their shards is read-only,
+        none of them.
+
+        Args:
+            new_evaluations (List[Evaluation]): Evaluations to be added or updated.
+
+        Returns:
+            Dict[str, int]: Number of evaluations added and updated.
+
+        Raises:
+            InvalidSemesterError: If the semester of an evaluation is not valid.
+            ShardFrozenError: If the shard of an evaluation is read-only.
+        """
+        for new_evaluation in new_evaluations:
+            new_evaluation.semester = normalize_semester(new_evaluation.semester)
+        counts = {"added": 0, "updated": 0}
+        with self.lock:
+            for new_evaluation in new_evaluations:
+                self._check_writable(new_evaluation)
+            for new_evaluation in new_evaluations:
+                shard = self._get_shard(new_evaluation)
+                evaluation = shard.get(tuple(new_evaluation.query.values()))
+                if evaluation is None:
+                    self._add_new_evaluation(new_evaluation)
+                    counts["added"] += 1
+                else:
+                    evaluation.add_evaluations(new_evaluation.evaluations)
+                    self._mark_dirty(evaluation)
+                    self._record_evaluation_change(
+                        evaluation, len(new_evaluation.evaluations)
+                    )
+                    counts["updated"] += 1
+                metrics.COMMENTS_INGESTED.inc(len(new_evaluation.evaluations))
+                self.comments_ingested += len(new_evaluation.evaluations)
+        return counts
+
+    def _check_writable(self, new_evaluation: Evaluation) -> None:
+        """
+        Checks that comments can be added to the evaluation.
+
+        Args:
+            new_evaluation (Evaluation): Evaluation to be added or updated.
+
+        Raises:
+            SemesterArchivedError: If the semester of the evaluation is archived.
+            ShardFrozenError: If the shard of the evaluation is read-only.
+        """
+        if (
+            new_evaluation.semester in self.archived
+            or new_evaluation.semester in self._archiving
+        ):
+            raise custom_errors.SemesterArchivedError(
+                f"Semester {new_evaluation.semester} is archived."
+            )
+        # Looked up without _get_shard, so a rejected write creates no empty shard
+        name = getattr(new_evaluation, self.shard_key)
+        shard = self.shards.get(name)
+        if shard.frozen if shard is not None else name in config.FROZEN_SHARDS:
+            raise custom_errors.ShardFrozenError(
+                f"{self.shard_key} {name} is read-only."
+            )
 
     def _add_new_evaluation(self, new_evaluation: Evaluation) -> None:
         """
-        Adds a new evaluation to the system.
+        Adds a new evaluation to the system and marks it for the next backup.
 
         Args:
             new_evaluation (Evaluation): Evaluation to be added.
         """
-        self.evaluations.append(new_evaluation)
+        with self.lock:
+            self._index_evaluation(new_evaluation)
+            self._mark_dirty(new_evaluation)
+            self._record_evaluation_change(
+                new_evaluation, len(new_evaluation.evaluations)
+            )
+
+    def _record_evaluation_change(self, evaluation: Evaluation, added: int) -> None:
+        """
+        Records the comments added to an evaluation in the change log.
+        Comments in the comment store are recorded as a view of their ranges,
+        so the log does not hold a second copy of them.
+
+        Args:
+            evaluation (Evaluation): Evaluation the comments were added to.
+            added (int): Number of comments added, the last ones of the evaluation.
+        """
+        comments = evaluation.evaluations
+        start = len(comments) - added
+        if isinstance(comments, StoredComments):
+            comments = comments.view(start, len(comments))
+        else:
+            comments = comments[start:]
+        self.change_log.append(
+            "evaluations", {**evaluation.query, "evaluations": comments}
+        )
+
+    def _index_evaluation(self, new_evaluation: Evaluation) -> None:
+        """
+        Adds an evaluation to the in-memory structures.
+
+        Args:
+            new_evaluation (Evaluation): Evaluation to be added.
+        """
+        comments = new_evaluation.evaluations
+        if (
+            isinstance(comments, StoredComments)
+            and comments.store is not self.comment_store
+        ):
+            # E.g. a snapshot of another evaluation system in the same process
+            comments = list(comments)
+        if self.comment_store is not None and not isinstance(comments, StoredComments):
+            comments = StoredComments(self.comment_store, comments)
+        new_evaluation.evaluations = comments
+        if new_evaluation.course not in self.course_names:
+            self.collection_versions["courses"] += 1
+        if new_evaluation.cohort not in self.cohort_names:
+            self.collection_versions["cohorts"] += 1
+        if new_evaluation.course not in self.faculty_course_map.get(
+            new_evaluation.faculty, ()
+        ):
+            self.collection_versions["faculties"] += 1
+
+        self._get_shard(new_evaluation).add(new_evaluation)
         self.faculty_course_map[new_evaluation.faculty].add(new_evaluation.course)
-        self.course_map[new_evaluation.course].append(new_evaluation)
-        self.cohort_map[new_evaluation.cohort].append(new_evaluation)
+        self.course_names[new_evaluation.course] = None
+        self.cohort_names[new_evaluation.cohort] = None
+        for kind, name in (
+            ("course", new_evaluation.course),
+            ("lecturer", new_evaluation.lecturer),
+            ("faculty", new_evaluation.faculty),
+            ("cohort", new_evaluation.cohort),
+        ):
+            self.search_index.add(kind, name, new_evaluation.faculty)
+
+    @metrics.OPERATION_LATENCY.labels("score_sentiment").time()
+    def score_sentiment(
+        self, workers: typing.Optional[int] = None
+    ) -> sentiment.ScoringRun:
+        """
+        Scores the sentiment of all comments without a score yet.
+        The comments are scored outside the lock, comments added meanwhile
+        are scored by the next run.
+
+        Args:
+            workers (Optional[int]): Number of worker processes,
+                defaults to config.SENTIMENT_WORKERS.
+
+        Returns:
+            sentiment.ScoringRun: Number of comments scored and the throughput.
+        """
+        with self.lock:
+            pending = [
+                (evaluation, len(evaluation.scores), len(evaluation.evaluations))
+                for shard in self.shards.values()
+                for evaluation in shard.evaluations
+                if evaluation.unscored
+            ]
+            comments = [
+                comment
+                for evaluation, start, end in pending
+                for comment in evaluation.evaluations[start:end]
+            ]
+        scores, run = sentiment.score_comments(comments, workers=workers)
+
+        position = 0
+        with self.lock:
+            for evaluation, start, end in pending:
+                if len(evaluation.scores) == start:
+                    added = scores[position : position + end - start]
+                    evaluation.scores.extend(added)
+                    self._mark_dirty(evaluation)
+                    # Replicas do not score, they append the scores of the writer
+                    self.change_log.append(
+                        "scores",
+                        {**evaluation.query, "start": start, "scores": list(added)},
+                    )
+                position += end - start
+        metrics.COMMENTS_SCORED.inc(run.comments)
+        self.last_scoring = run
+        if run.comments:
+            logger.info(
+                f"Scored {run.comments} comments in {run.seconds:.2f}s "
+                f"with {run.workers} workers."
+            )
+        return run
+
+    def get_sentiment(
+        self,
+        group_by: SentimentGroup = "course",
+        course: typing.Optional[str] = None,
+        lecturer: typing.Optional[str] = None,
+        semester: typing.Optional[str] = None,
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Aggregates the sentiment scores of the comments.
+
+        Args:
+            group_by (SentimentGroup): Field the scores are grouped by.
+            course (Optional[str]): Only include comments of this course.
+            lecturer (Optional[str]): Only include comments of this lecturer.
+            semester (Optional[str]): Only include comments of this semester.
+
+        Returns:
+            typing.List[dict]: Per group the number of scored comments, the mean
+                score and the shares of positive and negative comments.
+
+        Raises:
+            InvalidSemesterError: If the semester is not valid.
+        """
+        threshold = config.SENTIMENT_NEUTRAL_THRESHOLD
+        semester = normalize_semester(semester) if semester else None
+        groups: typing.Dict[str, typing.List[float]] = defaultdict(
+            lambda: [0, 0.0, 0, 0]
+        )
+        with self.lock:
+            if course is not None:
+                evaluations = self._merge_shards("course_map", course)
+            elif semester is not None and self.shard_key == "semester":
+                shard = self.shards.get(semester)
+                evaluations = shard.evaluations if shard is not None else []
+            else:
+                evaluations = self.evaluations
+            for evaluation in evaluations:
+                if (lecturer is not None and evaluation.lecturer != lecturer) or (
+                    semester is not None and evaluation.semester != semester
+                ):
+                    continue
+                group = groups[getattr(evaluation, group_by)]
+                group[0] += len(evaluation.scores)
+                group[1] += sum(evaluation.scores)
+                group[2] += sum(score > threshold for score in evaluation.scores)
+                group[3] += sum(score < -threshold for score in evaluation.scores)
+            # Archived evaluations contribute their precomputed counts
+            for archived in self.archived.values():
+                if semester is not None and archived.semester != semester:
+                    continue
+                for stub in archived.stubs:
+                    if (course is not None and stub.course != course) or (
+                        lecturer is not None and stub.lecturer != lecturer
+                    ):
+                        continue
+                    group = groups[getattr(stub, group_by)]
+                    group[0] += stub.scored
+                    group[1] += stub.score_sum
+                    group[2] += stub.positive
+                    group[3] += stub.negative
+        return [
+            {
+                group_by: name,
+                "comments": count,
+                "mean": total / count,
+                "positive": positive / count,
+                "negative": negative / count,
+            }
+            for name, (count, total, positive, negative) in sorted(groups.items())
+            if count
+        ]
 
     def get_faculty_course_map(self) -> typing.Dict[str, typing.Set[str]]:
         """
@@ -160,7 +727,32 @@ class EvaluationSystem:
         Returns:
             typing.Dict[str, typing.Set[str]]: Faculty course map.
         """
-        return self.faculty_course_map
+        with self.lock:
+            return {
+                faculty: set(courses)
+                for faculty, courses in self.faculty_course_map.items()
+            }
+
+    def search(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kind: typing.Optional[str] = None,
+        faculty: typing.Optional[str] = None,
+    ) -> typing.List[SearchMatch]:
+        """
+        Returns courses, lecturers, faculties and cohorts with a word starting with the prefix.
+
+        Args:
+            prefix (str): Prefix to be searched, case insensitive.
+            limit (int): Maximum number of matches.
+            kind (Optional[str]): Only return names of this kind.
+            faculty (Optional[str]): Only return names referenced in this faculty.
+
+        Returns:
+            typing.List[SearchMatch]: Matches, most referenced first.
+        """
+        return self.search_index.search(prefix, limit=limit, kind=kind, faculty=faculty)
 
     def get_all_courses(self) -> typing.List[str]:
         """
@@ -169,7 +761,7 @@ class EvaluationSystem:
         Returns:
             typing.List[str]: List of all courses.
         """
-        return list(self.course_map.keys())
+        return list(self.course_names)
 
     def get_all_cohorts(self) -> typing.List[str]:
         """
@@ -178,48 +770,508 @@ class EvaluationSystem:
         Returns:
             typing.List[str]: List of all cohorts.
         """
-        return list(self.cohort_map.keys())
+        return list(self.cohort_names)
 
     def _initialize_evaluations(self):
-        """Initializes the evaluations from the database."""
+        """
+        Initializes the evaluations from the database.
+        Evaluations with an invalid semester are skipped, as are evaluations
+        of archived semesters (e.g. saved by a backup racing the archival).
+        """
         for evaluation in self.database_interface.fetch(table="evaluations"):
-            self._add_new_evaluation(Evaluation(**evaluation))
+            try:
+                evaluation["semester"] = normalize_semester(evaluation["semester"])
+            except custom_errors.InvalidSemesterError as exc:
+                logger.warning(f"Skipping evaluation from the database: {exc}")
+                continue
+            # Id of the last batch of the bulk loader, see logic.bulk_loader
+            evaluation.pop(config.BULK_BATCH_FIELD, None)
+            if evaluation["semester"] in self.archived:
+                logger.warning(
+                    f"Skipping evaluation of archived semester {evaluation['semester']}."
+                )
+                continue
+            with self.lock:
+                self._index_evaluation(Evaluation(**evaluation))
+            self.load_progress["evaluations"] += 1
         logger.info("Evaluations initialized.")
 
     def _initialize_results(self):
-        """Initializes the results from the database."""
+        """
+        Initializes the results from the database.
+        Results with an invalid semester are skipped.
+        """
         for result in self.database_interface.fetch(table="results"):
-            self.results.append(
-                Result(
-                    course=result["course"],
-                    lecturer=result["lecturer"],
-                    faculty=result["faculty"],
-                    results=[
-                        ResultType(**single_result)
-                        for single_result in result["results"]
-                    ],
-                )
-            )
+            try:
+                parsed_result = self._result_from_document(result)
+            except custom_errors.InvalidSemesterError as exc:
+                logger.warning(f"Skipping result from the database: {exc}")
+                continue
+            with self.lock:
+                self._index_result(parsed_result)
+            self.load_progress["results"] += 1
         logger.info("Results initialized.")
 
+    @metrics.OPERATION_LATENCY.labels("create_from_database").time()
     def create_from_database(self):
-        """Creates the evaluation system from fetched data."""
-        self._initialize_evaluations()
-        self._initialize_results()
+        """
+        Creates the evaluation system from fetched data.
+        The progress is reported in load_state and load_progress.
+        """
+        self.load_state = "loading"
+        try:
+            if self.archive_store is not None:
+                self.archived = self.archive_store.load_index()
+            self._initialize_evaluations()
+            self._initialize_results()
+        except Exception as exc:
+            self.load_state = "failed"
+            self.load_error = repr(exc)
+            raise
+        self.load_state = "ready"
         logger.info("Evaluation system created from database.")
 
-    def _backup_evaluation(self):
-        """Backs up the evaluations to the database."""
-        for evaluation in self.evaluations:
-            evaluation.save_to_database(self.database_interface)
+    def get_archive(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Returns the archived semesters.
+
+        Returns:
+            typing.List[dict]: Per semester its file, number of evaluations and
+                comments and its courses, oldest semester first.
+        """
+        with self.lock:
+            return [
+                self.archived[semester].dict
+                for semester in sorted(self.archived, key=parse_semester)
+            ]
+
+    def archive_semesters(self, before: str) -> typing.List[ArchivedSemester]:
+        """
+        Moves the evaluations of all semesters before the given one to the archive.
+
+        Args:
+            before (str): First semester to be kept, e.g. WS22/23.
+
+        Returns:
+            typing.List[ArchivedSemester]: Semesters archived, oldest first.
+
+        Raises:
+            ArchiveNotConfiguredError: If the system has no archive store.
+            InvalidSemesterError: If the semester is not valid.
+        """
+        if self.archive_store is None:
+            raise custom_errors.ArchiveNotConfiguredError(
+                "No archive directory is configured."
+            )
+        cutoff = parse_semester(before)
+        with self.lock:
+            semesters = {
+                evaluation.semester
+                for evaluation in self.evaluations
+                if parse_semester(evaluation.semester) < cutoff
+            }
+        return [
+            self.archive_semester(semester)
+            for semester in sorted(
+                semesters - self._archiving.keys(), key=parse_semester
+            )
+        ]
+
+    @metrics.OPERATION_LATENCY.labels("archive_semester").time()
+    def archive_semester(self, semester: str) -> ArchivedSemester:
+        """
+        Moves the evaluations of a semester to the archive. The evaluations are
+        written to the archive file from memory, so pending changes are archived
+        too, and listed in the index of the archive before they are removed from
+        the database and from memory. After a crash during the deletion, the
+        restarted system finds the semester archived and skips its rows. A stub
+        per evaluation is kept in memory. Writes to the semester are rejected
+        from the start of the archival.
+
+        Args:
+            semester (str): Semester to be archived.
+
+        Returns:
+            ArchivedSemester: The archived semester.
+
+        Raises:
+            ArchiveNotConfiguredError: If the system has no archive store.
+            ShardNotFoundError: If the semester has no evaluations in memory.
+            InvalidSemesterError: If the semester is not valid.
+        """
+        if self.archive_store is None:
+            raise custom_errors.ArchiveNotConfiguredError(
+                "No archive directory is configured."
+            )
+        semester = normalize_semester(semester)
+        threshold = config.SENTIMENT_NEUTRAL_THRESHOLD
+        with self.lock:
+            if self.shard_key == "semester":
+                shard = self.shards.get(semester)
+                evaluations = list(shard.evaluations) if shard is not None else []
+            else:
+                evaluations = [
+                    evaluation
+                    for evaluation in self.evaluations
+                    if evaluation.semester == semester
+                ]
+            if not evaluations or semester in self._archiving:
+                raise custom_errors.ShardNotFoundError(
+                    f"No evaluations of semester {semester} to archive."
+                )
+            self._archiving[semester] = None
+            documents = [evaluation.dict for evaluation in evaluations]
+            stubs = [
+                EvaluationStub.from_evaluation(evaluation, threshold)
+                for evaluation in evaluations
+            ]
+            for evaluation in evaluations:
+                self._get_shard(evaluation).dirty.pop(
+                    tuple(evaluation.query.values()), None
+                )
+        try:
+            # The comments are decoded one evaluation at a time while writing
+            file = self.archive_store.write(semester, map(decode_comments, documents))
+            archived = ArchivedSemester(semester=semester, file=file, stubs=stubs)
+            with self.lock:
+                self._archiving[semester] = archived
+                self._save_archive_index()
+            self.database_interface.delete_many(
+                query={"semester": semester}, table="evaluations"
+            )
+        except Exception:
+            with self.lock:
+                # The evaluations stay in memory and in the database
+                self._archiving.pop(semester, None)
+                self._save_archive_index()
+                # Saved again in case the deletion was applied
+                for evaluation in evaluations:
+                    self._mark_dirty(evaluation)
+            raise
+
+        with self.lock:
+            self._remove_evaluations(evaluations)
+            self.archived[semester] = archived
+            self._archiving.pop(semester, None)
+            self.change_log.append("archive", archived.document)
+        logger.info(
+            f"Archived {len(evaluations)} evaluations of {semester} to {file} "
+            f"({self.archive_store.size_bytes(file)} bytes)."
+        )
+        return archived
+
+    def _save_archive_index(self) -> None:
+        """
+        Writes the index of the archive: the archived semesters and those
+        whose archive file is written but whose deletion is still running.
+        """
+        with self.lock:
+            self.archive_store.save_index(
+                {
+                    **self.archived,
+                    **{
+                        semester: archived
+                        for semester, archived in self._archiving.items()
+                        if archived is not None
+                    },
+                }
+            )
+
+    def _remove_evaluations(self, evaluations: typing.List[Evaluation]) -> None:
+        """
+        Removes evaluations from their shards, dropping shards left empty.
+        Courses and cohorts stay listed, their results are kept.
+
+        Args:
+            evaluations (List[Evaluation]): Evaluations to be removed.
+        """
+        by_shard: typing.Dict[str, typing.List[Evaluation]] = defaultdict(list)
+        for evaluation in evaluations:
+            by_shard[getattr(evaluation, self.shard_key)].append(evaluation)
+        for name, shard_evaluations in by_shard.items():
+            if (shard := self.shards.get(name)) is None:
+                continue
+            shard.remove(shard_evaluations)
+            if not shard.evaluations and not shard.dirty:
+                del self.shards[name]
+
+    @metrics.OPERATION_LATENCY.labels("restore_semester").time()
+    def restore_semester(self, semester: str) -> int:
+        """
+        Moves the evaluations of an archived semester back into memory and
+        into the database. The archive file is removed once they are saved.
+
+        Args:
+            semester (str): Archived semester.
+
+        Returns:
+            int: Number of evaluations restored.
+
+        Raises:
+            ArchiveNotFoundError: If the semester is not archived.
+            ArchiveNotConfiguredError: If the system has no archive store.
+            InvalidSemesterError: If the semester is not valid.
+        """
+        semester = normalize_semester(semester)
+        with self.lock:
+            archived = self.archived.get(semester)
+        if archived is None:
+            raise custom_errors.ArchiveNotFoundError(
+                f"Semester {semester} is not archived."
+            )
+        if self.archive_store is None:
+            raise custom_errors.ArchiveNotConfiguredError(
+                "The archive files are only available on the writer."
+            )
+        documents = list(self.archive_store.read(archived.file))
+        with self.lock:
+            if self.archived.get(semester) is not archived:
+                return 0  # Restored by a concurrent call
+            del self.archived[semester]
+            self.change_log.append("restore", {"semester": semester})
+            for document in documents:
+                self._add_new_evaluation(Evaluation(**document))
+        # The archive is kept until the evaluations are in the database again
+        self.backup_to_database()
+        self._save_archive_index()
+        self.archive_store.remove(archived.file)
+        logger.info(f"Restored {len(documents)} evaluations of {semester}.")
+        return len(documents)
+
+    def get_archived_evaluations_by_course(
+        self, course: str
+    ) -> typing.List[Evaluation]:
+        """
+        Reads the archived evaluations of a course from the archive files,
+        oldest semester first. The semesters stay archived.
+
+        Args:
+            course (str): Course to be looked up in the stubs.
+
+        Returns:
+            typing.List[Evaluation]: Archived evaluations of the course.
+
+        Raises:
+            ArchiveNotConfiguredError: If the course has archived evaluations
+                and the system has no archive store.
+        """
+        with self.lock:
+            files = [
+                archived.file
+                for semester, archived in sorted(
+                    self.archived.items(), key=lambda item: parse_semester(item[0])
+                )
+                if course in archived.courses
+            ]
+        if files and self.archive_store is None:
+            raise custom_errors.ArchiveNotConfiguredError(
+                "The archive files are only available on the writer."
+            )
+        evaluations = []
+        for file in files:
+            try:
+                documents = list(self.archive_store.read(file))
+            except FileNotFoundError:
+                continue  # Restored meanwhile, the evaluations are in memory again
+            evaluations += [
+                Evaluation(**document)
+                for document in documents
+                if document["course"] == course
+            ]
+        return evaluations
+
+    def snapshot(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns all evaluations and results, consistent with the change log
+        up to the returned sequence.
 
-    def _backup_result(self):
-        """Backs up the results to the database."""
-        for result in self.results:
-            result.save_to_database(self.database_interface)
+        Returns:
+            dict: Epoch and sequence of the change log, versions of the read
+                endpoints, evaluations and results in the database format.
+        """
+        with self.lock:
+            return {
+                "epoch": self.epoch,
+                "sequence": self.change_log.sequence,
+                "collection_versions": dict(self.collection_versions),
+                "course_versions": dict(self.course_versions),
+                "evaluations": [evaluation.dict for evaluation in self.evaluations],
+                "results": [result.dict for result in self.results],
+                "archived": [archived.document for archived in self.archived.values()],
+            }
+
+    def load_snapshot(self, snapshot: typing.Dict[str, typing.Any]) -> None:
+        """
+        Replaces all evaluations and results with those of a snapshot of
+        another evaluation system, e.g. when bootstrapping a read replica.
+        The snapshot is not marked for backup.
+
+        Args:
+            snapshot (dict): Snapshot returned by snapshot.
+        """
+        with self.lock:
+            self.shards = {}
+            self.results = []
+            self.results_by_course = defaultdict(list)
+            self.faculty_course_map = defaultdict(set)
+            self.course_names = {}
+            self.cohort_names = {}
+            self.search_index = PrefixIndex()
+            self.dirty_results = {}
+            self.change_log = ChangeLog(config.REPLICATION_LOG_SIZE)
+            self.archived = {
+                document["semester"]: ArchivedSemester.from_document(document)
+                for document in snapshot.get("archived", ())
+            }
+            for evaluation in snapshot["evaluations"]:
+                self._index_evaluation(Evaluation(**evaluation))
+            for result in snapshot["results"]:
+                self._index_result(self._result_from_document(result))
+            # The versions of the snapshotted system, bumped by the same changes
+            # afterwards, so all nodes send the same ETags for the same data
+            self.epoch = snapshot["epoch"]
+            self.collection_versions = defaultdict(int, snapshot["collection_versions"])
+            self.course_versions = defaultdict(int, snapshot["course_versions"])
+            self.load_progress = {
+                "evaluations": len(snapshot["evaluations"]),
+                "results": len(snapshot["results"]),
+            }
+            self.load_state = "ready"
+
+    def apply_changes(self, changes: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        """
+        Applies changes from the change log of another evaluation system.
+        Added comments and scores are appended to their evaluation, results are
+        replaced, archived semesters are replaced by their stubs.
+        The changes are recorded in the own change log, but not marked for backup.
+
+        Args:
+            changes (List[dict]): Changes returned by ChangeLog.since.
+        """
+        with self.lock:
+            for change in changes:
+                data = change["data"]
+                if change["table"] == "results":
+                    self._index_result(self._result_from_document(data))
+                    self.change_log.append("results", data)
+                    continue
+                if change["table"] == "archive":
+                    self._remove_evaluations(
+                        [
+                            evaluation
+                            for evaluation in self.evaluations
+                            if evaluation.semester == data["semester"]
+                        ]
+                    )
+                    self.archived[data["semester"]] = ArchivedSemester.from_document(
+                        data
+                    )
+                    self.change_log.append("archive", data)
+                    continue
+                if change["table"] == "restore":
+                    self.archived.pop(data["semester"], None)
+                    self.change_log.append("restore", data)
+                    continue
+                if change["table"] == "scores":
+                    key = tuple(
+                        data[name]
+                        for name in config.COLLECTION_KEYS[
+                            config.EVALUATIONS_COLLECTION
+                        ]
+                    )
+                    shard = self.shards.get(data[self.shard_key])
+                    evaluation = shard.get(key) if shard is not None else None
+                    # Scores already applied, e.g. taken with the snapshot, are skipped
+                    if (
+                        evaluation is not None
+                        and len(evaluation.scores) == data["start"]
+                    ):
+                        evaluation.scores.extend(data["scores"])
+                    self.change_log.append("scores", data)
+                    continue
+                new_evaluation = Evaluation(
+                    **{**data, "evaluations": list(data["evaluations"])}
+                )
+                shard = self._get_shard(new_evaluation)
+                evaluation = shard.get(tuple(new_evaluation.query.values()))
+                if evaluation is None:
+                    self._index_evaluation(new_evaluation)
+                    evaluation = new_evaluation
+                else:
+                    evaluation.add_evaluations(new_evaluation.evaluations)
+                self._record_evaluation_change(
+                    evaluation, len(new_evaluation.evaluations)
+                )
+
+    def _backup_entries(
+        self,
+        entries: typing.Dict[typing.Tuple[str, ...], typing.Union[Evaluation, Result]],
+        table: str,
+    ):
+        """
+        Backs up the entries to the database in batches of bulk upserts.
+        Entries are removed from the dict once they are saved.
+        """
+        while entries:
+            batch = list(itertools.islice(entries.items(), config.BACKUP_BATCH_SIZE))
+            self.database_interface.bulk_upsert(
+                [decode_comments(entry.dict) for _, entry in batch], table=table
+            )
+            for key, _ in batch:
+                del entries[key]
+
+    def _backup_shard(
+        self,
+        shard: EvaluationShard,
+        entries: typing.Dict[typing.Tuple[str, ...], Evaluation],
+    ) -> None:
+        """
+        Backs up the pending evaluations of a shard.
+        If the backup fails, the evaluations not saved yet are kept for the next backup.
+        """
+        try:
+            self._backup_entries(entries, table="evaluations")
+        except Exception:
+            with self.lock:
+                # Evaluations changed during the backup are newer, keep them
+                shard.dirty = {**entries, **shard.dirty}
+            raise
+        shard.last_backup = time.monotonic()
+
+    @metrics.OPERATION_LATENCY.labels("backup_to_database").time()
+    def backup_to_database(self, force: bool = True):
+        """
+        Saves the evaluations and results changed since the last backup to the database.
+        Shards are backed up in parallel. If the backup fails, the entries not
+        saved yet are kept for the next backup.
+
+        Args:
+            force (bool): Whether to back up all shards, otherwise only the
+                shards whose backup interval elapsed.
+        """
+        now = time.monotonic()
+        with self.lock:
+            shards = []
+            for shard in self.shards.values():
+                if shard.dirty and (force or shard.backup_due(now)):
+                    shards.append((shard, shard.dirty))
+                    shard.dirty = {}
+            results, self.dirty_results = self.dirty_results, {}
 
-    def backup_to_database(self):
-        """Saves the evaluations to the database."""
-        self._backup_evaluation()
-        self._backup_result()
+        errors = []
+        with ThreadPoolExecutor(max_workers=config.SHARD_BACKUP_WORKERS) as executor:
+            futures = [
+                executor.submit(self._backup_shard, shard, entries)
+                for shard, entries in shards
+            ]
+            try:
+                self._backup_entries(results, table="results")
+            except Exception as exc:  # pylint: disable=broad-except
+                with self.lock:
+                    self.dirty_results = {**results, **self.dirty_results}
+                errors.append(exc)
+            errors += [future.exception() for future in futures if future.exception()]
+        if errors:
+            raise errors[0]
+        metrics.LAST_BACKUP.set_to_current_time()
         logger.info("Evaluation system backed up to database.")
@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
 from evaluation_infrastructure.database_access.abstract_database_interface import (
-    AbstractDatabaseInterface,
+    DBInterface,
 )
 
 
@@ -25,5 +25,5 @@ class AbstractDataclass(ABC):
         """Creates a dict for the database"""
 
     @abstractmethod
-    def save_to_database(self, database: AbstractDatabaseInterface):
+    def save_to_database(self, database: DBInterface):
         """Saves the dataclass to the database"""
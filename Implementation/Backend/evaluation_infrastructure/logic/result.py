@@ -1,17 +1,26 @@
-from dataclasses import dataclass
-from datetime import datetime, date
+import bisect
+import itertools
+from dataclasses import dataclass, field
+from datetime import date
 import typing
 
-import pydantic
 from evaluation_infrastructure.logic.my_abstract_dataclass import (
     AbstractDataclass,
 )
 from evaluation_infrastructure.database_access.abstract_database_interface import (
-    AbstractDatabaseInterface,
+    DBInterface,
 )
+from evaluation_infrastructure.logic.semester import (
+    Semester,
+    normalize_semester,
+    parse_semester,
+)
+
+if typing.TYPE_CHECKING:
+    from evaluation_infrastructure.models.dashboard import ResultOutputDashboard
 
 
-def semester_to_end_date(semester_label: str) -> datetime:
+def semester_to_end_date(semester_label: str) -> date:
     """
     Converts a semester label to the end date of the semester
 
@@ -19,32 +28,55 @@ def semester_to_end_date(semester_label: str) -> datetime:
         semester_label (str): Semester label to be converted
 
     Returns:
-        datetime: End date of the semester
+        date: End date of the semester
+
+    Raises:
+        InvalidSemesterError: If the label is not a valid semester.
     """
-    if semester_label.startswith("WS"):
-        parts = semester_label.split("/")
-        year_end = int(parts[1]) + 2000
-        return datetime(year_end, 1, 31).date()
-    elif semester_label.startswith("SS"):
-        year_end = int(semester_label[2:]) + 2000
-        return datetime(year_end, 6, 30).date()
-    # have to add an regex to check if the semester label is valid
-    # that must be done at input validation
-    else:
-        return None
-
-
-class ResultOutputDashboard(pydantic.BaseModel):
+    return parse_semester(semester_label).end_date
+
+
+def moving_average(
+    values: typing.Sequence[float], window: int, positions: slice
+) -> typing.List[float]:
     """
-    Result type for a course for all semesters
-    To be used for the dashboard
+    Computes the trailing moving average over the given positions with prefix sums.
+    Semesters before the first position are included in the window, so the
+    average does not depend on the displayed range.
+
+    Args:
+        values (Sequence[float]): Values of the whole timeline.
+        window (int): Number of semesters averaged.
+        positions (slice): Positions for which the average is computed.
+
+    Returns:
+        List[float]: Average of the window ending at every position.
     """
+    prefix = [0.0, *itertools.accumulate(values)]
+    averages = []
+    for position in range(*positions.indices(len(values))):
+        first = max(0, position + 1 - window)
+        averages.append((prefix[position + 1] - prefix[first]) / (position + 1 - first))
+    return averages
 
-    faculty: str
-    course: str
-    lecturer: str
-    semesters: typing.List[date]
-    topics: typing.Dict[str, typing.List[float]]
+
+def differences(
+    values: typing.Sequence[float], positions: slice
+) -> typing.List[typing.Optional[float]]:
+    """
+    Computes the change to the previous semester over the given positions.
+
+    Args:
+        values (Sequence[float]): Values of the whole timeline.
+        positions (slice): Positions for which the change is computed.
+
+    Returns:
+        List[Optional[float]]: Change per position, None for the first semester.
+    """
+    return [
+        values[position] - values[position - 1] if position > 0 else None
+        for position in range(*positions.indices(len(values)))
+    ]
 
 
 @dataclass
@@ -54,39 +86,136 @@ class ResultType:
     semester: str
     topics_distribution: typing.Dict[str, float]
 
+    def __post_init__(self):
+        """Validates the semester and normalizes it to its canonical label."""
+        self.semester = normalize_semester(self.semester)
+
 
 @dataclass
 class Result(AbstractDataclass):
-    """result for a course"""
+    """
+    result for a course
+    The results are kept sorted by semester, with the parsed semesters alongside,
+    so semester ranges are found by binary search without parsing labels.
+    """
 
     faculty: str
     course: str
     lecturer: str
     results: typing.List[ResultType]
+    semesters: typing.List[Semester] = field(
+        init=False, repr=False, compare=False, default_factory=list
+    )
+
+    def __post_init__(self):
+        """Sorts the results by semester."""
+        self.results = sorted(
+            self.results, key=lambda result: parse_semester(result.semester)
+        )
+        self.semesters = [parse_semester(result.semester) for result in self.results]
 
-    def return_results(self) -> ResultOutputDashboard:
+    def add_result_type(self, result_type: ResultType) -> None:
         """
-        Returns the results for a course for all semesters
+        Adds the result of a semester, replacing an existing result of the same semester.
+
+        Args:
+            result_type (ResultType): Result of a semester.
+        """
+        semester = parse_semester(result_type.semester)
+        position = bisect.bisect_left(self.semesters, semester)
+        if position < len(self.semesters) and self.semesters[position] == semester:
+            self.results[position] = result_type
+        else:
+            self.semesters.insert(position, semester)
+            self.results.insert(position, result_type)
+
+    def semester_range(
+        self, start: typing.Optional[str] = None, end: typing.Optional[str] = None
+    ) -> slice:
+        """
+        Returns the positions of the results between two semesters.
+
+        Args:
+            start (Optional[str]): First semester to be included, None for the first one.
+            end (Optional[str]): Last semester to be included, None for the last one.
+
+        Returns:
+            slice: Positions of the results in the range.
+
+        Raises:
+            InvalidSemesterError: If a label is not a valid semester.
+        """
+        low = bisect.bisect_left(self.semesters, parse_semester(start)) if start else 0
+        high = (
+            bisect.bisect_right(self.semesters, parse_semester(end))
+            if end
+            else len(self.semesters)
+        )
+        return slice(low, max(low, high))
+
+    def return_results(
+        self,
+        start: typing.Optional[str] = None,
+        end: typing.Optional[str] = None,
+        window: typing.Optional[int] = None,
+        deltas: bool = False,
+    ) -> "ResultOutputDashboard":
+        """
+        Returns the results for a course for all semesters, or the semesters in a range
+
+        Args:
+            start (Optional[str]): First semester to be included.
+            end (Optional[str]): Last semester to be included.
+            window (Optional[int]): Number of semesters of the moving averages,
+                None for no moving averages.
+            deltas (bool): Whether to include the change to the previous semester.
 
         Returns:
             ResultOutputDashboard: Result type for a course for all semesters
         """
-        topic_list = set()
-        for result in self.results:
-            for topic in result.topics_distribution.keys():
-                topic_list.add(topic)
-        semesters = []
-        topic_dict: dict[str, list[int]] = {topic: [] for topic in topic_list}
-        for result in self.results:
-            semesters.append(semester_to_end_date(result.semester))
-            for topic in topic_list:
-                topic_dict[topic].append(result.topics_distribution.get(topic, 0))
+        # pydantic is only loaded once a dashboard is built, not on import
+        from evaluation_infrastructure.models.dashboard import (  # pylint: disable=import-outside-toplevel
+            ResultOutputDashboard,
+        )
+
+        positions = self.semester_range(start, end)
+        results = self.results[positions]
+        topic_list = sorted(
+            {topic for result in results for topic in result.topics_distribution}
+        )
+        semesters = [semester.end_date for semester in self.semesters[positions]]
+        topic_dict: dict[str, list[int]] = {
+            topic: [result.topics_distribution.get(topic, 0) for result in results]
+            for topic in topic_list
+        }
+        timelines = {
+            topic: [result.topics_distribution.get(topic, 0) for result in self.results]
+            for topic in topic_list
+            if window or deltas
+        }
         return ResultOutputDashboard(
             faculty=self.faculty,
             course=self.course,
             lecturer=self.lecturer,
             semesters=semesters,
+            semester_labels=[result.semester for result in results],
             topics=topic_dict,
+            moving_averages=(
+                {
+                    topic: moving_average(timeline, window, positions)
+                    for topic, timeline in timelines.items()
+                }
+                if window
+                else None
+            ),
+            deltas=(
+                {
+                    topic: differences(timeline, positions)
+                    for topic, timeline in timelines.items()
+                }
+                if deltas
+                else None
+            ),
         )
 
     @property
@@ -108,14 +237,22 @@ class Result(AbstractDataclass):
             "results": [result.__dict__ for result in self.results],
         }
 
-    def save_to_database(self, database: AbstractDatabaseInterface) -> None:
+    def save_to_database(self, database: DBInterface) -> None:
         """
         Saves the result to the database.
 
         Args:
-            database (AbstractDatabaseInterface): Database to save the result to.
+            database (DBInterface): Database to save the result to.
         """
-        if database.query(self.query, table="results"):
-            database.update(data=self.dict, table="results", query=self.query)
-        else:
-            database.insert(data=self.dict, table="results")
+        database.update(data=self.dict, table="results", query=self.query, upsert=True)
+
+
+def __getattr__(name: str) -> typing.Any:
+    """Imports ResultOutputDashboard on first access, it moved to models.dashboard."""
+    if name == "ResultOutputDashboard":
+        from evaluation_infrastructure.models.dashboard import (  # pylint: disable=import-outside-toplevel
+            ResultOutputDashboard,
+        )
+
+        return ResultOutputDashboard
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,102 @@
+"""Prefix index for the typeahead search over courses, lecturers, faculties and cohorts."""
+import bisect
+import heapq
+import typing
+from collections import defaultdict
+from dataclasses import dataclass
+
+SearchKind = typing.Literal["course", "lecturer", "faculty", "cohort"]
+
+
+@dataclass
+class SearchMatch:
+    """Name matching a search prefix."""
+
+    kind: str
+    name: str
+    count: int
+
+
+class PrefixIndex:
+    """
+    Sorted array of lowercase search keys for prefix search.
+    Every name is indexed at the start of each of its words, so "prog"
+    matches "Introduction to Programming". A prefix maps to a contiguous
+    slice of the array, which is found with two binary searches.
+
+    Attributes:
+        keys (List[Tuple[str, str, str]]): Sorted (search key, kind, name) entries.
+        counts (Dict[Tuple[str, str], int]): Number of evaluations per (kind, name).
+        faculties (Dict[Tuple[str, str], Set[str]]): Faculties per (kind, name).
+    """
+
+    def __init__(self):
+        """Initializes an empty index."""
+        self.keys: typing.List[typing.Tuple[str, str, str]] = []
+        self.counts: typing.Dict[typing.Tuple[str, str], int] = defaultdict(int)
+        self.faculties: typing.Dict[
+            typing.Tuple[str, str], typing.Set[str]
+        ] = defaultdict(set)
+
+    @staticmethod
+    def _search_keys(name: str) -> typing.List[str]:
+        """Returns the lowercase name starting at each of its words."""
+        words = name.lower().split()
+        return [" ".join(words[position:]) for position in range(len(words))]
+
+    def add(self, kind: str, name: str, faculty: str) -> None:
+        """
+        Counts an evaluation referencing the name, adding the name if it is new.
+
+        Args:
+            kind (str): Kind of the name (course, lecturer, faculty or cohort).
+            name (str): Name to be indexed.
+            faculty (str): Faculty of the evaluation referencing the name.
+        """
+        if (kind, name) not in self.counts:
+            for search_key in self._search_keys(name):
+                bisect.insort(self.keys, (search_key, kind, name))
+        self.counts[(kind, name)] += 1
+        self.faculties[(kind, name)].add(faculty)
+
+    def search(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kind: typing.Optional[str] = None,
+        faculty: typing.Optional[str] = None,
+    ) -> typing.List[SearchMatch]:
+        """
+        Returns the names with a word starting with the prefix,
+        ordered by the number of evaluations referencing them.
+
+        Args:
+            prefix (str): Prefix to be searched, case insensitive.
+            limit (int): Maximum number of matches.
+            kind (Optional[str]): Only return names of this kind.
+            faculty (Optional[str]): Only return names referenced in this faculty.
+
+        Returns:
+            List[SearchMatch]: Best matches, most referenced first.
+        """
+        prefix = " ".join(prefix.lower().split())
+        start = bisect.bisect_left(self.keys, (prefix,))
+        end = bisect.bisect_left(self.keys, (prefix + "\uffff",))
+
+        candidates = {
+            (entry_kind, name)
+            for _, entry_kind, name in self.keys[start:end]
+            if (kind is None or entry_kind == kind)
+            and (faculty is None or faculty in self.faculties[(entry_kind, name)])
+        }
+        best = heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda candidate: (-self.counts[candidate], candidate[1]),
+        )
+        return [
+            SearchMatch(
+                kind=entry_kind, name=name, count=self.counts[(entry_kind, name)]
+            )
+            for entry_kind, name in best
+        ]
@@ -0,0 +1,93 @@
+"""Parsing and normalization of semester labels."""
+import functools
+import re
+import typing
+from datetime import date
+
+from evaluation_infrastructure.errors import InvalidSemesterError
+
+# Winter semesters span two years (WS22/23), summer semesters one (SS23).
+# Accepts lower case, spaces, four digit years and the German WiSe/SoSe.
+SEMESTER_PATTERN = re.compile(
+    r"^(?P<term>WS|WISE|SS|SOSE)\s*(?P<year>\d{2}|\d{4})(?:\s*/\s*(?P<next>\d{2}|\d{4}))?$",
+    re.IGNORECASE,
+)
+SUMMER, WINTER = 0, 1
+
+
+class Semester(typing.NamedTuple):
+    """
+    Parsed semester, ordered chronologically.
+    A summer semester comes before the winter semester starting in the same year.
+    """
+
+    year: int
+    term: int
+
+    @property
+    def label(self) -> str:
+        """Canonical label, e.g. WS22/23 or SS23."""
+        if self.term == WINTER:
+            return f"WS{self.year % 100:02d}/{(self.year + 1) % 100:02d}"
+        return f"SS{self.year % 100:02d}"
+
+    @property
+    def end_date(self) -> date:
+        """Last day of the semester."""
+        if self.term == WINTER:
+            return date(self.year + 1, 1, 31)
+        return date(self.year, 6, 30)
+
+
+def _full_year(year: str) -> int:
+    """Converts a two or four digit year to a four digit year."""
+    return int(year) if len(year) == 4 else 2000 + int(year)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_semester(label: str) -> Semester:
+    """
+    Parses a semester label.
+
+    Args:
+        label (str): Label such as "WS22/23", "ws 2022/2023", "SS23" or "SoSe 2023".
+
+    Returns:
+        Semester: The parsed semester.
+
+    Raises:
+        InvalidSemesterError: If the label is not a valid semester.
+    """
+    match = SEMESTER_PATTERN.match(label.strip())
+    if match is None:
+        raise InvalidSemesterError(
+            f"Invalid semester {label!r}, expected e.g. WS22/23 or SS23."
+        )
+    year = _full_year(match["year"])
+    if match["term"].upper() in ("WS", "WISE"):
+        if match["next"] is None or _full_year(match["next"]) != year + 1:
+            raise InvalidSemesterError(
+                f"Invalid winter semester {label!r}, expected e.g. WS22/23."
+            )
+        return Semester(year, WINTER)
+    if match["next"] is not None:
+        raise InvalidSemesterError(
+            f"Invalid summer semester {label!r}, expected e.g. SS23."
+        )
+    return Semester(year, SUMMER)
+
+
+def normalize_semester(label: str) -> str:
+    """
+    Returns the canonical label of a semester.
+
+    Args:
+        label (str): Semester label in any accepted spelling.
+
+    Returns:
+        str: Canonical label, e.g. WS22/23 or SS23.
+
+    Raises:
+        InvalidSemesterError: If the label is not a valid semester.
+    """
+    return parse_semester(label).label
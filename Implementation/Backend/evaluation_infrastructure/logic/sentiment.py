@@ -0,0 +1,163 @@
+"""
+Lexicon based sentiment scoring of comments.
+
+Every comment is scored between -1 (negative) and 1 (positive), 0 is neutral.
+Scoring is pure Python and CPU bound, so large amounts of comments are split
+into batches and scored in worker processes.
+"""
+import math
+import os
+import re
+import time
+import typing
+from array import array
+from dataclasses import dataclass
+
+from evaluation_infrastructure.config import config
+
+POSITIVE_WORDS = frozenset(
+    (
+        "good great excellent helpful interesting clear structured practical easy "
+        "useful engaging motivating fair friendly enjoyable understandable "
+        "organized organised best nice love liked recommend perfect "
+        "informative inspiring fun relevant supportive patient gut super toll "
+        "hilfreich interessant verständlich klar spannend"
+    ).split()
+)
+NEGATIVE_WORDS = frozenset(
+    (
+        "bad boring difficult unclear confusing chaotic useless hard unfair "
+        "unorganized disorganized slow rushed overwhelming outdated "
+        "irrelevant worst poor terrible awful hate disliked stressful monotonous "
+        "late missing schlecht langweilig schwierig unklar chaotisch"
+    ).split()
+)
+# Flip the polarity of the next opinion word within NEGATION_SCOPE words
+NEGATIONS = frozenset(
+    "not no never hardly without isn't wasn't don't nicht kein keine".split()
+)
+NEGATION_SCOPE = 3
+INTENSIFIERS = {
+    "very": 1.5,
+    "really": 1.5,
+    "extremely": 2.0,
+    "too": 1.3,
+    "quite": 1.2,
+    "sehr": 1.5,
+    "slightly": 0.5,
+    "somewhat": 0.7,
+}
+WORD_PATTERN = re.compile(r"[a-zäöüß']+")
+# Squashes the summed polarity into (-1, 1), like the normalization of VADER
+NORMALIZATION_ALPHA = 4.0
+
+
+def score_comment(comment: str) -> float:
+    """
+    Scores the sentiment of a comment.
+
+    Args:
+        comment (str): Comment to be scored.
+
+    Returns:
+        float: Score between -1 (negative) and 1 (positive), 0 if the comment
+            contains no opinion words.
+    """
+    total = 0.0
+    weight = 1.0
+    negation = 0
+    for word in WORD_PATTERN.findall(comment.lower()):
+        if word in NEGATIONS:
+            negation = NEGATION_SCOPE
+            continue
+        if word in INTENSIFIERS:
+            weight *= INTENSIFIERS[word]
+            continue
+        polarity = (word in POSITIVE_WORDS) - (word in NEGATIVE_WORDS)
+        if polarity:
+            total += -polarity * weight if negation else polarity * weight
+            negation = 0
+        else:
+            negation = max(0, negation - 1)
+        weight = 1.0
+    return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+
+def score_batch(comments: typing.Sequence[str]) -> array:
+    """
+    Scores a batch of comments.
+
+    Args:
+        comments (Sequence[str]): Comments to be scored.
+
+    Returns:
+        array: Scores as 32 bit floats, in the order of the comments.
+    """
+    return array("f", map(score_comment, comments))
+
+
+@dataclass
+class ScoringRun:
+    """Size and duration of a scoring run."""
+
+    comments: int
+    seconds: float
+    workers: int
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """Converts the dataclass to a dictionary, including the throughput."""
+        per_second = self.comments / self.seconds if self.seconds else 0.0
+        return {
+            "comments": self.comments,
+            "seconds": self.seconds,
+            "workers": self.workers,
+            "comments_per_second": per_second,
+            "comments_per_second_per_core": per_second / self.workers,
+        }
+
+
+def score_comments(
+    comments: typing.Sequence[str],
+    workers: typing.Optional[int] = None,
+    batch_size: typing.Optional[int] = None,
+) -> typing.Tuple[array, ScoringRun]:
+    """
+    Scores comments in batches, in worker processes if more than one batch
+    and worker are given.
+
+    Args:
+        comments (Sequence[str]): Comments to be scored.
+        workers (Optional[int]): Number of worker processes, defaults to
+            config.SENTIMENT_WORKERS, 0 uses all cores.
+        batch_size (Optional[int]): Comments per batch, defaults to
+            config.SENTIMENT_BATCH_SIZE.
+
+    Returns:
+        Tuple[array, ScoringRun]: Scores in the order of the comments,
+            and the size and duration of the run.
+    """
+    workers = config.SENTIMENT_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or config.SENTIMENT_BATCH_SIZE
+    batches = [
+        comments[start : start + batch_size]
+        for start in range(0, len(comments), batch_size)
+    ]
+    workers = max(1, min(workers, len(batches)))
+
+    started = time.perf_counter()
+    scores = array("f")
+    if workers == 1:
+        for batch in batches:
+            scores.extend(score_batch(batch))
+    else:
+        # Imported on the first parallel run only, spawned workers import this module
+        from concurrent.futures import (  # pylint: disable=import-outside-toplevel
+            ProcessPoolExecutor,
+        )
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch_scores in executor.map(score_batch, batches):
+                scores.extend(batch_scores)
+    return scores, ScoringRun(len(comments), time.perf_counter() - started, workers)
@@ -0,0 +1,58 @@
+"""Prometheus metrics for the evaluation infrastructure."""
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "evaluation_http_request_duration_seconds",
+    "Latency of HTTP requests per route.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "evaluation_http_requests_total",
+    "Number of HTTP requests per route and status code.",
+    ["method", "route", "status"],
+)
+OPERATION_LATENCY = Histogram(
+    "evaluation_system_operation_duration_seconds",
+    "Duration of EvaluationSystem operations.",
+    ["operation"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+DATABASE_LATENCY = Histogram(
+    "evaluation_database_operation_duration_seconds",
+    "Duration of database calls per operation and table.",
+    ["operation", "table"],
+)
+COMMENTS_INGESTED = Counter(
+    "evaluation_comments_ingested_total",
+    "Number of comments added through add_or_update_evaluation.",
+)
+EVALUATIONS = Gauge(
+    "evaluation_system_evaluations",
+    "Number of evaluations held in memory.",
+)
+RESULTS = Gauge(
+    "evaluation_system_results",
+    "Number of results held in memory.",
+)
+LAST_BACKUP = Gauge(
+    "evaluation_system_last_backup_timestamp_seconds",
+    "Unix time of the last successful backup to the database.",
+)
+PENDING_CHANGES = Gauge(
+    "evaluation_system_pending_changes",
+    "Number of evaluations and results changed since the last backup.",
+)
+DATABASE_RETRIES = Counter(
+    "evaluation_database_retries_total",
+    "Number of database calls retried after a transient error.",
+    ["operation"],
+)
+COMMENTS_SCORED = Counter(
+    "evaluation_comments_scored_total",
+    "Number of comments given a sentiment score.",
+)
+REJECTED_REQUESTS = Counter(
+    "evaluation_http_rejected_requests_total",
+    "Number of requests rejected with 429 by the rate limits and the ingest admission.",
+    ["reason"],
+)
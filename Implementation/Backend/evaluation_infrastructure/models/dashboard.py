@@ -0,0 +1,23 @@
+"""Response model of the dashboard."""
+import typing
+from datetime import date
+
+import pydantic
+
+
+class ResultOutputDashboard(pydantic.BaseModel):
+    """
+    Result type for a course for all semesters
+    To be used for the dashboard
+    """
+
+    faculty: str
+    course: str
+    lecturer: str
+    semesters: typing.List[date]
+    semester_labels: typing.List[str] = []
+    topics: typing.Dict[str, typing.List[float]]
+    moving_averages: typing.Optional[typing.Dict[str, typing.List[float]]] = None
+    deltas: typing.Optional[
+        typing.Dict[str, typing.List[typing.Optional[float]]]
+    ] = None
@@ -2,6 +2,25 @@
 import typing
 
 import pydantic
+from typing_extensions import Annotated, TypedDict
+
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.logic.semester import normalize_semester
+
+# Semester label, normalized to its canonical spelling (e.g. "ws 2022/2023" -> "WS22/23")
+Semester = Annotated[str, pydantic.AfterValidator(normalize_semester)]
+Name = Annotated[
+    str,
+    pydantic.StringConstraints(
+        strip_whitespace=True, min_length=1, max_length=config.MAX_NAME_LENGTH
+    ),
+]
+Comment = Annotated[
+    str, pydantic.StringConstraints(min_length=1, max_length=config.MAX_COMMENT_LENGTH)
+]
+Comments = Annotated[
+    typing.List[Comment], pydantic.Field(max_length=config.MAX_COMMENTS_PER_EVALUATION)
+]
 
 
 class BaseEvaluation(pydantic.BaseModel):
@@ -9,12 +28,12 @@ class BaseEvaluation(pydantic.BaseModel):
     Base model for an evaluation.
     """
 
-    semester: str = pydantic.Field(examples=["WS22/23"])
-    cohort: str = pydantic.Field(examples=["BSc"])
-    faculty: str = pydantic.Field(examples=["Informatics"])
-    course: str = pydantic.Field(examples=["Programming"])
-    lecturer: str = pydantic.Field(examples=["Deepak Dhungana"])
-    evaluations: typing.Union[str, typing.List[str]]
+    semester: Semester = pydantic.Field(examples=["WS22/23"])
+    cohort: Name = pydantic.Field(examples=["BSc"])
+    faculty: Name = pydantic.Field(examples=["Informatics"])
+    course: Name = pydantic.Field(examples=["Programming"])
+    lecturer: Name = pydantic.Field(examples=["Deepak Dhungana"])
+    evaluations: typing.Union[Comment, Comments]
 
 
 class SingleEvaluation(BaseEvaluation):
@@ -22,7 +41,9 @@ class SingleEvaluation(BaseEvaluation):
     Base model for an evaluation with a single evaluation.
     """
 
-    evaluations: str = pydantic.Field(examples=["Some evaluation how the course went."])
+    evaluations: Comment = pydantic.Field(
+        examples=["Some evaluation how the course went."]
+    )
 
 
 class MultipleEvaluations(BaseEvaluation):
@@ -30,7 +51,7 @@ class MultipleEvaluations(BaseEvaluation):
     Base model for an evaluation with multiple evaluations.
     """
 
-    evaluations: typing.List[str] = pydantic.Field(
+    evaluations: Comments = pydantic.Field(
         examples=[
             [
                 "Some evaluation how the course went.",
@@ -39,3 +60,25 @@ class MultipleEvaluations(BaseEvaluation):
             ]
         ]
     )
+
+
+class EvaluationRecord(TypedDict):
+    """
+    Evaluation of the batch ingest endpoint, validated straight from JSON into
+    the keyword arguments of logic.evaluation.Evaluation.
+    """
+
+    semester: Semester
+    cohort: Name
+    faculty: Name
+    course: Name
+    lecturer: Name
+    evaluations: Comments
+
+
+EvaluationBatch = Annotated[
+    typing.List[EvaluationRecord],
+    pydantic.Field(min_length=1, max_length=config.MAX_BATCH_EVALUATIONS),
+]
+# Building the validator is expensive, so it is built once on import
+EVALUATION_BATCH_ADAPTER: pydantic.TypeAdapter = pydantic.TypeAdapter(EvaluationBatch)
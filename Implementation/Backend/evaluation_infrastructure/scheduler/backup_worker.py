@@ -0,0 +1,187 @@
+"""Background worker backing up the evaluation system to the database."""
+import threading
+import time
+import typing
+
+from evaluation_infrastructure.logger import logger
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+class BackupWorker:
+    """
+    Backs up the evaluation system in a dedicated thread.
+    A backup runs on whichever comes first: the interval elapsed, the number of
+    pending changes reached the limit, or a backup was requested explicitly.
+    Backups triggered by the interval respect the backup cadence of the shards,
+    all other backups include every shard.
+    Triggers arriving while a backup runs are coalesced into a single follow-up backup,
+    so backups never pile up. Optionally, new comments are scored before every
+    backup, so their sentiment scores are saved with it.
+    """
+
+    def __init__(
+        self,
+        evaluation_system: EvaluationSystem,
+        interval_seconds: float,
+        max_pending_changes: int,
+        score_sentiment: bool = False,
+    ):
+        """
+        Initializes the worker.
+
+        Args:
+            evaluation_system (EvaluationSystem): Evaluation system to be backed up.
+            interval_seconds (float): Maximum time between two backups.
+            max_pending_changes (int): Number of pending changes triggering a backup.
+            score_sentiment (bool): Whether to score new comments before every backup.
+        """
+        self.evaluation_system = evaluation_system
+        self.interval_seconds = interval_seconds
+        self.max_pending_changes = max_pending_changes
+        self.score_sentiment = score_sentiment
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+        self._condition = threading.Condition()
+        self._requested_generation = 0
+        self._completed_generation = 0
+
+        self.started_at: typing.Optional[float] = None
+        self.last_success: typing.Optional[float] = None
+        self.last_duration_seconds: typing.Optional[float] = None
+        self.last_error: typing.Optional[str] = None
+        self.backup_count = 0
+        self.failure_count = 0
+
+        evaluation_system.change_listeners.append(self.notify_change)
+
+    def start(self) -> None:
+        """Starts the worker thread."""
+        self.started_at = time.time()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="backup-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: typing.Optional[float] = None) -> None:
+        """
+        Stops the worker thread.
+
+        Args:
+            flush (bool): Whether to run a final backup before stopping.
+            timeout (Optional[float]): Maximum time to wait for the thread in seconds.
+        """
+        if flush:
+            with self._condition:
+                self._requested_generation += 1
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        elif flush:
+            self._backup(force=True)
+
+    def notify_change(self) -> None:
+        """Triggers a backup if the number of pending changes reached the limit."""
+        if self.evaluation_system.pending_changes >= self.max_pending_changes:
+            self._wakeup.set()
+
+    def request_backup(
+        self, wait: bool = False, timeout: typing.Optional[float] = None
+    ) -> bool:
+        """
+        Requests a backup.
+
+        Args:
+            wait (bool): Whether to wait until a backup started after this request finished.
+            timeout (Optional[float]): Maximum time to wait in seconds.
+
+        Returns:
+            bool: False if waiting timed out, otherwise True.
+        """
+        with self._condition:
+            self._requested_generation += 1
+            generation = self._requested_generation
+        self._wakeup.set()
+        if not wait:
+            return True
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._completed_generation >= generation, timeout
+            )
+
+    def status(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the status of the worker.
+        The lag is the time since the last successful backup while changes are pending.
+
+        Returns:
+            dict: Status of the worker.
+        """
+        pending_changes = self.evaluation_system.pending_changes
+        reference = self.last_success or self.started_at
+        lag = time.time() - reference if pending_changes and reference else 0.0
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "pending_changes": pending_changes,
+            "last_success": self.last_success,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_error": self.last_error,
+            "lag_seconds": lag,
+            "backup_count": self.backup_count,
+            "failure_count": self.failure_count,
+        }
+
+    def _backup(self, force: bool) -> None:
+        """
+        Runs a single backup, recording its outcome.
+
+        Args:
+            force (bool): Whether to back up all shards, regardless of their cadence.
+        """
+        with self._condition:
+            generation = self._requested_generation
+        started = time.perf_counter()
+        if self.score_sentiment:
+            try:
+                self.evaluation_system.score_sentiment()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Scoring the sentiment of new comments failed.")
+        try:
+            self.evaluation_system.backup_to_database(force=force)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.failure_count += 1
+            self.last_error = repr(exc)
+            logger.exception("Backup to database failed.")
+        else:
+            self.backup_count += 1
+            self.last_success = time.time()
+            self.last_error = None
+        finally:
+            self.last_duration_seconds = time.perf_counter() - started
+            with self._condition:
+                self._completed_generation = max(self._completed_generation, generation)
+                self._condition.notify_all()
+
+    def _run(self) -> None:
+        """Waits for the next trigger and backs up, until the worker is stopped."""
+        next_backup = time.monotonic() + self.interval_seconds
+        while True:
+            self._wakeup.wait(max(0.0, next_backup - time.monotonic()))
+            self._wakeup.clear()
+            with self._condition:
+                requested = self._requested_generation > self._completed_generation
+            if self._stopping.is_set():
+                if requested:
+                    self._backup(force=True)
+                return
+            force = (
+                requested
+                or self.evaluation_system.pending_changes >= self.max_pending_changes
+            )
+            if force or time.monotonic() >= next_backup:
+                self._backup(force=force)
+                next_backup = time.monotonic() + self.interval_seconds
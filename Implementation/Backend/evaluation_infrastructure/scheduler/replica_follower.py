@@ -0,0 +1,179 @@
+"""Background worker keeping a read replica in sync with the writer."""
+import json
+import threading
+import time
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from evaluation_infrastructure.logger import logger
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+class ReplicaFollower:
+    """
+    Bootstraps the evaluation system of a read replica from a snapshot of the
+    writer, then polls the changes of the writer and applies them.
+    If the writer restarted or dropped changes the replica has not applied yet
+    (HTTP 410), the replica bootstraps again.
+    The staleness is the time since the replica last caught up with the writer.
+    """
+
+    def __init__(
+        self,
+        evaluation_system: EvaluationSystem,
+        leader_url: str,
+        poll_seconds: float,
+        batch_size: int,
+        timeout_seconds: float,
+        fetch: typing.Optional[typing.Callable[[str], typing.Any]] = None,
+    ):
+        """
+        Initializes the follower.
+
+        Args:
+            evaluation_system (EvaluationSystem): Evaluation system of the replica.
+            leader_url (str): Base URL of the writer, e.g. http://writer:8000.
+            poll_seconds (float): Time between two polls once caught up.
+            batch_size (int): Maximum number of changes per poll.
+            timeout_seconds (float): Timeout of the requests to the writer.
+            fetch (Optional[Callable[[str], Any]]): Fetches and decodes the JSON
+                of a path of the writer, defaults to an HTTP GET.
+        """
+        self.evaluation_system = evaluation_system
+        self.leader_url = leader_url.rstrip("/")
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.timeout_seconds = timeout_seconds
+        self.fetch = fetch or self._fetch
+
+        self._stopping = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+        self.leader_epoch: typing.Optional[str] = None
+        self.sequence = 0
+        self.leader_sequence = 0
+        self.last_synced: typing.Optional[float] = None
+        self.last_error: typing.Optional[str] = None
+        self.bootstrap_count = 0
+
+    def _fetch(self, path: str) -> typing.Any:
+        """
+        Fetches and decodes the JSON of a path of the writer.
+
+        Args:
+            path (str): Path including the query string.
+
+        Raises:
+            urllib.error.HTTPError: If the writer answers with an error status.
+        """
+        with urllib.request.urlopen(
+            self.leader_url + path, timeout=self.timeout_seconds
+        ) as response:
+            return json.load(response)
+
+    def start(self) -> None:
+        """Starts the follower thread."""
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="replica-follower", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """
+        Stops the follower thread.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait for the thread in seconds.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def bootstrap(self) -> None:
+        """Replaces the evaluation system with a snapshot of the writer."""
+        snapshot = self.fetch("/replication/snapshot")
+        self.evaluation_system.load_snapshot(snapshot)
+        self.leader_epoch = snapshot["epoch"]
+        self.sequence = self.leader_sequence = snapshot["sequence"]
+        self.last_synced = time.monotonic()
+        self.bootstrap_count += 1
+        logger.info(
+            f"Replica bootstrapped from {self.leader_url} at sequence {self.sequence}."
+        )
+
+    def poll(self) -> bool:
+        """
+        Applies the next changes of the writer, bootstrapping first if needed.
+
+        Returns:
+            bool: True if the replica caught up with the writer.
+        """
+        if self.leader_epoch is None:
+            self.bootstrap()
+            return True
+        query = urllib.parse.urlencode(
+            {
+                "since": self.sequence,
+                "epoch": self.leader_epoch,
+                "limit": self.batch_size,
+            }
+        )
+        try:
+            response = self.fetch(f"/replication/changes?{query}")
+        except urllib.error.HTTPError as exc:
+            if exc.code != 410:
+                raise
+            logger.warning(f"Replica fell behind the writer, bootstrapping: {exc}")
+            self.bootstrap()
+            return True
+        self.evaluation_system.apply_changes(response["changes"])
+        if response["changes"]:
+            self.sequence = response["changes"][-1]["sequence"]
+        self.leader_sequence = response["sequence"]
+        caught_up = self.sequence >= self.leader_sequence
+        if caught_up:
+            self.last_synced = time.monotonic()
+        return caught_up
+
+    @property
+    def staleness_seconds(self) -> typing.Optional[float]:
+        """Time since the replica last caught up, None before the bootstrap."""
+        if self.last_synced is None:
+            return None
+        return time.monotonic() - self.last_synced
+
+    def status(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the replication status of the replica.
+
+        Returns:
+            dict: Position and staleness of the replica.
+        """
+        return {
+            "leader": self.leader_url,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "leader_epoch": self.leader_epoch,
+            "sequence": self.sequence,
+            "lag_changes": self.leader_sequence - self.sequence,
+            "staleness_seconds": self.staleness_seconds,
+            "last_error": self.last_error,
+            "bootstrap_count": self.bootstrap_count,
+        }
+
+    def _run(self) -> None:
+        """Polls the writer until the follower is stopped."""
+        while not self._stopping.is_set():
+            try:
+                caught_up = self.poll()
+                self.last_error = None
+            except Exception as exc:  # pylint: disable=broad-except
+                caught_up = True
+                self.last_error = repr(exc)
+                logger.exception("Polling the writer failed.")
+            if caught_up:
+                # Catch up without waiting, poll regularly afterwards
+                self._stopping.wait(self.poll_seconds)
@@ -0,0 +1,325 @@
+"""
+Request traces with the timings of their phases, for profiling slow requests.
+
+Code marks a phase with `with tracing.span("lookup"):`. Spans are recorded
+on the trace of the current request, if the request is traced at all, and
+cost a context variable lookup otherwise.
+"""
+import contextvars
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+import typing
+from collections import deque
+from dataclasses import dataclass, field
+
+CURRENT_TRACE: contextvars.ContextVar[
+    typing.Optional["Trace"]
+] = contextvars.ContextVar("current_trace", default=None)
+
+
+@dataclass
+class Trace:
+    """Timings of a single request and its phases."""
+
+    trace_id: int
+    method: str
+    path: str
+    started: float = field(default_factory=time.time)
+    route: str = "unmatched"
+    status: int = 500
+    duration_seconds: float = 0.0
+    # Name, start relative to the request and duration of every span in seconds
+    spans: typing.List[typing.Tuple[str, float, float]] = field(default_factory=list)
+    profile: typing.Optional[str] = None
+    # time.perf_counter at the start of the request, spans are relative to it
+    counter_start: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def untraced_seconds(self) -> float:
+        """Time outside the outermost spans, e.g. in middlewares and validation."""
+        covered = 0.0
+        covered_until = 0.0
+        for _name, start, duration in sorted(self.spans, key=lambda span: span[1]):
+            if start >= covered_until:
+                covered += duration
+                covered_until = start + duration
+            elif start + duration > covered_until:
+                covered += start + duration - covered_until
+                covered_until = start + duration
+        return max(0.0, self.duration_seconds - covered)
+
+    @property
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        """Converts the dataclass to a dictionary, durations in milliseconds"""
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": round(self.duration_seconds * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round(start * 1000, 3),
+                    "duration_ms": round(duration * 1000, 3),
+                }
+                for name, start, duration in self.spans
+            ],
+            "untraced_ms": round(self.untraced_seconds * 1000, 3),
+            "profiled": self.profile is not None,
+        }
+
+
+class span:  # pylint: disable=invalid-name
+    """
+    Context manager recording a phase on the trace of the current request.
+    Does nothing if the current request is not traced.
+    """
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str) -> None:
+        """
+        Initializes the span.
+
+        Args:
+            name (str): Name of the phase, e.g. "lookup" or "serialization".
+        """
+        self.name = name
+        self.trace: typing.Optional[Trace] = None
+        self.started = 0.0
+
+    def __enter__(self) -> "span":
+        self.trace = CURRENT_TRACE.get()
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.trace is not None:
+            now = time.perf_counter()
+            self.trace.spans.append(
+                (
+                    self.name,
+                    self.started - self.trace.counter_start,
+                    now - self.started,
+                )
+            )
+
+
+class Tracer:
+    """
+    Traces requests while enabled and keeps the most recent ones.
+    A sample of the requests is run under cProfile, their profile is kept
+    if they turn out to be slow. Requests are profiled one at a time, the
+    profile covers the thread of the event loop, so it may include other
+    requests handled concurrently but not work offloaded to other threads.
+    All settings can be changed at runtime.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        slow_request_seconds: float = 0.5,
+        profile_sample_rate: float = 0.0,
+        max_traces: int = 200,
+        max_slow_traces: int = 50,
+        profile_lines: int = 40,
+    ) -> None:
+        """
+        Initializes the tracer.
+
+        Args:
+            enabled (bool): Whether requests are traced.
+            slow_request_seconds (float): Duration from which a request is slow.
+            profile_sample_rate (float): Share of the traced requests run under cProfile.
+            max_traces (int): Number of recent traces kept.
+            max_slow_traces (int): Number of recent slow traces kept.
+            profile_lines (int): Number of functions kept per profile.
+        """
+        self.enabled = enabled
+        self.slow_request_seconds = slow_request_seconds
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_lines = profile_lines
+        self.traces: typing.Deque[Trace] = deque(maxlen=max_traces)
+        self.slow_traces: typing.Deque[Trace] = deque(maxlen=max_slow_traces)
+        self._ids = itertools.count(1)
+        self._profiler_lock = threading.Lock()
+
+    @property
+    def settings(self) -> typing.Dict[str, typing.Any]:
+        """Current settings of the tracer."""
+        return {
+            "enabled": self.enabled,
+            "slow_request_ms": self.slow_request_seconds * 1000,
+            "profile_sample_rate": self.profile_sample_rate,
+            "max_traces": self.traces.maxlen,
+            "max_slow_traces": self.slow_traces.maxlen,
+        }
+
+    def configure(
+        self,
+        enabled: typing.Optional[bool] = None,
+        slow_request_seconds: typing.Optional[float] = None,
+        profile_sample_rate: typing.Optional[float] = None,
+    ) -> None:
+        """
+        Changes the settings given, keeps the others.
+
+        Args:
+            enabled (Optional[bool]): Whether requests are traced.
+            slow_request_seconds (Optional[float]): Duration from which a request is slow.
+            profile_sample_rate (Optional[float]): Share of the requests run under cProfile.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if slow_request_seconds is not None:
+            self.slow_request_seconds = slow_request_seconds
+        if profile_sample_rate is not None:
+            self.profile_sample_rate = profile_sample_rate
+
+    def clear(self) -> None:
+        """Drops all kept traces."""
+        self.traces.clear()
+        self.slow_traces.clear()
+
+    def start(self, method: str, path: str) -> Trace:
+        """
+        Starts the trace of a request.
+
+        Args:
+            method (str): HTTP method of the request.
+            path (str): Path of the request.
+
+        Returns:
+            Trace: Trace of the request, to be passed to finish.
+        """
+        return Trace(trace_id=next(self._ids), method=method, path=path)
+
+    def start_profile(self) -> typing.Optional[cProfile.Profile]:
+        """
+        Starts profiling a sampled request, if no other request is profiled.
+
+        Returns:
+            Optional[cProfile.Profile]: Running profiler, None if the request
+                is not profiled.
+        """
+        if (
+            self.profile_sample_rate <= 0
+            or random.random() >= self.profile_sample_rate
+            or not self._profiler_lock.acquire(blocking=False)
+        ):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler is active, e.g. a debugger
+            self._profiler_lock.release()
+            return None
+        return profiler
+
+    def finish(
+        self,
+        trace: Trace,
+        route: str,
+        status: int,
+        profiler: typing.Optional[cProfile.Profile] = None,
+    ) -> None:
+        """
+        Finishes the trace of a request and keeps it.
+
+        Args:
+            trace (Trace): Trace returned by start.
+            route (str): Route template of the request.
+            status (int): Status code of the response.
+            profiler (Optional[cProfile.Profile]): Profiler returned by start_profile.
+        """
+        if profiler is not None:
+            profiler.disable()
+            self._profiler_lock.release()
+        trace.duration_seconds = time.perf_counter() - trace.counter_start
+        trace.route = route
+        trace.status = status
+        slow = trace.duration_seconds >= self.slow_request_seconds
+        if profiler is not None and slow:
+            trace.profile = self._format_profile(profiler)
+        self.traces.append(trace)
+        if slow:
+            self.slow_traces.append(trace)
+
+    def _format_profile(self, profiler: cProfile.Profile) -> str:
+        """Returns the functions with the most cumulative time of a profile."""
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.profile_lines)
+        return output.getvalue()
+
+    def get_traces(
+        self, slow: bool = False, limit: typing.Optional[int] = None
+    ) -> typing.List[Trace]:
+        """
+        Returns the kept traces, most recent first.
+
+        Args:
+            slow (bool): Whether to return only slow traces.
+            limit (Optional[int]): Maximum number of traces.
+        """
+        traces = list(reversed(self.slow_traces if slow else self.traces))
+        return traces[:limit]
+
+    def get_trace(self, trace_id: int) -> typing.Optional[Trace]:
+        """
+        Returns a kept trace.
+
+        Args:
+            trace_id (int): Identifier of the trace.
+
+        Returns:
+            Optional[Trace]: The trace, None if it is no longer kept.
+        """
+        for trace in itertools.chain(self.slow_traces, self.traces):
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """
+        Returns the mean duration of the requests and their phases per route,
+        over the kept traces.
+
+        Returns:
+            Dict[str, dict]: Requests, mean duration and mean duration per span
+                in milliseconds, by "METHOD route".
+        """
+        totals: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        for trace in self.traces:
+            total = totals.setdefault(
+                f"{trace.method} {trace.route}",
+                {"requests": 0, "duration": 0.0, "untraced": 0.0, "spans": {}},
+            )
+            total["requests"] += 1
+            total["duration"] += trace.duration_seconds
+            total["untraced"] += trace.untraced_seconds
+            for name, _start, duration in trace.spans:
+                total["spans"][name] = total["spans"].get(name, 0.0) + duration
+        return {
+            route: {
+                "requests": total["requests"],
+                "mean_ms": round(total["duration"] / total["requests"] * 1000, 3),
+                "mean_untraced_ms": round(
+                    total["untraced"] / total["requests"] * 1000, 3
+                ),
+                "mean_span_ms": {
+                    name: round(duration / total["requests"] * 1000, 3)
+                    for name, duration in total["spans"].items()
+                },
+            }
+            for route, total in totals.items()
+        }
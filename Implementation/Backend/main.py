@@ -1,9 +1,15 @@
 """File to start the backend server for development purposes."""
+from evaluation_infrastructure.logic.archive import open_archive_store
+from evaluation_infrastructure.logic.comment_store import open_comment_store
 from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
-from evaluation_infrastructure.database_access.mongo_interface import MongoInterface
+from evaluation_infrastructure.database_access.factory import create_database_interface
 from evaluation_infrastructure.api.rest_api import RestService
-from evaluation_infrastructure.config.config_database import ConfigDatabase
+from evaluation_infrastructure.config import config
 
-mongo_interface = MongoInterface(ConfigDatabase.host)
-evaluation_system = EvaluationSystem(mongo_interface)
-RestService(evaluation_system).run()
+database_interface = create_database_interface()
+evaluation_system = EvaluationSystem(
+    database_interface,
+    open_comment_store(config.COMMENT_STORE_PATH),
+    open_archive_store(config.ARCHIVE_DIRECTORY, config.ARCHIVE_COMPRESSION_PRESET),
+)
+RestService(evaluation_system, leader_url=config.REPLICATION_LEADER_URL).run()
@@ -0,0 +1,60 @@
+"""Fixtures shared by the unit tests."""
+import typing
+
+import pytest
+
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.result import Result, ResultType
+
+
+@pytest.fixture
+def make_evaluation() -> typing.Callable[..., Evaluation]:
+    """
+    Fixture for a factory of evaluations. Fields not given default to
+    Dr. John Doe's Data Science course in SS21, cohort 1.
+    """
+
+    def factory(
+        semester: str = "SS21",
+        course: str = "Data Science",
+        comments: typing.Sequence[str] = ("good",),
+        lecturer: str = "Dr. John Doe",
+        cohort: str = "1",
+        faculty: str = "Computer Science",
+    ) -> Evaluation:
+        return Evaluation(
+            semester=semester,
+            cohort=cohort,
+            faculty=faculty,
+            course=course,
+            lecturer=lecturer,
+            evaluations=list(comments),
+        )
+
+    return factory
+
+
+@pytest.fixture
+def make_result() -> typing.Callable[..., Result]:
+    """
+    Fixture for a factory of results with a single semester and topic.
+    Fields not given default to Dr. John Doe's Data Science course in SS21.
+    """
+
+    def factory(
+        course: str = "Data Science",
+        share: float = 1.0,
+        semester: str = "SS21",
+        lecturer: str = "Dr. John Doe",
+        faculty: str = "Computer Science",
+    ) -> Result:
+        return Result(
+            faculty=faculty,
+            course=course,
+            lecturer=lecturer,
+            results=[
+                ResultType(semester=semester, topics_distribution={"Topic 1": share})
+            ],
+        )
+
+    return factory
@@ -1,28 +1,584 @@
 """Integration tests for the REST API."""
-from pytest import fixture
-from evaluation_infrastructure.api.rest_api import RestService
+import threading
+import time
+from unittest.mock import MagicMock
+
+from pytest import fixture, importorskip
 from fastapi.testclient import TestClient
 
-test_client = TestClient(RestService().app)
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+from evaluation_infrastructure.logic.result import Result, ResultType
+
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good", "bad"],
+}
 
 
 @fixture(scope="function")
 def rest_service_empty():
     """Fixture for a RestService with an empty evaluation system."""
-    yield RestService()
+    yield RestService(EvaluationSystem(InMemoryInterface()))
 
 
 @fixture(scope="function")
 def rest_service_with_evaluation_system():
-    pass
+    """Fixture for a RestService with a populated evaluation system."""
+    evaluation_system = EvaluationSystem(InMemoryInterface())
+    evaluation_system.add_or_update_evaluation(
+        Evaluation(
+            semester="WS20/21",
+            cohort="1",
+            faculty="Computer Science",
+            course="Introduction to Programming",
+            lecturer="Dr. John Doe",
+            evaluations=["bad", "good"],
+        )
+    )
+    evaluation_system.add_or_update_evaluation(
+        Evaluation(
+            semester="WS20/21",
+            cohort="2",
+            faculty="Computer Science",
+            course="Algorithms and Data Structures",
+            lecturer="Dipl. Ing. Jane Jane",
+            evaluations=["good"],
+        )
+    )
+    evaluation_system._add_result(  # pylint: disable=protected-access
+        Result(
+            faculty="Computer Science",
+            course="Introduction to Programming",
+            lecturer="Dr. John Doe",
+            results=[
+                ResultType(semester="WS20/21", topics_distribution={"Topic 1": 1.0})
+            ],
+        )
+    )
+    yield RestService(evaluation_system)
+
+
+@fixture(scope="function")
+def test_client(rest_service_with_evaluation_system: RestService):
+    """Fixture for a test client of the populated RestService."""
+    yield TestClient(rest_service_with_evaluation_system.app)
 
 
 class TestGetList:
-    def test_get_list_of_courses():
+    def test_get_list_of_courses(self, test_client: TestClient):
         """Test the get list of courses endpoint."""
-        response = test_client.get("/courses/")
+        response = test_client.get("/courses/list")
         assert response.status_code == 200
         assert response.json() == [
             "Introduction to Programming",
             "Algorithms and Data Structures",
         ]
+
+
+class TestConditionalRequests:
+    """Test the ETag handling of the read endpoints."""
+
+    def test_etag_is_returned(self, test_client: TestClient):
+        """Test that the read endpoints return ETag and Cache-Control headers."""
+        for url in [
+            "/courses/list",
+            "/cohorts/list",
+            "/faculties/list",
+            "/results/course/Introduction to Programming",
+        ]:
+            response = test_client.get(url)
+            assert response.status_code == 200
+            assert response.headers["ETag"]
+            assert response.headers["Cache-Control"] == "no-cache"
+
+    def test_not_modified(self, test_client: TestClient):
+        """Test that a matching If-None-Match header is answered with 304."""
+        etag = test_client.get("/courses/list").headers["ETag"]
+        response = test_client.get("/courses/list", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_etag_changes_with_data(
+        self,
+        rest_service_with_evaluation_system: RestService,
+        test_client: TestClient,
+    ):
+        """Test that adding a course invalidates the ETag of the course list."""
+        etag = test_client.get("/courses/list").headers["ETag"]
+        rest_service_with_evaluation_system.evaluation_system.add_or_update_evaluation(
+            Evaluation(
+                semester="SS21",
+                cohort="1",
+                faculty="Computer Science",
+                course="Data Science",
+                lecturer="Dr. John Doe",
+                evaluations=["good"],
+            )
+        )
+        response = test_client.get("/courses/list", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "Data Science" in response.json()
+
+    def test_results_etag_per_course(
+        self,
+        rest_service_with_evaluation_system: RestService,
+        test_client: TestClient,
+    ):
+        """Test that results of other courses keep their ETag."""
+        url = "/results/course/Introduction to Programming"
+        etag = test_client.get(url).headers["ETag"]
+        rest_service_with_evaluation_system.evaluation_system._add_result(  # pylint: disable=protected-access
+            Result(
+                faculty="Computer Science",
+                course="Algorithms and Data Structures",
+                lecturer="Dipl. Ing. Jane Jane",
+                results=[],
+            )
+        )
+        response = test_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+
+class TestWireFormat:
+    """Test response compression and content negotiation."""
+
+    @fixture
+    def large_course_client(self, rest_service_with_evaluation_system: RestService):
+        """Test client where one course has a large body of comments."""
+        rest_service_with_evaluation_system.evaluation_system.add_or_update_evaluation(
+            Evaluation(
+                semester="WS20/21",
+                cohort="1",
+                faculty="Computer Science",
+                course="Introduction to Programming",
+                lecturer="Dr. John Doe",
+                evaluations=["The course was well structured."] * 200,
+            )
+        )
+        yield TestClient(rest_service_with_evaluation_system.app)
+
+    def test_gzip_compression(self, large_course_client: TestClient):
+        """Test that large responses are compressed."""
+        response = large_course_client.get(
+            "/evaluations/course/Introduction to Programming",
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert int(response.headers["Content-Length"]) < len(response.content)
+        assert len(response.json()[0]["evaluations"]) == 202
+
+    def test_compressed_etag(
+        self, rest_service_with_evaluation_system: RestService, monkeypatch
+    ):
+        """Test that compressed responses have their own ETag, matched on revalidation."""
+        monkeypatch.setattr(config, "COMPRESSION_MINIMUM_SIZE", 0)
+        client = TestClient(
+            RestService(rest_service_with_evaluation_system.evaluation_system).app
+        )
+        etag = client.get("/courses/list", headers={"Accept-Encoding": ""}).headers[
+            "ETag"
+        ]
+        response = client.get("/courses/list", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"] == f'{etag[:-1]}-gzip"'
+
+        response = client.get(
+            "/courses/list",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == f'{etag[:-1]}-gzip"'
+        response = client.get(
+            "/courses/list",
+            headers={"Accept-Encoding": "", "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    def test_small_responses_are_not_compressed(self, test_client: TestClient):
+        """Test that responses below the threshold are sent as is."""
+        response = test_client.get("/courses/list", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_msgpack_response(self, test_client: TestClient):
+        """Test that MessagePack is returned when requested."""
+        msgpack = importorskip("msgpack")
+        response = test_client.get(
+            "/courses/list", headers={"Accept": "application/msgpack"}
+        )
+        assert response.headers["Content-Type"] == "application/msgpack"
+        assert (
+            msgpack.unpackb(response.content) == test_client.get("/courses/list").json()
+        )
+        assert (
+            response.headers["ETag"] != test_client.get("/courses/list").headers["ETag"]
+        )
+
+    def test_wire_stats(self, large_course_client: TestClient):
+        """Test that bytes on the wire are recorded per endpoint."""
+        large_course_client.get(
+            "/evaluations/course/Introduction to Programming",
+            headers={"Accept-Encoding": "gzip"},
+        )
+        stats = large_course_client.get("/stats/wire").json()
+        course_stats = stats["GET /evaluations/course/{course}"]
+        assert course_stats["requests"] == 1
+        assert course_stats["compressed_responses"] == 1
+        assert course_stats["wire_bytes"] < course_stats["body_bytes"]
+
+
+class TestMetrics:
+    """Test the Prometheus metrics endpoint."""
+
+    def test_metrics(self, test_client: TestClient):
+        """Test that request latency and system sizes are exported."""
+        test_client.get("/results/course/Introduction to Programming")
+        test_client.post(
+            "/evaluation/multiple",
+            json={
+                "semester": "SS21",
+                "cohort": "1",
+                "faculty": "Computer Science",
+                "course": "Data Science",
+                "lecturer": "Dr. John Doe",
+                "evaluations": ["good", "bad"],
+            },
+        )
+        response = test_client.get("/metrics")
+        assert response.status_code == 200
+        body = response.text
+        assert (
+            'evaluation_http_request_duration_seconds_count{method="GET",'
+            'route="/results/course/{course}"}' in body
+        )
+        assert "evaluation_comments_ingested_total" in body
+        assert "evaluation_system_evaluations 3.0" in body
+        assert (
+            'evaluation_system_operation_duration_seconds_count{operation="return_results"}'
+            in body
+        )
+
+
+class TestSearch:
+    """Test the typeahead search endpoint."""
+
+    def test_search(self, test_client: TestClient):
+        """Test that matches are returned with their counts."""
+        response = test_client.get("/search", params={"q": "intro", "kind": "course"})
+        assert response.status_code == 200
+        assert response.json() == [
+            {"kind": "course", "name": "Introduction to Programming", "count": 1}
+        ]
+
+    def test_search_invalid_kind(self, test_client: TestClient):
+        """Test that unknown kinds are rejected."""
+        response = test_client.get("/search", params={"q": "intro", "kind": "room"})
+        assert response.status_code == 422
+
+
+class TestLifespan:
+    """Test background loading, probes and the final backup on shutdown."""
+
+    @fixture
+    def slow_database(self):
+        """Fixture for a database whose evaluations are released on demand."""
+        release = threading.Event()
+        database = MagicMock()
+
+        def fetch(table: str):
+            release.wait(timeout=5)
+            return []
+
+        database.fetch.side_effect = fetch
+        yield database, release
+        release.set()
+
+    def test_ready_after_background_load(self, slow_database):
+        """Test that the server is reachable but not ready while loading."""
+        database, release = slow_database
+        rest_service = RestService(EvaluationSystem(database))
+        with TestClient(rest_service.app) as client:
+            assert client.get("/healthz").status_code == 200
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            assert response.json()["state"] == "loading"
+            assert (
+                client.post("/evaluation/multiple", json=EVALUATION).status_code == 503
+            )
+
+            release.set()
+            deadline = time.monotonic() + 2
+            while client.get("/readyz").status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert (
+                client.post("/evaluation/multiple", json=EVALUATION).status_code == 201
+            )
+
+    def test_final_backup_on_shutdown(self, slow_database):
+        """Test that pending changes are saved when the server shuts down."""
+        database, release = slow_database
+        release.set()
+        rest_service = RestService(EvaluationSystem(database))
+        with TestClient(rest_service.app) as client:
+            while client.get("/readyz").status_code != 200:
+                time.sleep(0.01)
+            client.post("/evaluation/multiple", json=EVALUATION)
+            database.bulk_upsert.assert_not_called()
+        database.bulk_upsert.assert_called_once()
+        assert rest_service.evaluation_system.pending_changes == 0
+
+
+class TestSlowReads:
+    """Test reads merging the evaluations of the shards."""
+
+    def test_reads_do_not_block_the_event_loop(
+        self, rest_service_with_evaluation_system: RestService
+    ):
+        """Test that other requests are served while the shards are merged."""
+        rest_service = rest_service_with_evaluation_system
+        evaluation_system = rest_service.evaluation_system
+        merge_shards = (
+            evaluation_system._merge_shards
+        )  # pylint: disable=protected-access
+        release = threading.Event()
+
+        def slow_merge_shards(index: str, name: str):
+            release.wait(timeout=5)
+            return merge_shards(index, name)
+
+        evaluation_system._merge_shards = (
+            slow_merge_shards  # pylint: disable=protected-access
+        )
+        status_codes = {}
+        with TestClient(rest_service.app) as client:
+            while client.get("/readyz").status_code != 200:
+                time.sleep(0.01)
+
+            def get(path: str) -> None:
+                status_codes[path] = client.get(path).status_code
+
+            readers = [
+                threading.Thread(target=get, args=(path,))
+                for path in (
+                    "/evaluations/course/Introduction to Programming",
+                    "/evaluations/cohort/1",
+                )
+            ]
+            for reader in readers:
+                reader.start()
+            time.sleep(0.1)
+            probe = threading.Thread(target=get, args=("/healthz",))
+            probe.start()
+            probe.join(timeout=2)
+            assert status_codes == {"/healthz": 200}
+            release.set()
+            for reader in readers:
+                reader.join()
+        assert set(status_codes.values()) == {200}
+
+
+class TestShards:
+    """Test the shard endpoints."""
+
+    def test_frozen_shard(self, test_client: TestClient):
+        """Test that writes to a frozen shard are rejected with 409."""
+        assert [shard["name"] for shard in test_client.get("/shards").json()] == [
+            "WS20/21"
+        ]
+        response = test_client.post(
+            "/shards/freeze", params={"name": "WS20/21", "frozen": True}
+        )
+        assert response.status_code == 200
+        response = test_client.post(
+            "/evaluation/multiple", json={**EVALUATION, "semester": "WS20/21"}
+        )
+        assert response.status_code == 409
+        assert (
+            test_client.post("/evaluation/multiple", json=EVALUATION).status_code == 201
+        )
+
+    def test_freeze_missing_shard(self, test_client: TestClient):
+        """Test that freezing an unknown shard returns 404."""
+        response = test_client.post("/shards/freeze", params={"name": "SS99"})
+        assert response.status_code == 404
+
+
+class TestResultRange:
+    """Test range and trend parameters of the results endpoint."""
+
+    def test_range_and_trends(self, test_client: TestClient):
+        """Test that a range with trends returns only the requested semesters."""
+        url = "/results/course/Introduction to Programming"
+        response = test_client.get(
+            url,
+            params={
+                "start": "ws 2020/2021",
+                "end": "SS21",
+                "window": 2,
+                "deltas": True,
+            },
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["semester_labels"] == ["WS20/21"]
+        assert body["moving_averages"] == {"Topic 1": [1.0]}
+        assert body["deltas"] == {"Topic 1": [None]}
+        assert response.headers["ETag"] != test_client.get(url).headers["ETag"]
+
+    def test_invalid_range(self, test_client: TestClient):
+        """Test that invalid semesters and windows are rejected."""
+        url = "/results/course/Introduction to Programming"
+        assert test_client.get(url, params={"start": "Spring"}).status_code == 422
+        assert test_client.get(url, params={"window": 0}).status_code == 422
+
+
+class TestSemesterValidation:
+    """Test that semesters are validated and normalized at ingest."""
+
+    def test_invalid_semester(self, test_client: TestClient):
+        """Test that an invalid semester is rejected."""
+        response = test_client.post(
+            "/evaluation/multiple", json={**EVALUATION, "semester": "Summer"}
+        )
+        assert response.status_code == 422
+
+    def test_semester_normalized(self, test_client: TestClient):
+        """Test that the semester is stored with its canonical label."""
+        test_client.post(
+            "/evaluation/multiple", json={**EVALUATION, "semester": "SoSe 2021"}
+        )
+        evaluations = test_client.get("/evaluations/course/Data Science").json()
+        assert [evaluation["semester"] for evaluation in evaluations] == ["SS21"]
+
+
+class TestSentiment:
+    """Test scoring and aggregating the sentiment of comments."""
+
+    def test_score_and_aggregate(self, test_client: TestClient):
+        """Test that scored comments are aggregated per lecturer."""
+        run = test_client.post("/sentiment/score").json()
+        assert run["comments"] == 3
+        response = test_client.get("/sentiment", params={"group_by": "lecturer"})
+        assert response.status_code == 200
+        assert [group["lecturer"] for group in response.json()] == [
+            "Dipl. Ing. Jane Jane",
+            "Dr. John Doe",
+        ]
+        assert response.json()[0]["positive"] == 1.0
+        evaluations = test_client.get(
+            "/evaluations/course/Algorithms and Data Structures"
+        )
+        assert evaluations.json()[0]["scores"][0] > 0
+
+    def test_invalid_parameters(self, test_client: TestClient):
+        """Test that invalid groups and semesters are rejected."""
+        assert (
+            test_client.get("/sentiment", params={"group_by": "x"}).status_code == 422
+        )
+        assert (
+            test_client.get("/sentiment", params={"semester": "Summer"}).status_code
+            == 422
+        )
+
+
+class TestBatchIngest:
+    """Test the batch ingest endpoint."""
+
+    def test_batch(self, test_client: TestClient):
+        """Test that a batch adds new and updates existing evaluations."""
+        response = test_client.post(
+            "/evaluation/batch",
+            json=[
+                EVALUATION,
+                {**EVALUATION, "cohort": "2", "semester": "sose 2021"},
+                {**EVALUATION, "evaluations": ["okay"]},
+            ],
+        )
+        assert response.status_code == 201
+        assert response.json() == {"added": 2, "updated": 1}
+        evaluations = test_client.get("/evaluations/course/Data Science").json()
+        assert [evaluation["evaluations"] for evaluation in evaluations] == [
+            ["good", "bad", "okay"],
+            ["good", "bad"],
+        ]
+
+    def test_invalid_batch(self, test_client: TestClient):
+        """Test that an invalid batch is rejected as a whole."""
+        response = test_client.post(
+            "/evaluation/batch",
+            json=[EVALUATION, {**EVALUATION, "semester": "Summer", "course": ""}],
+        )
+        assert response.status_code == 422
+        assert [error["loc"] for error in response.json()["detail"]] == [
+            [1, "semester"],
+            [1, "course"],
+        ]
+        assert test_client.post("/evaluation/batch", json=[]).status_code == 422
+        assert test_client.post("/evaluation/batch", content=b"[").status_code == 422
+        assert test_client.get("/evaluations/course/Data Science").status_code == 404
+
+    def test_limits(self, test_client: TestClient):
+        """Test that too long comments and names are rejected."""
+        response = test_client.post(
+            "/evaluation/single",
+            json={**EVALUATION, "evaluations": "x" * (config.MAX_COMMENT_LENGTH + 1)},
+        )
+        assert response.status_code == 422
+        response = test_client.post(
+            "/evaluation/multiple",
+            json={**EVALUATION, "lecturer": "x" * (config.MAX_NAME_LENGTH + 1)},
+        )
+        assert response.status_code == 422
+
+
+class TestProfiling:
+    def test_profiling_is_disabled_by_default(self, test_client: TestClient):
+        """No traces are kept until profiling is enabled."""
+        test_client.get("/courses/list")
+        assert test_client.get("/admin/traces").json() == []
+        assert test_client.get("/admin/profiling").json()["enabled"] is False
+
+    def test_traces_record_the_phases(self, test_client: TestClient):
+        """Enabled at runtime, requests are traced with their phases."""
+        response = test_client.post(
+            "/admin/profiling",
+            params={"enabled": True, "slow_request_ms": 0, "profile_sample_rate": 1},
+        )
+        assert response.json()["enabled"] is True
+        test_client.get("/results/course/Introduction to Programming")
+
+        traces = test_client.get("/admin/traces", params={"slow": True}).json()
+        assert len(traces) == 1
+        assert traces[0]["route"] == "/results/course/{course}"
+        assert [span["name"] for span in traces[0]["spans"]] == [
+            "lookup",
+            "model_build",
+            "serialization",
+        ]
+        trace = test_client.get(f"/admin/traces/{traces[0]['trace_id']}").json()
+        assert "function calls" in trace["profile"]
+        routes = test_client.get("/admin/profiling").json()["routes"]
+        assert routes["GET /results/course/{course}"]["requests"] == 1
+
+        test_client.post("/admin/profiling", params={"enabled": False, "clear": True})
+        test_client.get("/courses/list")
+        assert test_client.get("/admin/traces").json() == []
+        assert test_client.get("/admin/traces/1").status_code == 404
@@ -0,0 +1,255 @@
+"""Unit tests for the archival of past semesters."""
+import pytest
+from fastapi.testclient import TestClient
+
+import evaluation_infrastructure.errors as custom_errors
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.archive import ArchiveStore, open_archive_store
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for an empty archive store."""
+    yield ArchiveStore(str(tmp_path / "archive"), preset=0)
+
+
+@pytest.fixture
+def evaluation_system(store: ArchiveStore, make_evaluation):
+    """Fixture for an evaluation system with two past semesters and a current one."""
+    system = EvaluationSystem(InMemoryInterface(), archive_store=store)
+    system.add_or_update_evaluations(
+        [
+            make_evaluation("SS21", "Data Science", ["great course", "too fast"]),
+            make_evaluation("WS21/22", "Data Science", ["boring"]),
+            make_evaluation("WS21/22", "Algorithms", ["hard but fair"]),
+            make_evaluation("SS22", "Data Science", ["good"]),
+        ]
+    )
+    system.score_sentiment()
+    system.backup_to_database()
+    yield system
+
+
+class TestArchive:
+    """Test archiving and restoring past semesters."""
+
+    def test_archive_semesters(
+        self, evaluation_system: EvaluationSystem, store: ArchiveStore, make_evaluation
+    ):
+        """Old semesters move to compressed files, only their stubs stay in memory."""
+        sentiment = evaluation_system.get_sentiment("semester")
+
+        archived = evaluation_system.archive_semesters("SS22")
+
+        assert [semester.semester for semester in archived] == ["SS21", "WS21/22"]
+        assert {
+            evaluation.semester for evaluation in evaluation_system.evaluations
+        } == {"SS22"}
+        assert [
+            document["semester"]
+            for document in evaluation_system.database_interface.fetch(
+                table="evaluations"
+            )
+        ] == ["SS22"]
+        # One deletion per semester, not per evaluation
+        assert evaluation_system.database_interface.calls["delete_many"] == 2
+        assert evaluation_system.database_interface.calls["delete"] == 0
+        assert [
+            document["evaluations"] for document in store.read(archived[0].file)
+        ] == [["great course", "too fast"]]
+        assert evaluation_system.get_archive()[1] == {
+            "semester": "WS21/22",
+            "file": "evaluations-WS21-22.jsonl.xz",
+            "archived_at": archived[1].archived_at,
+            "evaluations": 2,
+            "comments": 2,
+            "courses": ["Algorithms", "Data Science"],
+        }
+        # Aggregates include the archived evaluations through their stubs
+        assert evaluation_system.get_sentiment("semester") == pytest.approx(sentiment)
+        with pytest.raises(custom_errors.SemesterArchivedError):
+            evaluation_system.add_or_update_evaluation(
+                make_evaluation("SS21", "Data Science", ["late comment"])
+            )
+        assert evaluation_system.archive_semesters("SS22") == []
+
+    def test_archive_without_store(self):
+        """Archival needs an archive directory."""
+        assert open_archive_store(None) is None
+        with pytest.raises(custom_errors.ArchiveNotConfiguredError):
+            EvaluationSystem(InMemoryInterface()).archive_semesters("SS22")
+
+    def test_restart_keeps_archive(
+        self, evaluation_system: EvaluationSystem, store: ArchiveStore, make_evaluation
+    ):
+        """A restarted system loads the stubs and skips stale rows of archived semesters."""
+        evaluation_system.archive_semesters("WS21/22")
+        # e.g. saved by a backup racing the archival
+        evaluation_system.database_interface.insert(
+            make_evaluation("SS21", "Data Science", ["stale"]).dict, table="evaluations"
+        )
+
+        restarted = EvaluationSystem(
+            evaluation_system.database_interface, archive_store=store
+        )
+        restarted.create_from_database()
+
+        assert list(restarted.archived) == ["SS21"]
+        assert (
+            restarted.archived["SS21"].stubs == evaluation_system.archived["SS21"].stubs
+        )
+        assert {evaluation.semester for evaluation in restarted.evaluations} == {
+            "WS21/22",
+            "SS22",
+        }
+
+    def test_failed_deletion_keeps_semester(
+        self, evaluation_system: EvaluationSystem, store: ArchiveStore
+    ):
+        """The index lists the file before the deletion, which is undone if it fails."""
+        database = evaluation_system.database_interface
+
+        def crash(query, table):
+            assert store.load_index()["SS21"].file == "evaluations-SS21.jsonl.xz"
+            raise SystemExit("crash during the deletion")
+
+        database.delete_many = crash
+        with pytest.raises(SystemExit):
+            evaluation_system.archive_semester("SS21")
+        # The restarted system finds the semester archived, nothing is lost
+        restarted = EvaluationSystem(database, archive_store=store)
+        restarted.create_from_database()
+        assert list(restarted.archived) == ["SS21"]
+        assert "SS21" not in {
+            evaluation.semester for evaluation in restarted.evaluations
+        }
+
+        del database.delete_many
+        database.fail_next(operation="delete_many")
+        with pytest.raises(custom_errors.DatabaseConnectionError):
+            evaluation_system.archive_semester("WS21/22")
+        assert "WS21/22" not in store.load_index()
+        assert "WS21/22" in {
+            evaluation.semester for evaluation in evaluation_system.evaluations
+        }
+
+    def test_restore_semester(
+        self, evaluation_system: EvaluationSystem, store: ArchiveStore
+    ):
+        """Restored evaluations are back in memory and the database, the file is removed."""
+        archived = evaluation_system.archive_semester("SS21")
+
+        assert evaluation_system.restore_semester("SS21") == 1
+
+        assert evaluation_system.archived == {}
+        assert store.load_index() == {}
+        evaluation = evaluation_system.get_evaluation(
+            "SS21", "1", "Computer Science", "Data Science", "Dr. John Doe"
+        )
+        assert evaluation.evaluations == ["great course", "too fast"]
+        assert len(evaluation.scores) == 2
+        assert "SS21" in [
+            document["semester"]
+            for document in evaluation_system.database_interface.fetch(
+                table="evaluations"
+            )
+        ]
+        with pytest.raises(FileNotFoundError):
+            store.size_bytes(archived.file)
+        with pytest.raises(custom_errors.ArchiveNotFoundError):
+            evaluation_system.restore_semester("SS21")
+
+    def test_replica_applies_archival(self, evaluation_system: EvaluationSystem):
+        """Replicas drop the archived evaluations and keep the stubs."""
+        replica = EvaluationSystem(InMemoryInterface())
+        replica.load_snapshot(evaluation_system.snapshot())
+        sequence = evaluation_system.change_log.sequence
+
+        evaluation_system.archive_semester("SS21")
+        replica.apply_changes(evaluation_system.change_log.since(sequence))
+
+        assert "SS21" in replica.archived
+        assert "SS21" not in {evaluation.semester for evaluation in replica.evaluations}
+        assert replica.get_archive() == evaluation_system.get_archive()
+
+
+class TestArchiveEndpoints:
+    """Test the archive through the API."""
+
+    def test_archive_endpoints(
+        self, evaluation_system: EvaluationSystem, make_evaluation
+    ):
+        """Archive, list and restore through the API."""
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+
+        response = client.post("/archive", params={"before": "WS21/22"})
+        assert response.status_code == 200
+        assert [semester["semester"] for semester in response.json()] == ["SS21"]
+        assert [semester["semester"] for semester in client.get("/archive").json()] == [
+            "SS21"
+        ]
+        assert client.post("/archive", params={"before": "XX"}).status_code == 422
+        response = client.post(
+            "/evaluation/single",
+            json={
+                **make_evaluation("SS21", "Data Science", []).query,
+                "evaluations": "x",
+            },
+        )
+        assert response.status_code == 409
+
+        response = client.get(
+            "/evaluations/course/Data Science", params={"include_archived": True}
+        )
+        assert response.status_code == 200
+        assert [
+            (evaluation["semester"], evaluation["evaluations"])
+            for evaluation in response.json()
+        ] == [
+            ("WS21/22", ["boring"]),
+            ("SS22", ["good"]),
+            ("SS21", ["great course", "too fast"]),
+        ]
+        # Reading the archived evaluations leaves the semester archived
+        assert [semester["semester"] for semester in client.get("/archive").json()] == [
+            "SS21"
+        ]
+        response = client.post("/archive/restore", params={"semester": "SS21"})
+        assert response.status_code == 200
+        assert client.get("/archive").json() == []
+        response = client.post("/archive/restore", params={"semester": "SS21"})
+        assert response.status_code == 404
+
+    def test_archived_course_only_in_archive(self, evaluation_system: EvaluationSystem):
+        """A course left only in the archive is read from its file, replicas have none."""
+        evaluation_system.archive_semesters("SS22")
+
+        assert [
+            evaluation.evaluations
+            for evaluation in evaluation_system.get_archived_evaluations_by_course(
+                "Algorithms"
+            )
+        ] == [["hard but fair"]]
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+        response = client.get(
+            "/evaluations/course/Algorithms", params={"include_archived": True}
+        )
+        assert [evaluation["semester"] for evaluation in response.json()] == ["WS21/22"]
+        assert client.get("/evaluations/course/Algorithms").status_code == 404
+
+        replica = EvaluationSystem(InMemoryInterface())
+        replica.load_snapshot(evaluation_system.snapshot())
+        with pytest.raises(custom_errors.ArchiveNotConfiguredError):
+            replica.get_archived_evaluations_by_course("Algorithms")
+
+    def test_archive_endpoint_without_store(self):
+        """Archival without an archive directory is a conflict."""
+        client = TestClient(
+            RestService(EvaluationSystem(InMemoryInterface()), rate_limits=False).app
+        )
+        response = client.post("/archive", params={"before": "SS22"})
+        assert response.status_code == 409
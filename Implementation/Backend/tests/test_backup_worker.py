@@ -0,0 +1,121 @@
+"""Unit tests for the backup worker."""
+import time
+
+import pytest
+
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+from evaluation_infrastructure.scheduler.backup_worker import BackupWorker
+
+
+@pytest.fixture
+def evaluation_system():
+    """Fixture for an evaluation system with an in-memory database."""
+    yield EvaluationSystem(InMemoryInterface())
+
+
+@pytest.fixture
+def backup_worker(evaluation_system: EvaluationSystem):
+    """Fixture for a started backup worker with a long interval."""
+    worker = BackupWorker(
+        evaluation_system, interval_seconds=3600, max_pending_changes=3
+    )
+    worker.start()
+    yield worker
+    worker.stop(flush=False)
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Waits until the condition is true or the timeout elapsed."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestBackupWorker:
+    """Test the backup worker."""
+
+    def test_backup_on_request(
+        self,
+        evaluation_system: EvaluationSystem,
+        backup_worker: BackupWorker,
+        make_evaluation,
+    ):
+        """Test that a requested backup saves the pending changes."""
+        evaluation_system.add_or_update_evaluation(
+            make_evaluation(course="Programming")
+        )
+        assert evaluation_system.pending_changes == 1
+        assert backup_worker.request_backup(wait=True, timeout=2)
+        assert evaluation_system.pending_changes == 0
+        assert backup_worker.status()["backup_count"] == 1
+        assert backup_worker.status()["last_success"] is not None
+
+    def test_backup_on_pending_changes(
+        self,
+        evaluation_system: EvaluationSystem,
+        backup_worker: BackupWorker,
+        make_evaluation,
+    ):
+        """Test that reaching the limit of pending changes triggers a backup."""
+        for course in ["Programming", "Databases"]:
+            evaluation_system.add_or_update_evaluation(make_evaluation(course=course))
+        time.sleep(0.05)
+        assert backup_worker.status()["backup_count"] == 0
+        evaluation_system.add_or_update_evaluation(make_evaluation(course="Networks"))
+        assert wait_for(lambda: backup_worker.status()["backup_count"] == 1)
+        assert evaluation_system.pending_changes == 0
+
+    def test_backup_on_interval(
+        self, evaluation_system: EvaluationSystem, make_evaluation
+    ):
+        """Test that a backup runs after the interval elapsed."""
+        worker = BackupWorker(
+            evaluation_system, interval_seconds=0.05, max_pending_changes=100
+        )
+        evaluation_system.add_or_update_evaluation(
+            make_evaluation(course="Programming")
+        )
+        worker.start()
+        assert wait_for(lambda: evaluation_system.pending_changes == 0)
+        worker.stop(flush=False)
+
+    def test_final_backup_on_stop(
+        self, evaluation_system: EvaluationSystem, make_evaluation
+    ):
+        """Test that stopping the worker backs up the pending changes."""
+        worker = BackupWorker(
+            evaluation_system, interval_seconds=3600, max_pending_changes=100
+        )
+        worker.start()
+        evaluation_system.add_or_update_evaluation(
+            make_evaluation(course="Programming")
+        )
+        worker.stop(flush=True, timeout=2)
+        assert evaluation_system.pending_changes == 0
+        assert not worker.status()["running"]
+
+    def test_failed_backup_keeps_changes(
+        self, evaluation_system: EvaluationSystem, make_evaluation
+    ):
+        """Test that a failed backup keeps the changes and reports the error."""
+        evaluation_system.database_interface.fail_next(operation="bulk_upsert")
+        worker = BackupWorker(
+            evaluation_system, interval_seconds=3600, max_pending_changes=100
+        )
+        worker.start()
+        evaluation_system.add_or_update_evaluation(
+            make_evaluation(course="Programming")
+        )
+        assert worker.request_backup(wait=True, timeout=2)
+        status = worker.status()
+        assert status["failure_count"] == 1
+        assert "DatabaseConnectionError" in status["last_error"]
+        assert status["pending_changes"] == 1
+        assert status["lag_seconds"] >= 0
+        worker.stop(flush=False)
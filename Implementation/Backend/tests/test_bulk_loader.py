@@ -0,0 +1,250 @@
+"""Unit tests for the bulk loader of historical exports."""
+import json
+
+import pytest
+
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic import bulk_loader
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+KEY = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+}
+CSV_HEADER = "semester,cohort,faculty,course,lecturer,evaluations\n"
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """Fixture for a directory with a JSON, a JSON lines and a CSV export."""
+    directory = tmp_path / "exports"
+    (directory / "2021").mkdir(parents=True)
+    (directory / "2021" / "a.json").write_text(
+        json.dumps([{**KEY, "evaluations": ["great", "too fast"]}]), encoding="utf-8"
+    )
+    (directory / "2021" / "b.jsonl").write_text(
+        json.dumps({**KEY, "semester": "SoSe 2021", "evaluations": ["clear"]})
+        + "\n"
+        + json.dumps({**KEY, "course": "", "evaluations": ["invalid"]})
+        + "\n",
+        encoding="utf-8",
+    )
+    (directory / "c.csv").write_text(
+        CSV_HEADER
+        + 'WS21/22,1,Computer Science,Data Science,Dr. John Doe,"boring, long"\n'
+        + "WS21/22,1,Computer Science,Data Science,Dr. John Doe,\n",
+        encoding="utf-8",
+    )
+    (directory / "notes.txt").write_text("not an export", encoding="utf-8")
+    yield directory
+
+
+class TestParsing:
+    """Test parsing the exports."""
+
+    def test_parse_export(self, exports):
+        """Records are validated, normalized and merged by key within a file."""
+        parsed = bulk_loader.parse_export(str(exports / "2021" / "b.jsonl"))
+        assert parsed.records == 1
+        assert parsed.invalid == 1
+        assert "record 2: course" in parsed.errors[0]
+        assert parsed.evaluations == {tuple(KEY.values()): ["clear"]}
+
+        broken = exports / "broken.json"
+        broken.write_text("{", encoding="utf-8")
+        parsed = bulk_loader.parse_export(str(broken))
+        assert parsed.records == 0 and parsed.invalid == 1
+        assert "unreadable" in parsed.errors[0]
+
+
+class TestLoading:
+    """Test loading the exports into the database."""
+
+    def test_load_appends_to_stored_evaluations(self, exports, tmp_path):
+        """Comments of all files are merged by key and appended to the stored ones."""
+        database_interface = InMemoryInterface()
+        database_interface.save(
+            [{**KEY, "evaluations": ["stored"], "scores": [0.5]}], table="evaluations"
+        )
+
+        report = bulk_loader.load_exports(
+            database_interface,
+            str(exports),
+            workers=2,
+            files_per_chunk=2,
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+        )
+
+        assert (report.files, report.records, report.invalid) == (3, 3, 2)
+        assert report.comments == 4
+        assert report.records_per_second > 0
+        documents = {
+            document["semester"]: document
+            for document in database_interface.fetch(table="evaluations")
+        }
+        assert documents["SS21"]["evaluations"] == [
+            "stored",
+            "great",
+            "too fast",
+            "clear",
+        ]
+        assert documents["SS21"]["scores"] == [0.5]
+        assert documents["WS21/22"]["evaluations"] == ["boring, long"]
+        # Appended without reading the stored evaluations
+        assert database_interface.calls["query"] == 0
+        # The backend loads the result, new comments are scored later
+        evaluation_system = EvaluationSystem(database_interface)
+        evaluation_system.create_from_database()
+        assert len(evaluation_system.evaluations) == 2
+
+        # Loaded files are skipped on the next run
+        report = bulk_loader.load_exports(
+            database_interface,
+            str(exports),
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+        )
+        assert report.skipped_files == 3 and report.records == 0
+
+    def test_resume_interrupted_chunk(self, exports, tmp_path):
+        """Batches written before an interruption are not appended twice."""
+        database_interface = InMemoryInterface()
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        calls = []
+
+        def failing_append(data, table, field, batch=None):
+            calls.append(data)
+            if len(calls) == 2:
+                raise ConnectionError("database went away")
+            InMemoryInterface.bulk_append(
+                database_interface, data, table, field, batch=batch
+            )
+
+        database_interface.bulk_append = failing_append
+        with pytest.raises(ConnectionError):
+            bulk_loader.load_exports(
+                database_interface,
+                str(exports),
+                batch_size=1,
+                checkpoint_path=checkpoint_path,
+            )
+        assert bulk_loader.Checkpoint(checkpoint_path).pending["written"] == 1
+
+        report = bulk_loader.load_exports(
+            database_interface,
+            str(exports),
+            batch_size=1,
+            checkpoint_path=checkpoint_path,
+        )
+
+        assert report.evaluations_written == 1
+        assert bulk_loader.Checkpoint(checkpoint_path).pending is None
+        assert sorted(
+            comment
+            for document in database_interface.fetch(table="evaluations")
+            for comment in document["evaluations"]
+        ) == ["boring, long", "clear", "great", "too fast"]
+
+    def test_resume_after_write_before_checkpoint(self, exports, tmp_path):
+        """A batch written just before the interruption is not appended again."""
+        database_interface = InMemoryInterface()
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        calls = []
+
+        def crashing_append(data, table, field, batch=None):
+            calls.append(batch)
+            InMemoryInterface.bulk_append(
+                database_interface, data, table, field, batch=batch
+            )
+            if len(calls) == 1:
+                raise SystemExit("killed before the checkpoint was saved")
+
+        database_interface.bulk_append = crashing_append
+        with pytest.raises(SystemExit):
+            bulk_loader.load_exports(
+                database_interface,
+                str(exports),
+                batch_size=1,
+                checkpoint_path=checkpoint_path,
+            )
+        assert bulk_loader.Checkpoint(checkpoint_path).pending["written"] == 0
+
+        bulk_loader.load_exports(
+            database_interface,
+            str(exports),
+            batch_size=1,
+            checkpoint_path=checkpoint_path,
+        )
+
+        # The first batch was repeated with the same id and skipped
+        assert calls[0] == calls[1]
+        assert sorted(
+            comment
+            for document in database_interface.fetch(table="evaluations")
+            for comment in document["evaluations"]
+        ) == ["boring, long", "clear", "great", "too fast"]
+        # The id of the batch is not loaded by the backend
+        evaluation_system = EvaluationSystem(database_interface)
+        evaluation_system.create_from_database()
+        assert len(evaluation_system.evaluations) == 2
+
+    def test_changed_files_discard_interrupted_chunk(self, exports, tmp_path):
+        """The written batches of a chunk whose files changed are not skipped."""
+        database_interface = InMemoryInterface()
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        def failing_append(data, table, field, batch=None):
+            if data[0]["semester"] == "WS21/22":
+                raise ConnectionError("database went away")
+            InMemoryInterface.bulk_append(
+                database_interface, data, table, field, batch=batch
+            )
+
+        database_interface.bulk_append = failing_append
+        with pytest.raises(ConnectionError):
+            bulk_loader.load_exports(
+                database_interface,
+                str(exports),
+                batch_size=1,
+                checkpoint_path=checkpoint_path,
+            )
+        assert bulk_loader.Checkpoint(checkpoint_path).pending["written"] == 1
+        # A new evaluation merged first, the recorded progress no longer applies
+        (exports / "2021" / "a.json").write_text(
+            json.dumps(
+                [
+                    {**KEY, "cohort": "2", "evaluations": ["new"]},
+                    {**KEY, "evaluations": ["great", "too fast"]},
+                ]
+            ),
+            encoding="utf-8",
+        )
+        del database_interface.bulk_append
+
+        report = bulk_loader.load_exports(
+            database_interface,
+            str(exports),
+            batch_size=1,
+            checkpoint_path=checkpoint_path,
+        )
+
+        assert report.evaluations_written == 3
+        assert database_interface.query({"cohort": "2"}, "evaluations")[0][
+            "evaluations"
+        ] == ["new"]
+
+    def test_archived_semesters_are_skipped(self, exports):
+        """Comments of archived semesters are not written."""
+        database_interface = InMemoryInterface()
+        report = bulk_loader.load_exports(
+            database_interface, str(exports), archived_semesters={"WS21/22"}
+        )
+        assert report.archived_comments == 1
+        assert [
+            document["semester"]
+            for document in database_interface.fetch(table="evaluations")
+        ] == ["SS21"]
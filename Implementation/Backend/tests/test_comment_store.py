@@ -0,0 +1,279 @@
+"""Unit tests for the memory-mapped comment store."""
+import copy
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from evaluation_infrastructure.api import responses
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.comment_store import (
+    CommentStore,
+    StoredComments,
+    decode_comments,
+    open_comment_store,
+)
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for an empty comment store."""
+    comment_store = CommentStore(str(tmp_path / "comments.bin"))
+    yield comment_store
+    comment_store.close()
+
+
+@pytest.fixture
+def evaluation_system(store: CommentStore):
+    """Fixture for an evaluation system keeping its comments in the store."""
+    yield EvaluationSystem(InMemoryInterface(), comment_store=store)
+
+
+class TestCommentStore:
+    """Test the comment store."""
+
+    def test_store_append_and_get(self, store: CommentStore):
+        """Comments are read back unchanged, including quotes and non-ASCII."""
+        comments = ["good", 'a "quoted" word', "ünïcode, with a comma", ""]
+        assert store.append(comments) == (0, 4)
+        assert store.append(["last"]) == (4, 5)
+
+        assert store.get(1, 4) == comments[1:]
+        assert list(store.scan(batch_size=2)) == comments + ["last"]
+        assert bytes(store.json_slice(0, 2)) == b'"good","a \\"quoted\\" word"'
+        assert store.size_bytes == sum(
+            len(json.dumps(c, ensure_ascii=False).encode()) + 1
+            for c in comments + ["last"]
+        )
+
+    def test_stored_comments_behave_like_a_list(self, store: CommentStore):
+        """Indexing, slicing and appending across several ranges of the store."""
+        comments = StoredComments(store, ["a", "b"])
+        other = StoredComments(store, ["x"])
+        comments.extend(["c", "d"])
+        comments.append("e")
+
+        assert len(comments) == 5
+        assert comments == ["a", "b", "c", "d", "e"]
+        assert comments[1:4] == ["b", "c", "d"]
+        assert comments[-1] == "e"
+        assert comments[::2] == ["a", "c", "e"]
+        assert "d" in comments
+        assert other == ["x"]
+        with pytest.raises(IndexError):
+            comments[5]  # pylint: disable=pointless-statement
+        # Comments appended in a row extend the last range
+        assert list(comments.ranges) == [0, 2, 3, 6]
+        assert copy.deepcopy(comments) == ["a", "b", "c", "d", "e"]
+        assert comments.view(1, 4) == ["b", "c", "d"]
+
+    def test_extend_while_reading(self, store: CommentStore):
+        """Readers on other threads see consistent ranges while comments are added."""
+        comments = StoredComments(store, ["a"])
+        StoredComments(store, ["x"])  # Every extend starts a new range
+        stop = threading.Event()
+
+        def read() -> None:
+            while not stop.is_set():
+                snapshot = list(comments)
+                assert snapshot == ["a"] * len(snapshot)
+                assert len(comments.view(0, len(comments))) <= len(comments)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for _ in range(500):
+            comments.extend(["a"])
+            StoredComments(store, ["x"])
+        stop.set()
+        reader.join()
+        assert comments == ["a"] * 501
+
+    def test_decode_comments(self, store: CommentStore):
+        """Stored comments are decoded into a list, other documents are kept."""
+        document = {**EVALUATION, "evaluations": StoredComments(store, ["good"])}
+        decoded = decode_comments(document)
+        assert isinstance(decoded["evaluations"], list)
+        assert decoded == {**EVALUATION, "evaluations": ["good"]}
+        plain = {**EVALUATION, "evaluations": ["good"]}
+        assert decode_comments(plain) is plain
+
+    def test_open_comment_store(self, tmp_path):
+        """No store without a path, the directory of the file is created."""
+        assert open_comment_store(None) is None
+        comment_store = open_comment_store(str(tmp_path / "cache" / "comments.bin"))
+        assert (tmp_path / "cache" / "comments.bin").exists()
+        comment_store.close()
+
+
+class TestEvaluationSystem:
+    """Test the evaluation system keeping its comments in the store."""
+
+    def test_evaluation_system_keeps_comments_in_store(
+        self, evaluation_system: EvaluationSystem, store: CommentStore
+    ):
+        """Added and updated evaluations keep their comments in the store."""
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["good", "bad"])
+        )
+        evaluation_system.add_or_update_evaluations(
+            [Evaluation(**EVALUATION, evaluations=["great"])]
+        )
+
+        evaluation = evaluation_system.get_evaluation(*EVALUATION.values())
+        assert isinstance(evaluation.evaluations, StoredComments)
+        assert evaluation.evaluations == ["good", "bad", "great"]
+        assert len(store) == 3
+        # The dict refers to the stored comments instead of decoding them
+        assert isinstance(evaluation.dict["evaluations"], StoredComments)
+        assert evaluation.dict["evaluations"] == ["good", "bad", "great"]
+        # The change log refers to the stored comments instead of copying them
+        changes = evaluation_system.change_log.since(0)
+        assert [change["data"]["evaluations"] for change in changes] == [
+            ["good", "bad"],
+            ["great"],
+        ]
+
+    def test_backup_and_restore_with_store(
+        self, evaluation_system: EvaluationSystem, tmp_path
+    ):
+        """Backups hold the comments, a restarted system rebuilds its store."""
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["good", "bad"])
+        )
+        evaluation_system.backup_to_database()
+
+        restored_store = CommentStore(str(tmp_path / "restored.bin"))
+        restored = EvaluationSystem(
+            evaluation_system.database_interface, comment_store=restored_store
+        )
+        restored.create_from_database()
+        evaluation = restored.get_evaluation(*EVALUATION.values())
+        assert isinstance(evaluation.evaluations, StoredComments)
+        assert evaluation.evaluations == ["good", "bad"]
+        restored_store.close()
+
+    def test_evaluations_endpoint_serves_stored_comments(
+        self,
+        evaluation_system: EvaluationSystem,
+    ):
+        """The JSON written from the store equals the regular JSON response."""
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["good", 'say "hi"', "ünï"])
+        )
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**{**EVALUATION, "lecturer": "Dr. Jane Doe"}, evaluations=[])
+        )
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["more"])
+        )
+        evaluation_system.score_sentiment()
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+
+        for path in ("/evaluations/course/Data Science", "/evaluations/cohort/1"):
+            response = client.get(path)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            body = response.json()
+            assert body[0]["evaluations"] == ["good", 'say "hi"', "ünï", "more"]
+            assert body[1]["evaluations"] == []
+            expected = [
+                {**evaluation.dict, "scores": evaluation.scores.tolist()}
+                for evaluation in evaluation_system.get_evaluations_by_course(
+                    "Data Science"
+                )
+            ]
+            assert body == expected
+
+    def test_evaluations_endpoint_streams_chunks(
+        self, evaluation_system: EvaluationSystem
+    ):
+        """Large slices of the store are streamed as they are, small parts joined."""
+        comments = ["x" * 40, "short"]
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=comments)
+        )
+        evaluation = evaluation_system.get_evaluation(*EVALUATION.values())
+        parts = list(
+            responses._stream_chunks(  # pylint: disable=protected-access
+                responses._stored_evaluations_json(  # pylint: disable=protected-access
+                    [evaluation]
+                ),
+                chunk_bytes=16,
+            )
+        )
+        assert any(isinstance(part, memoryview) for part in parts)
+        assert json.loads(b"".join(parts))[0]["evaluations"] == comments
+
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+        response = client.get("/evaluations/course/Data Science")
+        assert response.status_code == 200
+        assert response.json()[0]["evaluations"] == comments
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br"])
+    def test_streamed_response_is_compressed(
+        self, evaluation_system: EvaluationSystem, encoding: str
+    ):
+        """Streamed evaluations are compressed chunk by chunk."""
+        comments = [f"comment {number}" for number in range(20_000)]
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=comments)
+        )
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+
+        response = client.get(
+            "/evaluations/course/Data Science", headers={"Accept-Encoding": encoding}
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Content-Length" not in response.headers
+        assert response.json()[0]["evaluations"] == comments
+        stats = client.get("/stats/wire").json()["GET /evaluations/course/{course}"]
+        assert stats["compressed_responses"] == 1
+        assert stats["wire_bytes"] < stats["body_bytes"]
+
+    def test_snapshot_with_store(self, evaluation_system: EvaluationSystem, tmp_path):
+        """A snapshot loaded by a system with another store copies the comments."""
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["good", "bad"])
+        )
+        replica_store = CommentStore(str(tmp_path / "replica.bin"))
+        replica = EvaluationSystem(InMemoryInterface(), comment_store=replica_store)
+        replica.load_snapshot(evaluation_system.snapshot())
+
+        evaluation = replica.get_evaluation(*EVALUATION.values())
+        assert evaluation.evaluations.store is replica_store
+        assert evaluation.evaluations == ["good", "bad"]
+        replica_store.close()
+
+    def test_replication_changes_with_store(self, evaluation_system: EvaluationSystem):
+        """Changes referring to stored comments are served as plain lists."""
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["good", "bad"])
+        )
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**EVALUATION, evaluations=["great"])
+        )
+        client = TestClient(RestService(evaluation_system, rate_limits=False).app)
+
+        response = client.get("/replication/changes", params={"since": 0})
+        assert response.status_code == 200
+        assert [
+            change["data"]["evaluations"] for change in response.json()["changes"]
+        ] == [
+            ["good", "bad"],
+            ["great"],
+        ]
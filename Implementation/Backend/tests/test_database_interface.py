@@ -0,0 +1,205 @@
+"""Conformance tests every implementation of DBInterface has to pass."""
+import pytest
+
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.database_access.sqlite_interface import SQLiteInterface
+from evaluation_infrastructure.errors import DuplicateKeyError
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+from evaluation_infrastructure.logic.result import Result, ResultType
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good"],
+}
+OTHER_EVALUATION = {**EVALUATION, "cohort": "2", "evaluations": ["bad"]}
+
+
+def create_mongomock_interface(tmp_path):
+    """Creates a MongoDB interface backed by mongomock."""
+    mongomock = pytest.importorskip("mongomock")
+    from evaluation_infrastructure.database_access.mongo_interface import (  # pylint: disable=import-outside-toplevel
+        MongoInterface,
+    )
+
+    return MongoInterface("mongodb://localhost", client=mongomock.MongoClient())
+
+
+BACKENDS = {
+    "memory": lambda tmp_path: InMemoryInterface(),
+    "sqlite": lambda tmp_path: SQLiteInterface(str(tmp_path / "test.sqlite3")),
+    "mongomock": create_mongomock_interface,
+}
+
+
+# Backends with multi-document transactions, MongoDB groups writes with bulk_upsert
+TRANSACTIONAL_BACKENDS = ["memory", "sqlite"]
+
+
+@pytest.fixture(params=list(BACKENDS))
+def database(request, tmp_path):
+    """Fixture for an empty database of every backend."""
+    interface = BACKENDS[request.param](tmp_path)
+    yield interface
+    interface.disconnect()
+
+
+@pytest.fixture(params=TRANSACTIONAL_BACKENDS)
+def transactional_database(request, tmp_path):
+    """Fixture for an empty database of every backend supporting transactions."""
+    interface = BACKENDS[request.param](tmp_path)
+    yield interface
+    interface.disconnect()
+
+
+class TestConformance:
+    """Test the behavior shared by all backends."""
+
+    def test_empty(self, database):
+        """Test that a new database has no documents."""
+        assert database.fetch("evaluations") == []
+        assert database.fetch("results") == []
+
+    def test_insert_and_fetch(self, database):
+        """Test that inserted documents are fetched without database fields."""
+        database.insert(EVALUATION, table="evaluations")
+        database.save([OTHER_EVALUATION], table="evaluations")
+        assert sorted(
+            database.fetch("evaluations"), key=lambda document: document["cohort"]
+        ) == [EVALUATION, OTHER_EVALUATION]
+
+    def test_insert_duplicate_key(self, database):
+        """Test that inserting an existing key fails."""
+        database.insert(EVALUATION, table="evaluations")
+        with pytest.raises(DuplicateKeyError):
+            database.insert({**EVALUATION, "evaluations": []}, table="evaluations")
+
+    def test_bulk_upsert(self, database):
+        """Test that bulk upserts insert new keys and merge existing ones."""
+        database.insert({**EVALUATION, "note": "kept"}, table="evaluations")
+        database.bulk_upsert(
+            [{**EVALUATION, "evaluations": ["good", "bad"]}, OTHER_EVALUATION],
+            table="evaluations",
+        )
+        assert database.query({"cohort": "1"}, "evaluations") == [
+            {**EVALUATION, "note": "kept", "evaluations": ["good", "bad"]}
+        ]
+        assert database.query({"cohort": "2"}, "evaluations") == [OTHER_EVALUATION]
+
+    def test_bulk_append(self, database):
+        """Test that bulk appends extend the list of existing keys and insert new ones."""
+        database.insert({**EVALUATION, "note": "kept"}, table="evaluations")
+        database.bulk_append(
+            [{**EVALUATION, "evaluations": ["bad"]}, OTHER_EVALUATION],
+            table="evaluations",
+            field="evaluations",
+        )
+        assert database.query({"cohort": "1"}, "evaluations") == [
+            {**EVALUATION, "note": "kept", "evaluations": ["good", "bad"]}
+        ]
+        assert database.query({"cohort": "2"}, "evaluations") == [OTHER_EVALUATION]
+
+    def test_bulk_append_batch_is_idempotent(self, database):
+        """Test that a repeated batch is skipped by the documents holding its id."""
+        database.insert(EVALUATION, table="evaluations")
+        for _ in range(2):
+            database.bulk_append(
+                [{**EVALUATION, "evaluations": ["bad"]}, OTHER_EVALUATION],
+                table="evaluations",
+                field="evaluations",
+                batch="load-0",
+            )
+        database.bulk_append(
+            [{**EVALUATION, "evaluations": ["fine"]}],
+            table="evaluations",
+            field="evaluations",
+            batch="load-1",
+        )
+        documents = {
+            document["cohort"]: document["evaluations"]
+            for document in database.fetch("evaluations")
+        }
+        assert documents == {"1": ["good", "bad", "fine"], "2": ["bad"]}
+
+    def test_update(self, database):
+        """Test that updates set fields and only insert when upserting."""
+        query = {key: EVALUATION[key] for key in ["semester", "cohort", "course"]}
+        database.update({"evaluations": []}, "evaluations", query)
+        assert database.fetch("evaluations") == []
+
+        database.update(EVALUATION, "evaluations", query, upsert=True)
+        database.update({"evaluations": ["bad"]}, "evaluations", query)
+        assert database.fetch("evaluations") == [{**EVALUATION, "evaluations": ["bad"]}]
+
+    def test_query_projection_and_exists(self, database):
+        """Test queries on key fields with a projection."""
+        database.save([EVALUATION, OTHER_EVALUATION], table="evaluations")
+        assert database.query(
+            {"cohort": "2"}, "evaluations", {"_id": 0, "cohort": 1}
+        ) == [{"cohort": "2"}]
+        assert database.exists({"cohort": "1"}, "evaluations")
+        assert not database.exists({"cohort": "3"}, "evaluations")
+
+    def test_delete(self, database):
+        """Test that delete removes a single matching document."""
+        database.save([EVALUATION, OTHER_EVALUATION], table="evaluations")
+        database.delete({"cohort": "1"}, "evaluations")
+        assert database.fetch("evaluations") == [OTHER_EVALUATION]
+
+    def test_delete_many(self, database):
+        """Test that delete_many removes all matching documents."""
+        third_evaluation = {**EVALUATION, "semester": "SS22"}
+        database.save(
+            [EVALUATION, OTHER_EVALUATION, third_evaluation], table="evaluations"
+        )
+        database.delete_many({"semester": "SS21"}, "evaluations")
+        assert database.fetch("evaluations") == [third_evaluation]
+
+    def test_evaluation_system_round_trip(self, database):
+        """Test that a backed up evaluation system is restored unchanged."""
+        evaluation_system = EvaluationSystem(database)
+        evaluation_system.add_or_update_evaluation(Evaluation(**EVALUATION))
+        evaluation_system._add_result(  # pylint: disable=protected-access
+            Result(
+                faculty="Computer Science",
+                course="Data Science",
+                lecturer="Dr. John Doe",
+                results=[
+                    ResultType(semester="SS21", topics_distribution={"Topic 1": 1.0})
+                ],
+            )
+        )
+        evaluation_system.backup_to_database()
+        evaluation_system.add_or_update_evaluation(Evaluation(**OTHER_EVALUATION))
+        Evaluation(**EVALUATION).save_to_database(database)
+        evaluation_system.backup_to_database()
+
+        restored = EvaluationSystem(database)
+        restored.create_from_database()
+        assert sorted(
+            (evaluation.dict for evaluation in restored.evaluations),
+            key=lambda document: document["cohort"],
+        ) == [EVALUATION, OTHER_EVALUATION]
+        assert [result.dict for result in restored.results] == [
+            result.dict for result in evaluation_system.results
+        ]
+
+
+class TestTransactions:
+    """Test the transactions of the backends supporting them."""
+
+    def test_transaction_rollback(self, transactional_database):
+        """Test that a failing transaction leaves the database unchanged."""
+        transactional_database.insert(EVALUATION, table="evaluations")
+        with pytest.raises(RuntimeError):
+            with transactional_database.transaction():
+                transactional_database.insert(OTHER_EVALUATION, table="evaluations")
+                transactional_database.delete({"cohort": "1"}, "evaluations")
+                raise RuntimeError("abort")
+        assert transactional_database.fetch("evaluations") == [EVALUATION]
@@ -0,0 +1,86 @@
+"""Unit tests for the dummy data generator."""
+import pytest
+
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic import dummy_generator
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+@pytest.fixture
+def config():
+    """Fixture for a small generator configuration."""
+    yield dummy_generator.GeneratorConfig(comment_count=2000, batch_size=16, seed=42)
+
+
+class TestDummyGenerator:
+    """Test the dummy data generator."""
+
+    def test_comment_count(self, config: dummy_generator.GeneratorConfig):
+        """Test that exactly the requested number of comments is generated."""
+        evaluations = [
+            evaluation
+            for batch in dummy_generator.generate_batches(config)
+            for evaluation in batch
+        ]
+        assert sum(len(evaluation["evaluations"]) for evaluation in evaluations) == 2000
+        assert len(evaluations) == 2000 // config.comments_per_evaluation
+
+    def test_unique_keys(self, config: dummy_generator.GeneratorConfig):
+        """Test that every evaluation key is generated once."""
+        keys = [
+            tuple(
+                evaluation[field]
+                for field in ("semester", "cohort", "faculty", "course", "lecturer")
+            )
+            for batch in dummy_generator.generate_batches(config)
+            for evaluation in batch
+        ]
+        assert len(keys) == len(set(keys))
+
+    def test_reproducible(self, config: dummy_generator.GeneratorConfig):
+        """Test that the same seed generates the same data, independent of the workers."""
+        first = list(dummy_generator.generate_batches(config))
+        second = list(dummy_generator.generate_batches(config, workers=2))
+        assert first == second
+
+    def test_skew(self):
+        """Test that popular courses receive more comments."""
+        config = dummy_generator.GeneratorConfig(comment_count=20000, course_skew=2.0)
+        comments_per_course = {}
+        for batch in dummy_generator.generate_batches(config):
+            for evaluation in batch:
+                comments_per_course[evaluation["course"]] = comments_per_course.get(
+                    evaluation["course"], 0
+                ) + len(evaluation["evaluations"])
+        most_popular, least_popular = (
+            dummy_generator.courses[0],
+            dummy_generator.courses[-1],
+        )
+        assert comments_per_course[most_popular] > comments_per_course.get(
+            least_popular, 0
+        )
+
+    def test_snapshot(self, tmp_path, config: dummy_generator.GeneratorConfig):
+        """Test that a snapshot holds the generated evaluations and results."""
+        path = str(tmp_path / "snapshot.jsonl")
+        evaluation_count = dummy_generator.write_snapshot(path, config)
+        entries = list(dummy_generator.read_snapshot(path))
+        evaluations = [data for table, data in entries if table == "evaluations"]
+        results = [data for table, data in entries if table == "results"]
+        assert len(evaluations) == evaluation_count
+        assert {result["course"] for result in results} == {
+            evaluation["course"] for evaluation in evaluations
+        }
+
+    def test_generate_dummy_data(self, config: dummy_generator.GeneratorConfig):
+        """Test that the evaluation system is filled with evaluations and results."""
+        evaluation_system = EvaluationSystem(InMemoryInterface())
+        dummy_generator.generate_dummy_data(evaluation_system, config)
+        assert (
+            len(evaluation_system.evaluations) == 2000 // config.comments_per_evaluation
+        )
+        assert len(evaluation_system.results) == len(
+            evaluation_system.get_all_courses()
+        )
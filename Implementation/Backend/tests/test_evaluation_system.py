@@ -1,6 +1,9 @@
 """Unit tests for the evaluation system."""
 import pytest
 
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
 from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
 from evaluation_infrastructure.logic.evaluation import Evaluation
 from evaluation_infrastructure import errors as custom_errors
@@ -9,13 +12,13 @@ from evaluation_infrastructure import errors as custom_errors
 @pytest.fixture
 def empty_evaluation_system():
     """Fixture for an empty evaluation system."""
-    yield EvaluationSystem()
+    yield EvaluationSystem(InMemoryInterface())
 
 
 @pytest.fixture
 def evaluation_system_with_evaluations():
     """Fixture for an evaluation system with evaluations."""
-    evaluation_system = EvaluationSystem()
+    evaluation_system = EvaluationSystem(InMemoryInterface())
     evaluation_programming_1 = Evaluation(
         semester="WS20/21",
         cohort="1",
@@ -197,8 +200,237 @@ class TestAddAndUpdateEvaluation:
             evaluation_system_with_evaluations.evaluations[0].evaluations
             != inintial_evaluation
         )
-        print(evaluation_system_with_evaluations.evaluations[0])
-        print(inintial_evaluation.extend(new_evaluation_text))
+        inintial_evaluation.extend(new_evaluation_text)
         assert sorted(
             evaluation_system_with_evaluations.evaluations[0].evaluations
-        ) == sorted(inintial_evaluation.extend(new_evaluation_text))
+        ) == sorted(inintial_evaluation)
+
+
+class TestSearch:
+    """Test the prefix search over names."""
+
+    def test_search_prefix(self, evaluation_system_with_evaluations: EvaluationSystem):
+        """Test that names are matched at the start of every word, case insensitive."""
+        matches = evaluation_system_with_evaluations.search("PROG")
+        assert [(match.kind, match.name) for match in matches] == [
+            ("course", "Introduction to Programming")
+        ]
+        assert matches[0].count == 2
+
+    def test_search_kind_and_limit(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test filtering by kind and limiting the number of matches."""
+        matches = evaluation_system_with_evaluations.search("", kind="course")
+        assert {match.name for match in matches} == {
+            "Introduction to Programming",
+            "Data Science",
+        }
+        assert len(evaluation_system_with_evaluations.search("", limit=1)) == 1
+
+    def test_search_faculty(self, evaluation_system_with_evaluations: EvaluationSystem):
+        """Test filtering by faculty."""
+        assert evaluation_system_with_evaluations.search(
+            "d", faculty="Computer Science"
+        )
+        assert not evaluation_system_with_evaluations.search("d", faculty="Tourism")
+
+
+class TestPersistence:
+    """Test loading from and backing up to the database."""
+
+    def test_create_from_database(self):
+        """Test that evaluations and results are loaded and indexed."""
+        database = InMemoryInterface()
+        database.save(
+            [
+                {
+                    "semester": "WS20/21",
+                    "cohort": "1",
+                    "faculty": "Computer Science",
+                    "course": "Data Science",
+                    "lecturer": "Dr. John Doe",
+                    "evaluations": ["good"],
+                }
+            ],
+            table="evaluations",
+        )
+        evaluation_system = EvaluationSystem(database)
+        evaluation_system.create_from_database()
+        assert evaluation_system.load_state == "ready"
+        assert evaluation_system.get_all_courses() == ["Data Science"]
+        assert evaluation_system.pending_changes == 0
+
+    def test_failed_load(self):
+        """Test that a failing database is reported in the load state."""
+        database = InMemoryInterface()
+        database.fail_next(operation="fetch")
+        evaluation_system = EvaluationSystem(database)
+        with pytest.raises(custom_errors.DatabaseConnectionError):
+            evaluation_system.create_from_database()
+        assert evaluation_system.load_state == "failed"
+        assert "Injected failure" in evaluation_system.load_error
+
+    def test_backup_writes_pending_changes(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that a backup writes the changed evaluations with one bulk upsert per shard."""
+        database = evaluation_system_with_evaluations.database_interface
+        evaluation_system_with_evaluations.backup_to_database()
+        assert evaluation_system_with_evaluations.pending_changes == 0
+        assert len(database.fetch("evaluations")) == 4
+        assert database.calls["bulk_upsert"] == 2
+
+        evaluation_system_with_evaluations.backup_to_database()
+        assert database.calls["bulk_upsert"] == 2
+
+    def test_failed_backup_is_retried(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that changes of a failed shard backup are written by the next one."""
+        database = evaluation_system_with_evaluations.database_interface
+        database.fail_next(operation="bulk_upsert")
+        with pytest.raises(custom_errors.DatabaseConnectionError):
+            evaluation_system_with_evaluations.backup_to_database()
+        assert evaluation_system_with_evaluations.pending_changes == 2
+        assert len(database.fetch("evaluations")) == 2
+
+        evaluation_system_with_evaluations.backup_to_database()
+        assert evaluation_system_with_evaluations.pending_changes == 0
+        assert len(database.fetch("evaluations")) == 4
+
+    def test_save_to_database(self):
+        """Test that saving an evaluation twice keeps a single document."""
+        database = InMemoryInterface()
+        evaluation = Evaluation(
+            semester="WS20/21",
+            cohort="1",
+            faculty="Computer Science",
+            course="Data Science",
+            lecturer="Dr. John Doe",
+            evaluations=["good"],
+        )
+        evaluation.save_to_database(database)
+        evaluation.evaluations.append("bad")
+        evaluation.save_to_database(database)
+        assert database.fetch("evaluations") == [evaluation.dict]
+
+
+class TestShards:
+    """Test the partitioning of the evaluations into shards."""
+
+    def test_shards_by_semester(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that every semester has its own shard and indexes."""
+        shards = evaluation_system_with_evaluations.shards
+        assert list(shards) == ["WS20/21", "WS21/22"]
+        assert list(shards["WS20/21"].course_map) == [
+            "Introduction to Programming",
+            "Data Science",
+        ]
+        assert (
+            len(
+                evaluation_system_with_evaluations.get_evaluations_by_course(
+                    "Data Science"
+                )
+            )
+            == 2
+        )
+
+    def test_frozen_shard_rejects_writes(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that evaluations of a frozen shard cannot be changed."""
+        evaluation_system_with_evaluations.freeze_shard("WS20/21")
+        evaluation = Evaluation(
+            semester="WS20/21",
+            cohort="1",
+            faculty="Computer Science",
+            course="Introduction to Programming",
+            lecturer="Dr. John Doe",
+            evaluations=["late"],
+        )
+        with pytest.raises(custom_errors.ShardFrozenError):
+            evaluation_system_with_evaluations.add_or_update_evaluation(evaluation)
+        assert (
+            "late"
+            not in evaluation_system_with_evaluations.get_evaluation(
+                *evaluation.query.values()
+            ).evaluations
+        )
+
+        evaluation_system_with_evaluations.freeze_shard("WS20/21", frozen=False)
+        evaluation_system_with_evaluations.add_or_update_evaluation(evaluation)
+
+    def test_frozen_shard_rejects_batch(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that a batch touching a frozen shard is not applied at all."""
+        evaluation_system_with_evaluations.freeze_shard("WS21/22")
+        evaluations = [
+            Evaluation(
+                semester=semester,
+                cohort="2",
+                faculty="Computer Science",
+                course="Data Science",
+                lecturer=lecturer,
+                evaluations=["late"],
+            )
+            for semester, lecturer in [
+                ("WS20/21", "Dr. John Doe"),
+                ("WS21/22", "Dipl. Ing. Jane Jane"),
+            ]
+        ]
+        pending_changes = evaluation_system_with_evaluations.pending_changes
+        with pytest.raises(custom_errors.ShardFrozenError):
+            evaluation_system_with_evaluations.add_or_update_evaluations(evaluations)
+        assert evaluation_system_with_evaluations.pending_changes == pending_changes
+
+        evaluation_system_with_evaluations.freeze_shard("WS21/22", frozen=False)
+        assert evaluation_system_with_evaluations.add_or_update_evaluations(
+            evaluations
+        ) == {"added": 1, "updated": 1}
+
+    def test_rejected_batch_creates_no_shard(
+        self, evaluation_system_with_evaluations: EvaluationSystem
+    ):
+        """Test that a rejected batch leaves no empty shard behind."""
+        evaluation_system_with_evaluations.freeze_shard("WS21/22")
+        evaluations = [
+            Evaluation(
+                semester=semester,
+                cohort="2",
+                faculty="Computer Science",
+                course="Data Science",
+                lecturer="Dr. John Doe",
+                evaluations=["late"],
+            )
+            for semester in ["SS30", "WS21/22"]
+        ]
+        with pytest.raises(custom_errors.ShardFrozenError):
+            evaluation_system_with_evaluations.add_or_update_evaluations(evaluations)
+        assert "SS30" not in evaluation_system_with_evaluations.shards
+
+    def test_freeze_missing_shard(self, empty_evaluation_system: EvaluationSystem):
+        """Test that freezing an unknown shard raises an error."""
+        with pytest.raises(custom_errors.ShardNotFoundError):
+            empty_evaluation_system.freeze_shard("SS99")
+
+    def test_backup_cadence(self, evaluation_system_with_evaluations: EvaluationSystem):
+        """Test that regular backups skip shards whose interval did not elapse."""
+        shards = evaluation_system_with_evaluations.shards
+        evaluation_system_with_evaluations.backup_to_database()
+        shards["WS20/21"].backup_interval_seconds = 3600
+        for shard in shards.values():
+            evaluation = shard.evaluations[0]
+            evaluation_system_with_evaluations.add_or_update_evaluation(
+                Evaluation(**{**evaluation.dict, "evaluations": ["new"]})
+            )
+
+        evaluation_system_with_evaluations.backup_to_database(force=False)
+        assert len(shards["WS20/21"].dirty) == 1
+        assert len(shards["WS21/22"].dirty) == 0
+
+        evaluation_system_with_evaluations.backup_to_database()
+        assert evaluation_system_with_evaluations.pending_changes == 0
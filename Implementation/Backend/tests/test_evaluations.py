@@ -33,7 +33,7 @@ class TestEvaluation:
     def test_add_multiple_evaluations(self, evaluation: Evaluation):
         """Test adding multiple evaluations to an existing evaluation."""
 
-        evaluation.add_multiple_evaluations(["good", "good", "good"])
+        evaluation.add_evaluations(["good", "good", "good"])
 
         assert sorted(evaluation.evaluations) == sorted(
             ["bad", "bad", "good", "good", "good", "good"]
@@ -0,0 +1,30 @@
+"""Checks that the entry points do not load dependencies they only need on first use."""
+import pytest
+
+from benchmarks.import_time import FORBIDDEN, ImportResult, import_once
+
+
+@pytest.mark.parametrize("module", list(FORBIDDEN))
+def test_no_eager_dependencies(module: str):
+    """Heavy optional dependencies are imported lazily."""
+    milliseconds, loaded = import_once(module)
+    result = ImportResult(
+        module,
+        budget_ms=float("inf"),
+        runs_ms=[milliseconds],
+        loaded=loaded,
+        forbidden=FORBIDDEN[module],
+    )
+    assert result.violations == []
+
+
+def test_result_output_dashboard_still_importable():
+    """The dashboard model moved to models.dashboard, the old import keeps working."""
+    from evaluation_infrastructure.logic.result import (  # pylint: disable=import-outside-toplevel
+        ResultOutputDashboard,
+    )
+    from evaluation_infrastructure.models.dashboard import (  # pylint: disable=import-outside-toplevel
+        ResultOutputDashboard as MovedResultOutputDashboard,
+    )
+
+    assert ResultOutputDashboard is MovedResultOutputDashboard
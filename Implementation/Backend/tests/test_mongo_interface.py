@@ -0,0 +1,120 @@
+"""Tests for the MongoDB interface, run against mongomock."""
+from unittest.mock import MagicMock
+
+from pymongo.errors import AutoReconnect, NetworkTimeout
+from pytest import fixture, importorskip, raises
+
+from evaluation_infrastructure.database_access.mongo_interface import MongoInterface
+from evaluation_infrastructure.errors import DatabaseConnectionError
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good"],
+}
+
+
+@fixture(scope="function")
+def mongo_interface():
+    """Fixture for a MongoDB interface backed by mongomock."""
+    mongomock = importorskip("mongomock")
+    yield MongoInterface("mongodb://localhost", client=mongomock.MongoClient())
+
+
+class TestIndexes:
+    """Test the unique key indexes."""
+
+    def test_indexes_created_on_connect(self, mongo_interface: MongoInterface):
+        """Test that connecting creates the unique key indexes."""
+        collection = mongo_interface.client["evaluation_system"]["evaluations"]
+        index = collection.index_information()["evaluations_key"]
+        assert index["unique"]
+        assert [key for key, _ in index["key"]] == [
+            "semester",
+            "cohort",
+            "faculty",
+            "course",
+            "lecturer",
+        ]
+
+    def test_duplicate_keys_do_not_block_connect(self):
+        """Test that a collection with duplicate keys is left without its index."""
+        mongomock = importorskip("mongomock")
+        client = mongomock.MongoClient()
+        client["evaluation_system"]["evaluations"].insert_many(
+            [dict(EVALUATION), dict(EVALUATION)]
+        )
+        mongo_interface = MongoInterface("mongodb://localhost", client=client)
+
+        mongo_interface.connect()
+
+        indexes = client["evaluation_system"]["evaluations"].index_information()
+        assert "evaluations_key" not in indexes
+        assert (
+            "results_key" in client["evaluation_system"]["results"].index_information()
+        )
+        assert len(mongo_interface.find_duplicate_keys("evaluations")) == 1
+
+    def test_bulk_upsert_merges_by_key(self, mongo_interface: MongoInterface):
+        """Test that documents with the same key are updated, not duplicated."""
+        mongo_interface.bulk_upsert([EVALUATION], table="evaluations")
+        mongo_interface.bulk_upsert(
+            [{**EVALUATION, "evaluations": ["good", "bad"]}], table="evaluations"
+        )
+        assert mongo_interface.fetch("evaluations") == [
+            {**EVALUATION, "evaluations": ["good", "bad"]}
+        ]
+        assert mongo_interface.find_duplicate_keys("evaluations") == []
+
+    def test_exists(self, mongo_interface: MongoInterface):
+        """Test the key lookup."""
+        query = {
+            key: EVALUATION[key]
+            for key in MongoInterface.key_projection("evaluations")
+            if key != "_id"
+        }
+        assert not mongo_interface.exists(query, table="evaluations")
+        mongo_interface.bulk_upsert([EVALUATION], table="evaluations")
+        assert mongo_interface.exists(query, table="evaluations")
+
+
+class TestRetries:
+    """Test the retry policy for transient errors."""
+
+    @fixture
+    def flaky_interface(self):
+        """Fixture for an interface whose client fails on demand."""
+        interface = MongoInterface("mongodb://localhost", client=MagicMock())
+        interface.retry_backoff_seconds = 0
+        yield interface
+
+    def test_client_is_lazy(self):
+        """Test that constructing the interface does not connect."""
+        interface = MongoInterface("mongodb://unreachable.invalid:27017")
+        assert interface._client is None  # pylint: disable=protected-access
+
+    def test_transient_error_is_retried(self, flaky_interface: MongoInterface):
+        """Test that a call succeeds if a retry succeeds."""
+        collection = flaky_interface.client["evaluation_system"]["evaluations"]
+        collection.find.side_effect = [AutoReconnect("primary stepped down"), []]
+        assert flaky_interface.fetch("evaluations") == []
+        assert collection.find.call_count == 2
+
+    def test_retries_exhausted(self, flaky_interface: MongoInterface):
+        """Test that a persistent error is raised as DatabaseConnectionError."""
+        collection = flaky_interface.client["evaluation_system"]["evaluations"]
+        collection.find.side_effect = NetworkTimeout("timed out")
+        with raises(DatabaseConnectionError):
+            flaky_interface.fetch("evaluations")
+        assert collection.find.call_count == flaky_interface.retry_attempts
+
+    def test_insert_is_not_retried(self, flaky_interface: MongoInterface):
+        """Test that non-idempotent calls are attempted only once."""
+        collection = flaky_interface.client["evaluation_system"]["evaluations"]
+        collection.insert_one.side_effect = AutoReconnect("connection reset")
+        with raises(DatabaseConnectionError):
+            flaky_interface.insert(EVALUATION, table="evaluations")
+        assert collection.insert_one.call_count == 1
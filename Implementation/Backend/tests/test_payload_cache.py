@@ -0,0 +1,93 @@
+"""Unit tests for the payload cache and the pre-rendering of the dashboards."""
+import time
+
+from fastapi.testclient import TestClient
+
+from evaluation_infrastructure.api.payload_cache import PayloadCache, RequestFrequency
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+class TestPayloadCache:
+    """Test the payload cache."""
+
+    def test_payload_cache_drops_least_recently_used(self):
+        """Payloads beyond the size limit are dropped, least recently used first."""
+        cache = PayloadCache(max_bytes=10)
+        cache.put("a", b"1234", "application/json")
+        cache.put("b", b"1234", "application/json")
+        assert cache.get("a").body == b"1234"
+        cache.put("c", b"1234", "application/json")
+
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.get("b") is None
+        assert cache.status["size_bytes"] == 8
+        assert cache.status["hits"] == 1 and cache.status["misses"] == 1
+        cache.put("too large", b"x" * 11, "application/json")
+        assert "too large" not in cache
+
+
+class TestRequestFrequency:
+    """Test the request frequency of the dashboards."""
+
+    def test_request_frequency_persists_with_decay(self, tmp_path):
+        """Counts survive a restart, weighted down by the decay."""
+        path = str(tmp_path / "frequency.json")
+        frequency = RequestFrequency(path, decay=0.5)
+        for _ in range(4):
+            frequency.record("Algorithms")
+        frequency.record("Databases")
+        frequency.save()
+
+        restored = RequestFrequency(path, decay=0.5)
+        assert restored.counts == {"Algorithms": 2.0, "Databases": 0.5}
+        assert restored.ranked(["Compilers", "Databases", "Algorithms"]) == [
+            "Algorithms",
+            "Databases",
+            "Compilers",
+        ]
+
+    def test_request_frequency_ignores_broken_file(self, tmp_path):
+        """A corrupt file is ignored instead of preventing the start."""
+        path = tmp_path / "frequency.json"
+        path.write_text("not json", encoding="utf-8")
+        assert not RequestFrequency(str(path)).counts
+
+
+class TestPrerendering:
+    """Test the pre-rendering of the dashboards."""
+
+    def test_dashboards_prerendered_after_loading(self, make_result):
+        """After loading, all dashboards are rendered before the server is ready."""
+        database = InMemoryInterface()
+        writer = EvaluationSystem(database)
+        for course in ("Algorithms", "Databases"):
+            writer._add_result(
+                make_result(course=course)
+            )  # pylint: disable=protected-access
+        writer.backup_to_database()
+
+        rest_service = RestService(EvaluationSystem(database), rate_limits=False)
+        with TestClient(rest_service.app) as client:
+            deadline = time.monotonic() + 5
+            while (response := client.get("/readyz")).status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            prewarm = response.json()["prewarm"]
+            assert prewarm["state"] == "done"
+            assert prewarm["rendered"] == prewarm["courses"] == 2
+
+            response = client.get("/results/course/Algorithms")
+            assert response.status_code == 200
+            assert response.json()["course"] == "Algorithms"
+            assert rest_service.payload_cache.status["hits"] == 1
+            assert rest_service.request_frequency.counts["Algorithms"] == 1
+
+            # Unknown courses are neither counted nor cached
+            client.get("/results/course/Unknown")
+            assert "Unknown" not in rest_service.request_frequency.counts
+            assert rest_service.payload_cache.status["entries"] == 2
@@ -0,0 +1,127 @@
+"""Unit tests for the rate limits and the ingest admission."""
+import pytest
+from fastapi.testclient import TestClient
+
+from evaluation_infrastructure.api.rate_limit import (
+    IngestAdmission,
+    RateLimiter,
+    TokenBucket,
+)
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good", "bad"],
+}
+
+
+@pytest.fixture
+def evaluation_system():
+    """Fixture for an empty evaluation system."""
+    yield EvaluationSystem(InMemoryInterface())
+
+
+class TestTokenBucket:
+    """Test the token bucket."""
+
+    def test_take_and_refill(self):
+        """Test that a drained bucket refills at its rate."""
+        bucket = TokenBucket(rate=2, capacity=2)
+        now = bucket.updated
+        assert bucket.take(now=now) == bucket.take(now=now) == 0
+        assert bucket.take(now=now) == pytest.approx(0.5)
+        assert bucket.take(now=now + 0.5) == 0
+        bucket.take(now=now + 100)
+        assert bucket.tokens == 1
+
+    def test_debt(self):
+        """Test that charges beyond the capacity have to be refilled first."""
+        bucket = TokenBucket(rate=10, capacity=10)
+        now = bucket.updated
+        bucket.charge(30, now=now)
+        assert bucket.debt_seconds(now=now) == pytest.approx(2)
+        assert bucket.debt_seconds(now=now + 2) == 0
+
+    def test_clients_limited_separately(self):
+        """Test that every client has its own bucket, bounded in number."""
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+        assert limiter.check("a") == 0
+        assert limiter.check("a") > 0
+        assert limiter.check("b") == limiter.check("c") == 0
+        assert list(limiter.buckets) == ["b", "c"]
+
+
+class TestIngestAdmission:
+    """Test the admission control of writes."""
+
+    def test_in_flight(self, evaluation_system: EvaluationSystem):
+        """Test that writes beyond the maximum in flight are rejected."""
+        admission = IngestAdmission(evaluation_system, 1, 100, 100, 100)
+        assert admission.acquire() == 0
+        assert admission.acquire() == 1
+        admission.release()
+        assert admission.acquire() == 0
+
+    def test_throughput(self, evaluation_system: EvaluationSystem):
+        """Test that writes are rejected once the comments exceed the burst."""
+        admission = IngestAdmission(evaluation_system, 10, 1, 2, 100)
+        assert admission.acquire() == 0
+        evaluation_system.add_or_update_evaluation(
+            Evaluation(**{**EVALUATION, "evaluations": ["good"] * 5})
+        )
+        assert admission.acquire() == pytest.approx(3, abs=0.1)
+
+    def test_pending_changes(self, evaluation_system: EvaluationSystem):
+        """Test that writes are rejected and a backup requested while changes pend."""
+        requested = []
+        admission = IngestAdmission(
+            evaluation_system,
+            10,
+            100,
+            100,
+            max_pending_changes=1,
+            pending_retry_after_seconds=7,
+            request_backup=lambda: requested.append(True),
+        )
+        assert admission.acquire() == 0
+        evaluation_system.add_or_update_evaluation(Evaluation(**EVALUATION))
+        assert admission.acquire() == 7
+        assert requested == [True]
+
+
+class TestRestService:
+    """Test the limits on the REST API."""
+
+    def test_write_rate_limit(self, evaluation_system, monkeypatch):
+        """Test that writes beyond the burst are rejected, reads and probes are not."""
+        monkeypatch.setattr(config, "RATE_LIMIT_WRITES_PER_SECOND", 0.01)
+        monkeypatch.setattr(config, "RATE_LIMIT_WRITE_BURST", 1)
+        client = TestClient(RestService(evaluation_system).app)
+        assert client.post("/evaluation/multiple", json=EVALUATION).status_code == 201
+        response = client.post("/evaluation/multiple", json=EVALUATION)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/courses/list").status_code == 200
+        assert client.get("/healthz").status_code == 200
+
+    def test_ingest_backpressure(self, evaluation_system, monkeypatch):
+        """Test that writes are rejected while too many changes are pending."""
+        monkeypatch.setattr(config, "INGEST_MAX_PENDING_CHANGES", 1)
+        client = TestClient(RestService(evaluation_system).app)
+        assert client.post("/evaluation/multiple", json=EVALUATION).status_code == 201
+        response = client.post("/evaluation/batch", json=[EVALUATION])
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == str(config.INGEST_RETRY_AFTER_SECONDS)
+        assert client.get("/ingest/status").json()["in_flight"] == 0
+        evaluation_system.backup_to_database()
+        assert client.post("/evaluation/batch", json=[EVALUATION]).status_code == 201
@@ -0,0 +1,223 @@
+"""Unit tests for the change log and the read replicas."""
+import urllib.error
+
+import pytest
+from fastapi.testclient import TestClient
+
+from evaluation_infrastructure import errors as custom_errors
+from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic.change_log import ChangeLog
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+from evaluation_infrastructure.scheduler.replica_follower import ReplicaFollower
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good", "bad"],
+}
+
+
+@pytest.fixture
+def writer_system():
+    """Fixture for the evaluation system of a writer with one evaluation."""
+    evaluation_system = EvaluationSystem(InMemoryInterface())
+    evaluation_system.add_or_update_evaluation(
+        Evaluation(**{**EVALUATION, "evaluations": list(EVALUATION["evaluations"])})
+    )
+    yield evaluation_system
+
+
+@pytest.fixture
+def writer(writer_system: EvaluationSystem):
+    """Fixture for a test client of the writer."""
+    yield TestClient(RestService(writer_system, rate_limits=False).app)
+
+
+@pytest.fixture
+def follower(writer: TestClient):
+    """Fixture for a follower fetching from the writer through its test client."""
+
+    def fetch(path: str):
+        response = writer.get(path)
+        if response.status_code != 200:
+            raise urllib.error.HTTPError(path, response.status_code, "", None, None)
+        return response.json()
+
+    yield ReplicaFollower(
+        EvaluationSystem(InMemoryInterface()),
+        "http://writer",
+        poll_seconds=0.01,
+        batch_size=2,
+        timeout_seconds=1,
+        fetch=fetch,
+    )
+
+
+class TestChangeLog:
+    """Test the change log."""
+
+    def test_since(self):
+        """Test that changes after a sequence are returned in order."""
+        change_log = ChangeLog(capacity=3)
+        assert change_log.since(0) == []
+        for number in range(5):
+            change_log.append("results", {"number": number})
+        assert [change["data"]["number"] for change in change_log.since(2)] == [2, 3, 4]
+        assert [change["sequence"] for change in change_log.since(3, limit=1)] == [4]
+        assert change_log.since(5) == []
+
+    def test_truncated(self):
+        """Test that dropped and future sequences are rejected."""
+        change_log = ChangeLog(capacity=2)
+        for number in range(4):
+            change_log.append("results", {"number": number})
+        with pytest.raises(custom_errors.ChangeLogTruncatedError):
+            change_log.since(1)
+        with pytest.raises(custom_errors.ChangeLogTruncatedError):
+            change_log.since(5)
+
+
+class TestReplicaFollower:
+    """Test following a writer."""
+
+    def test_bootstrap_and_follow(self, writer: TestClient, follower: ReplicaFollower):
+        """Test that the replica applies the changes made after its snapshot."""
+        assert follower.poll()
+        replica = follower.evaluation_system
+        assert replica.load_state == "ready"
+        assert [evaluation.dict for evaluation in replica.evaluations] == [EVALUATION]
+
+        writer.post("/evaluation/multiple", json={**EVALUATION, "evaluations": ["ok"]})
+        writer.post("/evaluation/multiple", json={**EVALUATION, "cohort": "2"})
+        writer.post("/evaluation/single", json={**EVALUATION, "evaluations": "late"})
+        assert not follower.poll()
+        assert follower.status()["lag_changes"] == 1
+        assert follower.poll()
+        assert sorted(
+            (evaluation.dict for evaluation in replica.evaluations),
+            key=lambda document: document["cohort"],
+        ) == [
+            {**EVALUATION, "evaluations": ["good", "bad", "ok", "late"]},
+            {**EVALUATION, "cohort": "2"},
+        ]
+        assert replica.pending_changes == 0
+        assert follower.bootstrap_count == 1
+
+    def test_scores_followed(self, writer: TestClient, follower: ReplicaFollower):
+        """Test that comments scored on the writer are scored on the replica."""
+        assert follower.poll()
+        assert writer.post("/sentiment/score").json()["comments"] == 2
+        assert follower.poll()
+
+        replica = TestClient(
+            RestService(follower.evaluation_system, leader_url="http://writer").app
+        )
+        sentiment = replica.get("/sentiment").json()
+        assert sentiment == writer.get("/sentiment").json()
+        assert sentiment[0]["comments"] == 2
+        # Scores are applied once, also when the change is fetched again
+        follower.evaluation_system.apply_changes(
+            follower.evaluation_system.change_log.since(0)[-1:]
+        )
+        assert replica.get("/sentiment").json() == sentiment
+
+    def test_etags_agree(
+        self,
+        writer: TestClient,
+        writer_system: EvaluationSystem,
+        follower: ReplicaFollower,
+        make_result,
+    ):
+        """Test that writer and replica send the same ETags for the same data."""
+        writer_system._add_result(  # pylint: disable=protected-access
+            make_result(share=1.0)
+        )
+        assert follower.poll()
+        replica = TestClient(
+            RestService(follower.evaluation_system, leader_url="http://writer").app
+        )
+        paths = ["/courses/list", "/cohorts/list", "/results/course/Data Science"]
+
+        def etags(client: TestClient) -> list:
+            return [client.get(path).headers["ETag"] for path in paths]
+
+        before = etags(writer)
+        assert etags(replica) == before
+        writer.post("/evaluation/multiple", json={**EVALUATION, "cohort": "2"})
+        writer_system._add_result(  # pylint: disable=protected-access
+            make_result(share=0.5)
+        )
+        assert follower.poll()
+        assert etags(replica) == etags(writer)
+        assert etags(writer)[1:] != before[1:]
+
+    def test_results_replaced(
+        self,
+        writer_system: EvaluationSystem,
+        follower: ReplicaFollower,
+        make_result,
+    ):
+        """Test that a changed result replaces the result of the replica."""
+        follower.poll()
+        writer_system._add_result(
+            make_result(share=1.0)
+        )  # pylint: disable=protected-access
+        writer_system._add_result(
+            make_result(share=0.5)
+        )  # pylint: disable=protected-access
+        follower.poll()
+        replica = follower.evaluation_system
+        assert len(writer_system.results) == len(replica.results) == 1
+        assert replica.return_results("Data Science").topics == {"Topic 1": [0.5]}
+
+    def test_bootstrap_after_truncation(
+        self, writer_system: EvaluationSystem, follower: ReplicaFollower
+    ):
+        """Test that a replica falling behind the log bootstraps again."""
+        follower.poll()
+        change_log = ChangeLog(capacity=1)
+        change_log.sequence = writer_system.change_log.sequence
+        writer_system.change_log = change_log
+        for cohort in ["2", "3"]:
+            writer_system.add_or_update_evaluation(
+                Evaluation(**{**EVALUATION, "cohort": cohort})
+            )
+        assert follower.poll()
+        assert follower.bootstrap_count == 2
+        assert len(follower.evaluation_system.evaluations) == 3
+
+    def test_bootstrap_after_restart(
+        self, writer_system: EvaluationSystem, follower: ReplicaFollower
+    ):
+        """Test that a replica bootstraps again after the writer restarted."""
+        follower.poll()
+        writer_system.epoch = "restarted"
+        assert follower.poll()
+        assert follower.leader_epoch == "restarted"
+        assert follower.bootstrap_count == 2
+
+
+class TestReadOnlyService:
+    """Test the REST API of a read replica."""
+
+    def test_rejects_writes(self):
+        """Test that a replica rejects writes and is not ready before its bootstrap."""
+        client = TestClient(
+            RestService(
+                EvaluationSystem(InMemoryInterface()), leader_url="http://writer"
+            ).app
+        )
+        assert client.post("/evaluation/multiple", json=EVALUATION).status_code == 403
+        assert client.post("/sentiment/score").status_code == 403
+        assert client.post("/shards/freeze", params={"name": "SS21"}).status_code == 403
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["replication"]["leader"] == "http://writer"
+        assert client.get("/replication/status").json()["role"] == "replica"
@@ -0,0 +1,89 @@
+"""Unit tests for semester parsing and the semester ordered results."""
+from datetime import date
+
+import pytest
+
+from evaluation_infrastructure.errors import InvalidSemesterError
+from evaluation_infrastructure.logic.result import Result, ResultType
+from evaluation_infrastructure.logic.semester import normalize_semester, parse_semester
+
+
+class TestSemester:
+    """Test parsing and normalizing semester labels."""
+
+    @pytest.mark.parametrize(
+        "label, canonical",
+        [
+            ("WS22/23", "WS22/23"),
+            ("ws 2022/2023", "WS22/23"),
+            ("WiSe 22/23", "WS22/23"),
+            ("SS23", "SS23"),
+            ("SoSe 2023", "SS23"),
+            (" ss23 ", "SS23"),
+        ],
+    )
+    def test_normalize(self, label: str, canonical: str):
+        """Test that accepted spellings are normalized to the canonical label."""
+        assert normalize_semester(label) == canonical
+
+    @pytest.mark.parametrize("label", ["", "1", "WS22", "WS22/24", "SS22/23", "FS23"])
+    def test_invalid(self, label: str):
+        """Test that invalid labels are rejected."""
+        with pytest.raises(InvalidSemesterError):
+            parse_semester(label)
+
+    def test_order_and_end_date(self):
+        """Test that semesters are ordered chronologically."""
+        semesters = [parse_semester(label) for label in ["WS22/23", "SS22", "SS23"]]
+        assert [semester.label for semester in sorted(semesters)] == [
+            "SS22",
+            "WS22/23",
+            "SS23",
+        ]
+        assert parse_semester("WS22/23").end_date == date(2023, 1, 31)
+        assert parse_semester("SS23").end_date == date(2023, 6, 30)
+
+
+class TestResultRange:
+    """Test that results are kept sorted and queried by semester range."""
+
+    @pytest.fixture
+    def result(self):
+        """Fixture for a result with unsorted semesters."""
+        yield Result(
+            faculty="Computer Science",
+            course="Data Science",
+            lecturer="Dr. John Doe",
+            results=[
+                ResultType(semester=label, topics_distribution={"Topic": value})
+                for label, value in [("SS23", 0.3), ("ws 21/22", 0.1), ("SS22", 0.2)]
+            ],
+        )
+
+    def test_sorted(self, result: Result):
+        """Test that results are sorted by semester with canonical labels."""
+        assert [single.semester for single in result.results] == [
+            "WS21/22",
+            "SS22",
+            "SS23",
+        ]
+        result.add_result_type(
+            ResultType(semester="WS22/23", topics_distribution={"Topic": 0.4})
+        )
+        assert result.return_results().topics == {"Topic": [0.1, 0.2, 0.4, 0.3]}
+
+    def test_range(self, result: Result):
+        """Test that a range returns the semesters between start and end."""
+        dashboard = result.return_results(start="SS22", end="WS22/23")
+        assert dashboard.semesters == [date(2022, 6, 30)]
+        assert dashboard.topics == {"Topic": [0.2]}
+        assert result.return_results(start="SS24").semesters == []
+
+    def test_trends(self, result: Result):
+        """Test moving averages and deltas, including semesters before the range."""
+        dashboard = result.return_results(start="SS22", window=2, deltas=True)
+        assert dashboard.semester_labels == ["SS22", "SS23"]
+        assert dashboard.moving_averages["Topic"] == pytest.approx([0.15, 0.25])
+        assert dashboard.deltas["Topic"] == pytest.approx([0.1, 0.1])
+        assert result.return_results(deltas=True).deltas["Topic"][0] is None
+        assert result.return_results().moving_averages is None
@@ -0,0 +1,104 @@
+"""Unit tests for the sentiment scoring."""
+from array import array
+
+import pytest
+
+from evaluation_infrastructure.database_access.memory_interface import (
+    InMemoryInterface,
+)
+from evaluation_infrastructure.logic import sentiment
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+
+@pytest.fixture
+def evaluation_system(make_evaluation):
+    """Fixture for an evaluation system with scored and unscored comments."""
+    evaluation_system = EvaluationSystem(InMemoryInterface())
+    evaluation_system.add_or_update_evaluation(
+        make_evaluation(comments=["Very helpful.", "Boring slides."])
+    )
+    evaluation_system.add_or_update_evaluation(
+        make_evaluation(lecturer="Dr. Jane Doe", comments=["Not clear at all."])
+    )
+    yield evaluation_system
+
+
+class TestScoring:
+    """Test the lexicon scorer."""
+
+    @pytest.mark.parametrize(
+        "comment, sign",
+        [
+            ("Great and well structured lecture.", 1),
+            ("Boring and unclear.", -1),
+            ("Not helpful.", -1),
+            ("Lorem ipsum dolor.", 0),
+        ],
+    )
+    def test_polarity(self, comment: str, sign: int):
+        """Test the sign of the scores."""
+        score = sentiment.score_comment(comment)
+        assert -1 < score < 1
+        assert (score > 0) - (score < 0) == sign
+
+    def test_intensifier(self):
+        """Test that intensifiers strengthen the score."""
+        assert sentiment.score_comment("very good") > sentiment.score_comment("good")
+
+    def test_batches_in_processes(self):
+        """Test that scoring in worker processes keeps the order of the comments."""
+        comments = ["good", "bad", "lorem"] * 50
+        inline, _ = sentiment.score_comments(comments, workers=1, batch_size=16)
+        parallel, run = sentiment.score_comments(comments, workers=2, batch_size=16)
+        assert parallel == inline == sentiment.score_batch(comments)
+        assert run.workers == 2
+        assert run.dict["comments"] == 150
+
+
+class TestEvaluationSystem:
+    """Test scoring the comments held by the evaluation system."""
+
+    def test_scores_new_comments_only(
+        self, evaluation_system: EvaluationSystem, make_evaluation
+    ):
+        """Test that only comments added since the last run are scored."""
+        assert evaluation_system.score_sentiment().comments == 3
+        assert evaluation_system.score_sentiment().comments == 0
+        evaluation_system.add_or_update_evaluation(
+            make_evaluation(comments=["Excellent."])
+        )
+        assert evaluation_system.score_sentiment().comments == 1
+        evaluation = evaluation_system.get_evaluation(
+            "SS21", "1", "Computer Science", "Data Science", "Dr. John Doe"
+        )
+        assert isinstance(evaluation.scores, array)
+        assert len(evaluation.scores) == 3 and not evaluation.unscored
+
+    def test_aggregate(self, evaluation_system: EvaluationSystem):
+        """Test the aggregates per lecturer."""
+        evaluation_system.score_sentiment()
+        groups = evaluation_system.get_sentiment("lecturer", course="Data Science")
+        assert [group["lecturer"] for group in groups] == [
+            "Dr. Jane Doe",
+            "Dr. John Doe",
+        ]
+        assert groups[0]["negative"] == 1.0
+        assert groups[1]["comments"] == 2
+        assert groups[1]["positive"] == groups[1]["negative"] == 0.5
+        assert evaluation_system.get_sentiment(semester="WS21/22") == []
+
+    def test_scores_persisted(self, evaluation_system: EvaluationSystem):
+        """Test that the scores are backed up and restored."""
+        evaluation_system.score_sentiment()
+        evaluation_system.backup_to_database()
+        restored = EvaluationSystem(evaluation_system.database_interface)
+        restored.create_from_database()
+        assert restored.score_sentiment().comments == 0
+        # Scores are stored with four decimals
+        restored_groups = restored.get_sentiment()
+        groups = evaluation_system.get_sentiment()
+        for restored_group, group in zip(restored_groups, groups):
+            assert restored_group.pop("mean") == pytest.approx(
+                group.pop("mean"), abs=1e-4
+            )
+        assert restored_groups == groups
@@ -0,0 +1,102 @@
+"""Tests for the embedded SQLite interface."""
+import sqlite3
+import threading
+
+from pytest import fixture, raises
+
+from evaluation_infrastructure.database_access.factory import create_database_interface
+from evaluation_infrastructure.database_access.sqlite_interface import SQLiteInterface
+from evaluation_infrastructure.logic.evaluation import Evaluation
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
+
+EVALUATION = {
+    "semester": "SS21",
+    "cohort": "1",
+    "faculty": "Computer Science",
+    "course": "Data Science",
+    "lecturer": "Dr. John Doe",
+    "evaluations": ["good"],
+}
+
+
+@fixture(scope="function")
+def sqlite_interface(tmp_path):
+    """Fixture for an SQLite interface on a temporary file."""
+    interface = create_database_interface("sqlite", str(tmp_path / "test.sqlite3"))
+    yield interface
+    interface.disconnect()
+
+
+class TestSQLiteInterface:
+    """Test the SQLite interface."""
+
+    def test_wal_mode(self, sqlite_interface: SQLiteInterface):
+        """Test that the database is opened in WAL mode."""
+        journal_mode = sqlite_interface.connection.execute(
+            "PRAGMA journal_mode"
+        ).fetchone()
+        assert journal_mode == ("wal",)
+
+    def test_bulk_upsert_merges_by_key(self, sqlite_interface: SQLiteInterface):
+        """Test that documents with the same key are updated, keeping other fields."""
+        sqlite_interface.bulk_upsert(
+            [{**EVALUATION, "note": "kept"}], table="evaluations"
+        )
+        sqlite_interface.bulk_upsert(
+            [{**EVALUATION, "evaluations": ["good", "bad"]}], table="evaluations"
+        )
+        assert sqlite_interface.fetch("evaluations") == [
+            {**EVALUATION, "note": "kept", "evaluations": ["good", "bad"]}
+        ]
+
+    def test_query_and_projection(self, sqlite_interface: SQLiteInterface):
+        """Test queries on key and non-key fields."""
+        sqlite_interface.save(
+            [EVALUATION, {**EVALUATION, "cohort": "2", "evaluations": []}],
+            table="evaluations",
+        )
+        assert sqlite_interface.query(
+            {"cohort": "2"}, "evaluations", {"cohort": 1}
+        ) == [{"cohort": "2"}]
+        assert sqlite_interface.exists({"course": "Data Science"}, "evaluations")
+        assert not sqlite_interface.exists({"course": "Databases"}, "evaluations")
+
+    def test_transaction_rollback(self, sqlite_interface: SQLiteInterface):
+        """Test that a failing transaction leaves the database unchanged."""
+        with raises(RuntimeError):
+            with sqlite_interface.transaction():
+                sqlite_interface.insert(EVALUATION, table="evaluations")
+                raise RuntimeError("abort")
+        assert sqlite_interface.fetch("evaluations") == []
+
+    def test_failed_begin_releases_lock(self, sqlite_interface: SQLiteInterface):
+        """Test that the lock is released if the transaction cannot be started."""
+        sqlite_interface.connection.close()
+        with raises(sqlite3.ProgrammingError):
+            with sqlite_interface.transaction():
+                pass
+        assert sqlite_interface.transaction_depth == 0
+        acquired = []
+
+        def acquire() -> None:
+            acquired.append(sqlite_interface.lock.acquire(timeout=1))
+            if acquired[-1]:
+                sqlite_interface.lock.release()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        assert acquired == [True]
+        sqlite_interface._connection = None  # pylint: disable=protected-access
+
+    def test_round_trip(self, tmp_path):
+        """Test that a backed up evaluation system is restored from the file."""
+        path = str(tmp_path / "round_trip.sqlite3")
+        evaluation_system = EvaluationSystem(SQLiteInterface(path))
+        evaluation_system.add_or_update_evaluation(Evaluation(**EVALUATION))
+        evaluation_system.backup_to_database()
+        evaluation_system.database_interface.disconnect()
+
+        restored = EvaluationSystem(SQLiteInterface(path))
+        restored.create_from_database()
+        assert [evaluation.dict for evaluation in restored.evaluations] == [EVALUATION]
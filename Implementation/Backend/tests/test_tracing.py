@@ -0,0 +1,63 @@
+"""Unit tests for the request traces."""
+from evaluation_infrastructure import tracing
+
+
+class TestSpans:
+    """Test the spans of a request."""
+
+    def test_span_without_trace_records_nothing(self):
+        """Spans outside a traced request are no-ops."""
+        with tracing.span("lookup") as current_span:
+            pass
+        assert current_span.trace is None
+
+    def test_spans_are_recorded_on_the_current_trace(self):
+        """Spans are recorded on the trace set for the request."""
+        tracer = tracing.Tracer(enabled=True, slow_request_seconds=10)
+        trace = tracer.start("GET", "/results/course/Data Science")
+        token = tracing.CURRENT_TRACE.set(trace)
+        try:
+            with tracing.span("lookup"):
+                pass
+            with tracing.span("serialization"):
+                pass
+        finally:
+            tracing.CURRENT_TRACE.reset(token)
+        tracer.finish(trace, "/results/course/{course}", 200)
+
+        assert [span[0] for span in trace.spans] == ["lookup", "serialization"]
+        assert 0 <= trace.untraced_seconds <= trace.duration_seconds
+        assert tracer.get_traces() == [trace]
+        assert tracer.get_traces(slow=True) == []
+        summary = tracer.summary()["GET /results/course/{course}"]
+        assert summary["requests"] == 1
+        assert set(summary["mean_span_ms"]) == {"lookup", "serialization"}
+
+    def test_untraced_seconds_counts_nested_spans_once(self):
+        """Nested and overlapping spans are not counted twice."""
+        trace = tracing.Trace(trace_id=1, method="GET", path="/")
+        trace.duration_seconds = 1.0
+        trace.spans = [("outer", 0.1, 0.5), ("inner", 0.2, 0.1), ("late", 0.5, 0.2)]
+        assert abs(trace.untraced_seconds - 0.4) < 1e-9
+
+
+class TestProfiling:
+    """Test the profiling of slow requests."""
+
+    def test_slow_sampled_requests_keep_their_profile(self):
+        """A sampled request over the threshold keeps its cProfile output."""
+        tracer = tracing.Tracer(
+            enabled=True, slow_request_seconds=0, profile_sample_rate=1.0
+        )
+        trace = tracer.start("GET", "/")
+        profiler = tracer.start_profile()
+        assert profiler is not None
+        # Only one request is profiled at a time
+        assert tracer.start_profile() is None
+        sorted(range(1000), key=str)
+        tracer.finish(trace, "/", 200, profiler)
+
+        assert trace.profile is not None and "function calls" in trace.profile
+        assert tracer.get_traces(slow=True) == [trace]
+        assert tracer.get_trace(trace.trace_id) is trace
+        assert tracer.start_profile() is not None
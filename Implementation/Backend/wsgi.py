@@ -1,7 +1,18 @@
 """Initializes the REST API and starts the server."""
 
-import uvicorn
 from evaluation_infrastructure.api.rest_api import RestService
+from evaluation_infrastructure.config import config
+from evaluation_infrastructure.database_access.factory import create_database_interface
+from evaluation_infrastructure.logic.archive import open_archive_store
+from evaluation_infrastructure.logic.comment_store import open_comment_store
+from evaluation_infrastructure.logic.evaluation_system import EvaluationSystem
 
 if __name__ == "__main__":
-    RestService().run(host="0.0.0.0", port=8000)
+    evaluation_system = EvaluationSystem(
+        create_database_interface(),
+        open_comment_store(config.COMMENT_STORE_PATH),
+        open_archive_store(config.ARCHIVE_DIRECTORY, config.ARCHIVE_COMPRESSION_PRESET),
+    )
+    RestService(evaluation_system, leader_url=config.REPLICATION_LEADER_URL).run(
+        host="0.0.0.0", port=8000
+    )
@@ -3,49 +3,45 @@ import axios, { AxiosResponse } from 'axios';
 import { API_URL } from '../config';
 import { useAlertMessages, ErrorMessage } from '../components/AlertMessages';
 import { Evaluation } from '../types/evaluation';
-import { Result } from '../types/results';
+import { Result, ResultQuery } from '../types/results';
+import { SearchMatch } from '../types/search';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faSearch } from '@fortawesome/free-solid-svg-icons';
 
+const SEARCH_DEBOUNCE_MS = 150;
+
 interface SearchBarProps {
     responseType: 'result' | 'evaluation';
     onDataFetched: (data: Evaluation[] | Result) => void;
+    resultQuery?: ResultQuery;
 }
 
-const SearchBar: React.FC<SearchBarProps> = ({ responseType, onDataFetched }: SearchBarProps) => {
+const SearchBar: React.FC<SearchBarProps> = ({ responseType, onDataFetched, resultQuery }: SearchBarProps) => {
     const {
         errorMessage,
         closeErrorMessage,
         handleErrorMessage,
     } = useAlertMessages();
     const [isLoading, setIsLoading] = useState(false);
-    const [facultyJSON, setFacultyJSON] = useState<any>({});
     const [facultiesList, setFacultyList] = useState<string[]>([]);
     const [searchTerm, setSearchTerm] = useState<string>('');
-    const [suggestions, setSuggestions] = useState<string[]>([]);
     const [filteredSuggestions, setFilteredSuggestions] = useState<string[]>([]);
     const [selectedFaculty, setSelectedFaculty] = useState<string>('');
 
-    const setSearchData = (data: string[], faculty: string) => {
-        setSuggestions(data);
-        setFilteredSuggestions(data);
-        setSelectedFaculty(faculty);
-    }
-
     useEffect(() => {
-        // Fetch faculties and their courses when the component mounts
+        // Fetch the faculties when the component mounts, courses are searched on the server
         const fetchFaculties = async () => {
             setIsLoading(true);
             try {
-                const response = await axios.get(`${API_URL}/faculties/list`);
-                const { data } = response;
-                const faculties = Object.keys(data);
+                const response = await axios.get<SearchMatch[]>(`${API_URL}/search`, {
+                    params: { kind: 'faculty', limit: 100 },
+                });
+                const faculties = response.data.map((match) => match.name);
                 setFacultyList(faculties);
-                setFacultyJSON(data);
-                setSearchData(data[faculties[0]], faculties[0]);
+                setSelectedFaculty(faculties[0] ?? '');
             }
             catch (error) {
-                handleErrorMessage(`Error fetching faculties and courses: ${error}`);
+                handleErrorMessage(`Error fetching faculties: ${error}`);
             } finally {
                 setIsLoading(false);
             }
@@ -54,19 +50,32 @@ const SearchBar: React.FC<SearchBarProps> = ({ responseType, onDataFetched }: Se
     }
         , []);
 
+    useEffect(() => {
+        // Debounce the search so that only the last keystroke triggers a request
+        if (!selectedFaculty) {
+            return;
+        }
+        const timeout = setTimeout(async () => {
+            try {
+                const response = await axios.get<SearchMatch[]>(`${API_URL}/search`, {
+                    params: { q: searchTerm, kind: 'course', faculty: selectedFaculty, limit: 10 },
+                });
+                setFilteredSuggestions(response.data.map((match) => match.name));
+            }
+            catch (error) {
+                handleErrorMessage(`Error searching courses: ${error}`);
+            }
+        }, SEARCH_DEBOUNCE_MS);
+        return () => clearTimeout(timeout);
+    }
+        , [searchTerm, selectedFaculty]);
+
     const handleFacultyChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
-        const faculty = event.target.value;
-        const courses = facultyJSON[faculty];
-        setSearchData(courses, faculty);
+        setSelectedFaculty(event.target.value);
     }
 
     const handleInputChange = (event: React.ChangeEvent<HTMLInputElement>) => {
-        const inputValue = event.target.value;
-        setSearchTerm(inputValue);
-        const filtered = suggestions.filter((item) =>
-            item.toLowerCase().includes(inputValue.toLowerCase())
-        );
-        setFilteredSuggestions(filtered);
+        setSearchTerm(event.target.value);
     };
 
     const handleSelectItem = async (item: string): Promise<void> => {
@@ -74,7 +83,9 @@ const SearchBar: React.FC<SearchBarProps> = ({ responseType, onDataFetched }: Se
         try {
             let response;
             if (responseType === 'result') {
-                response = await axios.get<Result>(`${API_URL}/results/course/${item}`);
+                response = await axios.get<Result>(`${API_URL}/results/course/${item}`, {
+                    params: resultQuery,
+                });
             } else if (responseType === 'evaluation') {
                 response = await axios.get<Evaluation[]>(`${API_URL}/evaluations/course/${item}`);
             }
@@ -1,6 +1,8 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import Plot from 'react-plotly.js';
-import { Result } from '../types/results';
+import axios from 'axios';
+import { API_URL } from '../config';
+import { Result, ResultQuery } from '../types/results';
 import * as d3 from 'd3';
 
 import SearchBar from '../components/GeneralSearchBar';
@@ -12,6 +14,22 @@ const Dashboard: React.FC = () => {
     const colorScale = d3.scaleOrdinal(d3.schemeTableau10);
 
     const [fetchedData, setFetchedData] = useState<Result>({} as Result);
+    // Only the displayed semesters are requested, the server slices the timeline
+    const [resultQuery, setResultQuery] = useState<ResultQuery>({});
+
+    useEffect(() => {
+        if (!fetchedData.course) {
+            return;
+        }
+        axios.get<Result>(`${API_URL}/results/course/${fetchedData.course}`, { params: resultQuery })
+            .then((response) => setFetchedData(response.data))
+            .catch(() => setFetchedData({} as Result));
+    }, [resultQuery]);
+
+    const handleRangeChange = (event: React.ChangeEvent<HTMLInputElement>) => {
+        const { name, value } = event.target;
+        setResultQuery((query) => ({ ...query, [name]: value.trim() || undefined }));
+    };
 
     const manipulateDataLineChart = (input_data: Result) => {
         const dat_for_dasboard = []
@@ -120,7 +138,23 @@ const Dashboard: React.FC = () => {
     return (
         <div className="container mx-auto px-4">
             <div className="flex flex-wrap mx-auto max-w-screen justify-center pt-5 w-2/3">
-                <SearchBar responseType="result" onDataFetched={handleDataFetched} /> {/*solve this error, even tho all works*/}
+                <SearchBar responseType="result" onDataFetched={handleDataFetched} resultQuery={resultQuery} /> {/*solve this error, even tho all works*/}
+            </div>
+            <div className="flex mx-auto justify-center gap-4 pt-3 w-2/3">
+                <input
+                    type="text"
+                    name="start"
+                    placeholder="From semester (e.g. SS21)"
+                    onBlur={handleRangeChange}
+                    className="input px-3 py-2 border rounded-lg bg-transparent outline-none"
+                />
+                <input
+                    type="text"
+                    name="end"
+                    placeholder="To semester (e.g. WS22/23)"
+                    onBlur={handleRangeChange}
+                    className="input px-3 py-2 border rounded-lg bg-transparent outline-none"
+                />
             </div>
             <div className="grid gap-4 grid-cols-1 sm:grid-cols-2 md:grid-cols-2 lg:grid-cols-2 xl:grid-cols-2">
                 {Object.keys(fetchedData).length === 0 ? (
@@ -3,7 +3,21 @@ export interface Result {
     course: string;
     lecturer: string;
     semesters: string[];
+    semester_labels: string[];
     topics: {
         [topic: string]: number[];
     };
-};
\ No newline at end of file
+    moving_averages: {
+        [topic: string]: number[];
+    } | null;
+    deltas: {
+        [topic: string]: (number | null)[];
+    } | null;
+};
+
+export interface ResultQuery {
+    start?: string;
+    end?: string;
+    window?: number;
+    deltas?: boolean;
+};
@@ -0,0 +1,5 @@
+export interface SearchMatch {
+    kind: 'course' | 'lecturer' | 'faculty' | 'cohort';
+    name: string;
+    count: number;
+};